@@ -0,0 +1,110 @@
+"""
+Benchmarks of the identification pipeline (airspeed velocity).
+
+Run the suite for the current commit and compare two versions:
+::
+    $ asv run
+    $ asv continuous master HEAD
+    $ asv publish && asv preview
+
+The results are stored in ``.asv/results``.
+"""
+import numpy as np
+
+import pyEMA
+from pyEMA import stabilization, normal_modes, tools, synthetic
+
+
+def _synthetic_frf(n_channels, n_freq, n_modes, f_max=5000., seed=0):
+    """Receptance FRF matrix of ``n_modes`` modes, evenly spaced in ``(0, f_max)``."""
+    rng = np.random.default_rng(seed)
+    freq = np.linspace(0, f_max, n_freq)
+    fn = np.linspace(0, f_max, n_modes+2)[1:-1]
+    poles = synthetic.modal_poles(fn, rng.uniform(0.005, 0.02, n_modes))
+    A = (rng.standard_normal((n_channels, n_modes)) + 1j*rng.standard_normal((n_channels, n_modes))) * 1e3
+    return freq, synthetic.frf(freq, poles, A), fn
+
+
+def _model(n_channels, n_freq, pol_order_high, n_modes):
+    freq, frf, fn = _synthetic_frf(n_channels, n_freq, n_modes)
+    model = pyEMA.Model(frf=frf, freq=freq, lower=10, upper=freq[-1], pol_order_high=pol_order_high)
+    return model, fn
+
+
+class Poles:
+    params = ([4, 64], [1001, 10001], [30, 60])
+    param_names = ['n_channels', 'n_freq', 'pol_order_high']
+    timeout = 300
+
+    def setup(self, n_channels, n_freq, pol_order_high):
+        self.model, _ = _model(n_channels, n_freq, pol_order_high, 5)
+
+    def time_get_poles(self, n_channels, n_freq, pol_order_high):
+        self.model.lscf = None
+        self.model.get_poles(show_progress=False)
+
+    def peakmem_get_poles(self, n_channels, n_freq, pol_order_high):
+        self.model.lscf = None
+        self.model.get_poles(show_progress=False)
+
+
+class Selection:
+    params = ([30, 60], [3, 10])
+    param_names = ['pol_order_high', 'n_modes']
+    timeout = 300
+
+    def setup(self, pol_order_high, n_modes):
+        self.model, self.fn = _model(8, 2001, pol_order_high, n_modes)
+        self.model.get_poles(show_progress=False)
+
+    def time_stabilization(self, pol_order_high, n_modes):
+        stabilization._stabilization(self.model.pole_table, self.model.pole_table.n_orders,
+                                     err_fn=0.001, err_xi=0.05)
+
+    def time_select_closest_poles(self, pol_order_high, n_modes):
+        self.model.select_closest_poles(self.fn)
+
+
+class Reconstruction:
+    params = ([4, 64], [1001, 10001], [3, 10])
+    param_names = ['n_channels', 'n_freq', 'n_modes']
+    timeout = 300
+
+    def setup(self, n_channels, n_freq, n_modes):
+        self.model, fn = _model(n_channels, n_freq, 30, n_modes)
+        self.model.get_poles(show_progress=False)
+        self.model.select_closest_poles(fn)
+        self.model.get_constants(FRF_ind=None)
+
+    def time_get_constants(self, n_channels, n_freq, n_modes):
+        self.model.get_constants(FRF_ind='all')
+
+    def time_FRF_reconstruct(self, n_channels, n_freq, n_modes):
+        self.model.FRF_reconstruct(0)
+
+
+class ModeShapes:
+    params = ([4, 64, 1024], [3, 10, 30])
+    param_names = ['n_channels', 'n_modes']
+
+    def setup(self, n_channels, n_modes):
+        rng = np.random.default_rng(0)
+        self.A = rng.standard_normal((n_channels, n_modes)) + 1j*rng.standard_normal((n_channels, n_modes))
+        self.B = self.A + 0.1*rng.standard_normal((n_channels, n_modes))
+
+    def time_MAC(self, n_channels, n_modes):
+        tools.MAC(self.A, self.B)
+
+    def time_MSF(self, n_channels, n_modes):
+        tools.MSF(self.A, self.B)
+
+    def time_complex_to_normal_mode(self, n_channels, n_modes):
+        normal_modes.complex_to_normal_mode(self.A)
+
+
+class Synthetic:
+    params = ([64, 4096], [1001, 10001])
+    param_names = ['n_channels', 'n_freq']
+
+    def time_frf(self, n_channels, n_freq):
+        _synthetic_frf(n_channels, n_freq, 10)
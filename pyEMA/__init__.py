@@ -1,8 +1,18 @@
 __version__ = "0.23"
 
 from .pyEMA import Model
+from .pole_table import PoleTable
+from .cache import PoleCache
+from .lscf import LSCF, PLSCF
+from .lsce import LSCE
+from .profiling import Timings
+from .progress import Cancelled, CancelToken, run_async, tqdm_progress
 from .tools import *
 
 from . import stabilization
 from . import normal_modes
-from . import pole_picking
\ No newline at end of file
+from . import pole_picking
+from . import batch
+from . import synthetic
+from . import rendering
+from . import ssi
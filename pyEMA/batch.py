@@ -0,0 +1,112 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .progress import _track
+
+
+def _attach(name, shape, dtype):
+    """Attach to a shared memory block and view it as an array (no copy)."""
+    from multiprocessing import shared_memory
+
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _identify_snapshot(index, frf_shm, freq, approx_nat_freq, model_kwargs, poles_kwargs, select_kwargs):
+    """
+    Identify the modal parameters of one snapshot of the shared FRF stack.
+
+    :return: index, natural frequencies, damping ratios, mode shapes
+    """
+    from .pyEMA import Model
+
+    shm, frfs = _attach(*frf_shm)
+    try:
+        model = Model(frf=frfs[index], freq=freq, **model_kwargs)
+        model.get_poles(show_progress=False, **poles_kwargs)
+        model.select_closest_poles(approx_nat_freq, **select_kwargs)
+        A = model.get_constants(FRF_ind=None)
+        return index, np.asarray(model.nat_freq), np.asarray(model.nat_xi), A
+    finally:
+        del frfs
+        shm.close()
+
+
+def identify_batch(frfs, freq, approx_nat_freq, lower=50, upper=10000, pol_order_high=100,
+                   n_jobs=None, model_kwargs=None, poles_kwargs=None, select_kwargs=None, progress=None):
+    """
+    Identify the modal parameters of many FRF snapshots that share the
+    same setup (e.g. structural health monitoring).
+
+    The FRF stack is copied once into shared memory; the worker processes
+    access it without copying. Requires Python 3.8 or newer
+    (``multiprocessing.shared_memory``). For each snapshot the full pipeline is run:
+    ``Model``, ``get_poles``, ``select_closest_poles`` and ``get_constants``.
+
+    Usage:
+    ::
+        >>> nat_freq, nat_xi, A = pyEMA.batch.identify_batch(frfs, freq, [176, 476, 932],
+        ...                                                   lower=10, upper=5000, pol_order_high=60)
+
+    :param frfs: FRF snapshots, shape ``(n_snapshots, n_locations, n_freq)``
+    :type frfs: ndarray
+    :param freq: Frequency array, shared by all the snapshots
+    :type freq: array
+    :param approx_nat_freq: Approximate natural frequencies (see ``Model.select_closest_poles``)
+    :type approx_nat_freq: list
+    :param lower: Lower limit for pole determination [Hz]
+    :param upper: Upper limit for pole determination [Hz]
+    :param pol_order_high: Highest order of the polynomial
+    :param n_jobs: Number of processes. If None, the number of CPUs is used.
+    :type n_jobs: int
+    :param model_kwargs: Additional arguments of ``Model``, optional
+    :param poles_kwargs: Additional arguments of ``Model.get_poles``, optional
+    :param select_kwargs: Additional arguments of ``Model.select_closest_poles``, optional
+    :param progress: Progress callback ``progress(stage, done, total)`` that
+        is called after each snapshot. If it raises an exception, the
+        snapshots that have not started yet are cancelled.
+    :return: natural frequencies ``(n_snapshots, n_modes)``, damping ratios
+        ``(n_snapshots, n_modes)`` and mode shapes ``(n_snapshots, n_locations, n_modes)``
+    """
+    try:
+        from multiprocessing import shared_memory
+    except ImportError:
+        raise Exception('identify_batch requires Python 3.8 or newer (multiprocessing.shared_memory)')
+
+    frfs = np.asarray(frfs)
+    if frfs.ndim != 3:
+        raise Exception(f'frfs must have 3 dimensions ({frfs.ndim})')
+    freq = np.asarray(freq)
+
+    model_kwargs = dict(model_kwargs or {}, lower=lower, upper=upper, pol_order_high=pol_order_high)
+    poles_kwargs = poles_kwargs or {}
+    select_kwargs = select_kwargs or {}
+
+    n_snapshots, n_locations = frfs.shape[:2]
+    n_modes = len(approx_nat_freq)
+    nat_freq = np.zeros((n_snapshots, n_modes))
+    nat_xi = np.zeros((n_snapshots, n_modes))
+    A = np.zeros((n_snapshots, n_locations, n_modes), dtype=complex)
+
+    shm = shared_memory.SharedMemory(create=True, size=max(1, frfs.nbytes))
+    try:
+        np.ndarray(frfs.shape, dtype=frfs.dtype, buffer=shm.buf)[:] = frfs
+        frf_shm = (shm.name, frfs.shape, frfs.dtype.str)
+
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            futures = [executor.submit(_identify_snapshot, i, frf_shm, freq, approx_nat_freq,
+                                       model_kwargs, poles_kwargs, select_kwargs)
+                       for i in range(n_snapshots)]
+            try:
+                for future in _track(futures, progress, 'identify_batch'):
+                    i, nat_freq[i], nat_xi[i], A[i] = future.result()
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+    finally:
+        shm.close()
+        shm.unlink()
+
+    return nat_freq, nat_xi, A
@@ -0,0 +1,114 @@
+import os
+import glob
+import hashlib
+
+import numpy as np
+
+from .pole_table import PoleTable
+
+# Increase when the stored format or the pole computation changes.
+_CACHE_VERSION = 1
+
+
+class PoleCache:
+    """
+    Persistent on-disk cache of ``Model.get_poles`` results.
+
+    Each result is stored as an uncompressed ``.npz`` file named after a
+    hash of the FRF, the frequency axis and the parameters that influence
+    the computed poles. When the total size of the cache exceeds
+    ``max_size``, the least recently used files are removed.
+
+    Usage:
+    ::
+        >>> a = pyEMA.Model(frf, freq, lower=10, upper=5000, pol_order_high=60)
+        >>> a.get_poles(cache='pole_cache') # computed and stored
+        >>> a.get_poles(cache='pole_cache') # loaded from disk
+    """
+
+    def __init__(self, directory, max_size=2**30):
+        """
+        :param directory: cache directory (created if it does not exist)
+        :type directory: str
+        :param max_size: maximum total size of the cache [bytes]
+        :type max_size: int
+        """
+        self.directory = directory
+        self.max_size = int(max_size)
+        os.makedirs(self.directory, exist_ok=True)
+
+    def key(self, frf, freq, **params):
+        """
+        Hash of the FRF, frequency axis and parameters.
+
+        :param frf: FRF matrix
+        :param freq: frequency array
+        :param params: parameters of the pole computation
+        :return: hexadecimal key
+        """
+        h = hashlib.blake2b(digest_size=20)
+        h.update(repr((_CACHE_VERSION, frf.shape, str(frf.dtype), sorted(params.items()))).encode())
+        h.update(np.ascontiguousarray(freq).data)
+        # hash in chunks of rows, so memory-mapped FRFs are not loaded at once
+        step = max(1, 2**24 // max(1, frf.itemsize * frf.shape[-1]))
+        for i in range(0, frf.shape[0], step):
+            h.update(np.ascontiguousarray(frf[i:i+step]).data)
+        return h.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.npz')
+
+    def load(self, key):
+        """
+        Load the cached pole table.
+
+        :param key: cache key
+        :return: PoleTable or None if the key is not cached
+        """
+        path = self._path(key)
+        try:
+            with np.load(path) as f:
+                table = PoleTable.from_data(f['data'], f['offsets'])
+        except (OSError, KeyError, ValueError):
+            return None
+        os.utime(path) # mark as recently used
+        return table
+
+    def store(self, key, table):
+        """
+        Store the pole table and evict old entries if needed.
+
+        :param key: cache key
+        :param table: PoleTable
+        """
+        path = self._path(key)
+        tmp_path = path + f'.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, data=table.data, offsets=table.offsets)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self):
+        """Remove the least recently used entries until the cache fits in ``max_size``."""
+        files = []
+        for path in glob.glob(os.path.join(self.directory, '*.npz')):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(_[1] for _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def clear(self):
+        """Remove all entries."""
+        for path in glob.glob(os.path.join(self.directory, '*.npz')):
+            os.remove(path)
@@ -0,0 +1,276 @@
+import numpy as np
+import scipy.fft
+import scipy.linalg
+from scipy.linalg import companion
+
+from .lscf import _chunk_size
+from .pole_table import PoleTable
+from .profiling import _no_stage
+from .progress import _track
+
+
+def _impulse_responses(frf, lower_ind, nf):
+    """
+    Impulse responses of FRF rows (one inverse FFT of all the rows).
+
+    :param frf: FRF rows, shape ``(n_rows, n_freq)``
+    :param lower_ind: index of the lower frequency limit, the bins below it
+        are set to zero
+    :param nf: length of the impulse responses (``2*(n_freq-1)``)
+    :return: array of shape ``(n_rows, nf)``
+    """
+    frf = frf.copy()
+    frf[:, :lower_ind] = 0
+    return scipy.fft.irfft(frf, n=nf)
+
+
+def _lsce_accumulate(h, n, r, p, weights=None):
+    """
+    Add the contribution of impulse responses to the Gram matrix of the
+    block Hankel matrix of the LSCE method.
+
+    The Hankel matrix of a row has the rows ``h[k:k+n+1]``,
+    ``k = 0 ... K-1`` (``K = len(h) - n``). Its Gram matrix
+    ``G[i, j] = sum_k h[k+i] * h[k+j]`` is not formed from the Hankel
+    matrix: the first row of ``G`` is a correlation (computed with the
+    FFT) and along the diagonals ``G`` changes only by the edge terms
+    ``G[i+1, j+1] - G[i, j] = h[K+i]*h[K+j] - h[i]*h[j]``. The sums over
+    the rows are accumulated in place in ``r`` (first row) and ``p``
+    (edge terms).
+
+    :param h: impulse responses, shape ``(n_rows, nf)``
+    :param n: twice the highest polynomial order
+    :param r: accumulated first row of ``G``, shape ``(n+1,)``
+    :param p: accumulated edge terms, shape ``(n, n)``
+    :param weights: weights of the rows, optional. A weight scales the
+        contribution of the row to ``G``.
+    """
+    nf = h.shape[1]
+    n_lags = nf - n
+    if weights is not None:
+        h = h * np.sqrt(weights).astype(h.dtype)[:, None]
+
+    # the correlation does not wrap around: the lags of the leading part
+    # (`n_lags` samples) reach at most the end of the response
+    head = scipy.fft.rfft(h[:, :n_lags], n=nf)
+    full = scipy.fft.rfft(h, n=nf)
+    r += scipy.fft.irfft(np.sum(np.conj(head) * full, axis=0), n=nf)[:n+1]
+
+    u = h[:, :n]
+    v = h[:, n_lags:n_lags+n]
+    p += v.T @ v - u.T @ u
+
+
+def _lsce_blocks(h, n):
+    """
+    Contributions of each impulse response to the Gram matrix (see
+    ``_lsce_accumulate``): the first row and the edge samples. The Gram
+    matrix of any weighting of the rows is assembled from these blocks
+    without transforming the FRFs again:
+    ``r = w @ r_i``, ``p = (v*w).T @ v - (u*w).T @ u``.
+
+    :param h: impulse responses, shape ``(n_rows, nf)``
+    :param n: twice the highest polynomial order
+    :return: ``r_i`` of shape ``(n_rows, n+1)``, ``u`` and ``v`` of shape ``(n_rows, n)``
+    """
+    nf = h.shape[1]
+    n_lags = nf - n
+    head = scipy.fft.rfft(h[:, :n_lags], n=nf)
+    r = scipy.fft.irfft(np.conj(head) * scipy.fft.rfft(h, n=nf), n=nf)[:, :n+1]
+    return r, h[:, :n].copy(), h[:, n_lags:n_lags+n].copy()
+
+
+def _lsce_gram(r, p):
+    """
+    Gram matrix of the block Hankel matrix from its first row and the edge
+    terms (see ``_lsce_accumulate``).
+
+    :param r: first row, shape ``(n+1,)``
+    :param p: edge terms, shape ``(n, n)``
+    :return: symmetric array of shape ``(n+1, n+1)``
+    """
+    n = len(r) - 1
+    g = np.empty((n+1, n+1))
+    g[0] = r
+    for i in range(1, n+1):
+        g[i, i:] = g[i-1, i-1:n] + p[i-1, i-1:]
+    return np.triu(g) + np.triu(g, 1).T
+
+
+def _lsce_poles(g, orders, sampling_time, get_partfactors=False, progress=None, n_orders=None, rcond=1e-12,
+                stage=_no_stage):
+    """
+    Solve the LSCE equations for the poles of all orders.
+
+    The autoregressive coefficients of the order ``j`` are the
+    least-squares solution of ``H_j @ a = -h_j``, where ``H_j`` are the
+    first ``j`` columns of the Hankel matrix and ``h_j`` its column ``j``.
+    The upper triangular factor of the QR decomposition of the Hankel
+    matrix is the Cholesky factor of its Gram matrix ``G``, and the
+    leading block of the factor is the factor of ``H_j``. One Cholesky
+    decomposition of ``G`` therefore solves all the orders (the Hankel
+    matrix is never formed). When ``G`` is numerically singular (e.g.
+    noise-free data with less modes than the order), the minimum-norm
+    solution of each order is computed instead.
+
+    :param g: Gram matrix of the Hankel matrix, shape ``(n+1, n+1)``
+    :param orders: polynomial orders
+    :param sampling_time: sampling time of the impulse responses
+    :param get_partfactors: compute participation factors
+    :param progress: progress callback (see ``progress._track``), reported after each order
+    :param n_orders: number of orders of the returned table (see ``lscf._lscf_poles``)
+    :param rcond: relative cut-off of the small singular values
+    :param stage: stage context factory of the profiler (see ``Timings.stage``)
+    :return: PoleTable
+    """
+    l = None
+    try:
+        l = np.linalg.cholesky(g)
+        diag = np.abs(np.diag(l))
+        if (np.min(diag[:-1]) / np.max(diag))**2 <= rcond:
+            l = None
+    except np.linalg.LinAlgError:
+        pass
+
+    if n_orders is None:
+        n_orders = len(orders)
+    counts = np.zeros(n_orders, dtype=np.int64)
+    counts[np.asarray(orders)//2 - 1] = orders
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    start = offsets[np.asarray(orders)//2 - 1]
+    all_poles = np.empty(offsets[-1], dtype=complex)
+    partfactors = np.empty(offsets[-1], dtype=complex) if get_partfactors else None
+
+    for k, j in enumerate(_track(orders, progress, 'lsce.poles')):
+        with stage('solve'):
+            if l is not None:
+                a = -scipy.linalg.cho_solve((l[:j, :j], True), g[:j, j])
+            else:
+                a = -np.linalg.lstsq(g[:j, :j], g[:j, j], rcond=rcond)[0]
+        with stage('roots'):
+            sr = np.roots(np.append(a, 1)[::-1])
+
+        all_poles[start[k]:start[k]+j] = np.log(sr.astype(complex)) / sampling_time
+
+        if get_partfactors:
+            with stage('partfactors'):
+                _v, _w = np.linalg.eig(companion(np.append(a, 1)[::-1]))
+                partfactors[start[k]:start[k]+j] = _w[-1, :]
+
+    return PoleTable(all_poles, offsets, partfactors=partfactors)
+
+
+class LSCE:
+    """
+    Incremental Least-Squares Complex Exponential (LSCE) estimator.
+
+    The impulse responses are the inverse FFT of the FRFs. The LSCE
+    equations of all the polynomial orders are solved from the Gram matrix
+    of the block Hankel matrix of the impulse responses, which is a sum
+    over the FRF rows. As with :class:`LSCF`, FRFs can be added at any
+    time and the poles are recomputed without processing the already added
+    FRFs again.
+
+    Usage:
+    ::
+        >>> est = pyEMA.LSCE(freq, lower=10, pol_order_high=60)
+        >>> est.add(frf)
+        >>> pole_table = est.poles()
+    """
+
+    def __init__(self, freq, lower, pol_order_high, sampling_time=None, dtype='double', orders=None):
+        """
+        :param freq: Frequency array
+        :type freq: array
+        :param lower: Lower limit for pole determination [Hz]. The FRF lines
+            below it are not used for the impulse responses.
+        :type lower: int, float
+        :param pol_order_high: Highest order of the polynomial
+        :type pol_order_high: int
+        :param sampling_time: Sampling time of the impulse responses. If
+            None, ``1/(2*freq[-1])`` is used.
+        :type sampling_time: float
+        :param dtype: Precision of the FFTs, 'double' or 'single'. The Gram
+            matrix is always accumulated and solved in double precision.
+        :type dtype: str, numpy.dtype
+        :param orders: Indices of the polynomial orders that are computed
+            (see :class:`LSCF`).
+        :type orders: list, ndarray
+        """
+        self.freq = np.asarray(freq)
+        self.lower_ind = np.argmin(np.abs(self.freq - lower))
+        self.pol_order_high = int(pol_order_high)
+        if orders is None:
+            self.order_ind = np.arange(self.pol_order_high)
+        else:
+            self.order_ind = np.unique(np.asarray(orders, dtype=int))
+            if len(self.order_ind) == 0 or self.order_ind[0] < 0 or self.order_ind[-1] >= self.pol_order_high:
+                raise Exception(f'orders must be in the range 0...{self.pol_order_high-1}')
+        self.orders = 2 * (self.order_ind + 1)
+        self.n = self.orders[-1]
+        self.nf = 2 * (len(self.freq) - 1)
+        if self.nf <= 2*self.n:
+            raise Exception(f'the impulse responses ({self.nf} samples) are too short for the polynomial order {self.n}')
+        if sampling_time is None:
+            sampling_time = 1/(2*self.freq[-1])
+        self.sampling_time = sampling_time
+
+        self.dtype = np.dtype(dtype)
+        self.complex_dtype = np.result_type(self.dtype, np.complex64)
+
+        self.r = np.zeros(self.n+1)
+        self.p = np.zeros((self.n, self.n))
+        self.n_rows = 0
+
+    def add(self, frf, chunk_size=None, progress=None, weights=None, stage=_no_stage):
+        """
+        Add the contribution of FRF rows.
+
+        :param frf: FRF rows, shape ``(n_rows, n_freq)`` or ``(n_freq,)``
+        :param chunk_size: Number of rows that are transformed at once. If
+            None, it is chosen so that the temporary arrays take
+            approximately 64 MB.
+        :param progress: progress callback ``progress(stage, done, total)``,
+            reported after each chunk, optional
+        :param weights: Non-negative weights of the rows in the least-squares
+            cost. If None, all the rows have the weight 1.
+        :param stage: stage context factory of the profiler (see ``Timings.stage``)
+        """
+        if frf.ndim == 1:
+            frf = frf[None, :]
+        if frf.shape[1] != len(self.freq):
+            raise Exception(
+                f'number of frequency lines ({frf.shape[1]}) does not match the frequency array ({len(self.freq)})')
+        if weights is not None:
+            weights = np.asarray(weights, dtype=float).reshape(-1)
+            if len(weights) != frf.shape[0]:
+                raise Exception(f'number of weights ({len(weights)}) does not match the number of FRF rows ({frf.shape[0]})')
+            if np.any(weights < 0):
+                raise Exception('weights must be non-negative')
+        if chunk_size is None:
+            chunk_size = _chunk_size(frf.shape[1], self.n)
+
+        for i in _track(range(0, frf.shape[0], chunk_size), progress, 'lsce.add'):
+            with stage('fft'):
+                h = _impulse_responses(np.asarray(frf[i:i+chunk_size], dtype=self.complex_dtype),
+                                       self.lower_ind, self.nf)
+            with stage('assembly'):
+                _lsce_accumulate(h, self.n, self.r, self.p,
+                                 weights=None if weights is None else weights[i:i+chunk_size])
+        self.n_rows += frf.shape[0]
+
+    def poles(self, get_partfactors=False, progress=None, stage=_no_stage):
+        """
+        Solve the LSCE equations of all the polynomial orders.
+
+        :param get_partfactors: compute participation factors
+        :param progress: progress callback ``progress(stage, done, total)``,
+            reported after each order, optional
+        :param stage: stage context factory of the profiler (see ``Timings.stage``)
+        :return: PoleTable
+        """
+        if self.n_rows == 0:
+            raise Exception('no FRF was added')
+        return _lsce_poles(_lsce_gram(self.r, self.p), self.orders, self.sampling_time,
+                           get_partfactors=get_partfactors, progress=progress, n_orders=self.pol_order_high,
+                           stage=stage)
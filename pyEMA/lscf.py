@@ -0,0 +1,717 @@
+import numpy as np
+import scipy.fft
+import scipy.linalg
+from scipy.linalg import toeplitz, companion
+
+from .pole_table import PoleTable
+from .profiling import _no_stage
+from .progress import _track
+
+
+# A direct evaluation of the lags is faster than the FFT below this ratio
+# of operation counts (measured with numpy/scipy on a single thread).
+_DFT_COST_RATIO = 0.25
+
+
+def _irfft_adjusted_lower_limit(x, low_lim, indices):
+    """
+    Compute the ifft of real matrix x with adjusted summation limits:
+    ::
+        y(j) = sum[k=-n-2, ... , -low_lim-1, low_lim, low_lim+1, ... n-2, n-1] x[k] * exp(sqrt(-1)*j*k* 2*pi/n),
+        j =-n-2, ..., -low_limit-1, low_limit, low_limit+1, ... n-2, n-1
+
+    The sum over the bins ``low_lim ... n/2`` is one inverse transform of
+    ``x`` with the bins below ``low_lim`` set to zero. Only the lags in
+    ``indices`` are needed, so when they are few compared to the length of
+    the spectrum, the sum is evaluated directly (see ``_dft_lags``)
+    instead of with the FFT; the cheaper path is chosen by an operation
+    count estimate.
+
+    :param x: Single-sided real array to Fourier transform.
+    :param low_lim: lower limit index of the array x.
+    :param indices: list of indices of interest
+    :return: Fourier transformed two-sided array x with adjusted lower limit.
+             Retruns values.
+
+    Source: https://github.com/openmodal/OpenModal/blob/master/OpenModal/fft_tools.py
+    """
+
+    nf = 2 * (x.shape[1] - 1)
+    indices = np.asarray(indices)
+    if len(indices) * (x.shape[1] - low_lim) < _DFT_COST_RATIO * nf * np.log2(nf):
+        return _dft_lags(x, low_lim, indices, nf)
+
+    x = x.copy()
+    x[:, :low_lim] = 0
+    return scipy.fft.irfft(x, n=nf)[:, indices] * nf
+
+
+def _dft_lags(x, low_lim, indices, nf):
+    """
+    Direct evaluation of the lags ``indices`` of the ``nf``-point inverse
+    transform of the Hermitian spectrum ``x`` (without normalization),
+    using only the bins above ``low_lim``.
+
+    :param x: single-sided spectrum, shape ``(n_rows, nf//2 + 1)``
+    :param low_lim: index of the first bin in the sum
+    :param indices: lags
+    :param nf: length of the two-sided spectrum
+    :return: array of shape ``(n_rows, len(indices))``
+    """
+    k = np.arange(low_lim, x.shape[1])
+    # the DC and Nyquist bins are not mirrored
+    c = np.where((k == 0) | (2*k == nf), 1., 2.)[:, None]
+    phase = (2*np.pi/nf) * np.outer(k, indices)
+    real_dtype = x.real.dtype
+    e_real = (c*np.cos(phase)).astype(real_dtype, copy=False)
+
+    x = x[:, low_lim:]
+    if not np.iscomplexobj(x):
+        return x @ e_real
+    e_imag = (c*np.sin(phase)).astype(real_dtype, copy=False)
+    return x.real @ e_real - x.imag @ e_imag
+
+
+def _toeplitz_stack(sk, n):
+    """
+    Toeplitz matrices ``toeplitz(sk[i, n:], sk[i, :n+1][::-1])`` of all the
+    rows of ``sk``, returned as a strided view (no data is copied).
+
+    :param sk: array of shape ``(n_rows, 2*n+1)``
+    :param n: size of the Toeplitz matrices is ``n+1``
+    :return: array of shape ``(n_rows, n+1, n+1)``
+    """
+    # element [i, j] is sk[n+i-j]
+    strides = (sk.strides[0], sk.strides[1], -sk.strides[1])
+    return np.lib.stride_tricks.as_strided(sk[:, n:], shape=(sk.shape[0], n+1, n+1), strides=strides,
+                                           writeable=False)
+
+
+def _chunk_size(n_freq, n, budget=2**26):
+    """
+    Number of FRF rows that are processed at once, so that the temporary
+    arrays of one chunk take approximately ``budget`` bytes.
+
+    :param n_freq: number of frequency lines
+    :param n: twice the highest polynomial order
+    :param budget: memory budget [bytes]
+    :return: number of rows
+    """
+    per_row = 8 * (6*n_freq + 2*(n+1)**2)
+    return int(max(1, budget // per_row))
+
+
+def _lscf_setup(lower_ind, nf, n, rcond=1e-10, orders=None):
+    """
+    Polynomial orders and the factors of the inverted ``R`` matrix of the
+    LSCF normal equations.
+
+    With ``R = L @ L.T`` (``L`` lower triangular), the leading block of
+    ``inv(L)`` is the inverse of the leading block of ``L``, so one factor
+    serves all the polynomial orders:
+    ``S_j.T @ inv(R_j) @ S_j = Y_j.T @ Y_j``, ``Y = inv(L) @ S``, where the
+    index ``j`` denotes the leading ``(j+1, j+1)`` block.
+
+    When only a small part of the spectrum is above ``lower_ind`` (e.g. a
+    narrow band), ``R`` is numerically singular. In that case a factor
+    ``W_j`` of the pseudo-inverse, ``pinv(R_j) = W_j.T @ W_j``, is returned
+    for each order.
+
+    :param lower_ind: index of the lower frequency limit
+    :param nf: length of the two-sided spectrum
+    :param n: twice the highest polynomial order
+    :param rcond: relative cut-off of the small eigenvalues of ``R``
+    :param orders: polynomial orders (ascending, at most ``n``). If None,
+        all the even orders up to ``n`` are used.
+    :return: orders, inverted Cholesky factor of ``R`` or list of ``W_j``
+    """
+    r = -(np.fft.irfft(np.ones(lower_ind), n=nf))[np.arange(n+1)]*nf
+    r[0] += nf
+    r = toeplitz(r)
+
+    if orders is None:
+        orders = np.arange(2, n+1, 2)
+    try:
+        l = np.linalg.cholesky(r)
+        diag = np.abs(np.diag(l))
+        if (np.min(diag) / np.max(diag))**2 > rcond:
+            return orders, scipy.linalg.solve_triangular(l, np.eye(n+1), lower=True)
+    except np.linalg.LinAlgError:
+        pass
+
+    factors = []
+    for j in orders:
+        val, vec = np.linalg.eigh(r[:j+1, :j+1])
+        keep = val > rcond * np.max(val)
+        factors.append(vec[:, keep].T / np.sqrt(val[keep])[:, None])
+    return orders, factors
+
+
+def _lscf_accumulate(frf, lower_ind, n, orders, linv, d, t, weights=None, stage=_no_stage):
+    """
+    Add the contribution of FRF rows to the LSCF normal equations.
+
+    The reduced normal matrix is additive over the FRF rows:
+    ``D = sum(T_i) - sum(S_i.T @ R^-1 @ S_i)``. The sums are accumulated
+    in place in ``d`` (one matrix for each order) and ``t`` (first column
+    of the Toeplitz matrix ``sum(T_i)``).
+
+    :param frf: FRF rows, shape ``(n_rows, n_freq)``
+    :param lower_ind: index of the lower frequency limit
+    :param n: twice the highest polynomial order
+    :param orders: polynomial orders
+    :param linv: inverted Cholesky factor of ``R`` or list of pseudo-inverse
+        factors (see ``_lscf_setup``)
+    :param d: list of accumulated ``sum(S_i.T @ R^-1 @ S_i)`` (one for each order)
+    :param t: accumulated first column of ``sum(T_i)``
+    :param weights: weights of the FRF rows, optional. A weight scales
+        both ``T_i`` and ``S_i.T @ R^-1 @ S_i`` of the row.
+    :param stage: stage context factory of the profiler (see ``Timings.stage``)
+    """
+    with stage('fft'):
+        # `T_i` is linear in the power spectrum of the row, so the (weighted)
+        # power spectra are summed first and transformed once
+        power = frf.real**2 + frf.imag**2
+        if weights is None:
+            power = np.sum(power, axis=0)
+        else:
+            power = weights.astype(power.dtype) @ power
+        t += _irfft_adjusted_lower_limit(power[None, :], lower_ind, np.arange(n+1))[0]
+
+        # `S_i.T @ R^-1 @ S_i` is quadratic in `S_i`, the rows are scaled by
+        # the square root of the weights
+        sk = -_irfft_adjusted_lower_limit(frf, lower_ind, np.arange(-n, n+1))
+        if weights is not None:
+            sk *= np.sqrt(weights).astype(sk.dtype)[:, None]
+
+    _lscf_assemble(sk, n, orders, linv, d, stage=stage)
+
+
+def _lscf_blocks(frf, lower_ind, n):
+    """
+    Transformed blocks of each FRF row: the first column of ``T_i`` and
+    the lags that form ``S_i`` (see ``_lscf_accumulate``). The normal
+    equations of any weighting of the rows are assembled from these blocks
+    without transforming the FRFs again (see ``_lscf_assemble``).
+
+    :param frf: FRF rows, shape ``(n_rows, n_freq)``
+    :param lower_ind: index of the lower frequency limit
+    :param n: twice the highest polynomial order
+    :return: ``t`` of shape ``(n_rows, n+1)`` and ``sk`` of shape ``(n_rows, 2*n+1)``
+    """
+    power = frf.real**2 + frf.imag**2
+    t = _irfft_adjusted_lower_limit(power, lower_ind, np.arange(n+1))
+    sk = -_irfft_adjusted_lower_limit(frf, lower_ind, np.arange(-n, n+1))
+    return t, sk
+
+
+def _lscf_assemble(sk, n, orders, linv, d, stage=_no_stage):
+    """
+    Add ``sum(S_i.T @ R^-1 @ S_i)`` of the rows of ``sk`` to ``d`` (one
+    matrix for each order).
+
+    :param sk: lags of the FRF rows, shape ``(n_rows, 2*n+1)``
+    :param n: twice the highest polynomial order
+    :param orders: polynomial orders
+    :param linv: inverted Cholesky factor of ``R`` or list of pseudo-inverse
+        factors (see ``_lscf_setup``)
+    :param d: list of accumulated ``sum(S_i.T @ R^-1 @ S_i)`` (one for each order)
+    :param stage: stage context factory of the profiler (see ``Timings.stage``)
+    """
+    s = _toeplitz_stack(sk, n)
+
+    # The products are computed in the precision of `frf` and `linv`, the
+    # sums are accumulated in double precision.
+    if isinstance(linv, list):
+        with stage('assembly'):
+            for k, j in enumerate(orders):
+                y = linv[k] @ np.ascontiguousarray(s[:, :j+1, :j+1])
+                d[k] += np.tensordot(y, y, axes=([0, 1], [0, 1]))
+        return
+
+    with stage('toeplitz'):
+        y = linv @ s
+
+    # sum(Y_j.T @ Y_j) is the leading block of the sum of the outer
+    # products of the rows 0...j of all Y matrices
+    with stage('assembly'):
+        gram = np.zeros((n+1, n+1))
+        k = 0
+        for row in range(n+1):
+            y_row = y[:, row, :]
+            gram += y_row.T @ y_row
+            if k < len(orders) and row == orders[k]:
+                d[k] += gram[:row+1, :row+1]
+                k += 1
+
+
+def _lscf_poles(d, t, orders, sampling_time, get_partfactors=False, progress=None, n_orders=None,
+                stage=_no_stage):
+    """
+    Solve the accumulated LSCF normal equations for the poles of all orders.
+
+    :param d: list of accumulated ``sum(S_i.T @ R^-1 @ S_i)`` (one for each order)
+    :param t: accumulated first column of ``sum(T_i)``
+    :param orders: polynomial orders
+    :param sampling_time: sampling time of the discrete-time model
+    :param get_partfactors: compute participation factors
+    :param progress: progress callback (see ``progress._track``), reported after each order
+    :param n_orders: number of orders of the returned table. The order
+        ``j`` has the index ``j//2 - 1``; the orders that are not in
+        ``orders`` are empty. If None, ``len(orders)`` is used.
+    :param stage: stage context factory of the profiler (see ``Timings.stage``)
+    :return: PoleTable
+    """
+    t = toeplitz(t)
+
+    # Preallocate the flat pole buffer (order j has j poles)
+    if n_orders is None:
+        n_orders = len(orders)
+    counts = np.zeros(n_orders, dtype=np.int64)
+    counts[np.asarray(orders)//2 - 1] = orders
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    start = offsets[np.asarray(orders)//2 - 1]
+    all_poles = np.empty(offsets[-1], dtype=complex)
+    partfactors = np.empty(offsets[-1], dtype=complex) if get_partfactors else None
+
+    # Ascending polinomial order pole computation
+    for k, j in enumerate(_track(orders, progress, 'lscf.poles')):
+        dj = t[:j+1, :j+1] - d[k]
+
+        with stage('solve'):
+            a0an1 = np.linalg.solve(-dj[0:j, 0:j], dj[0:j, j])
+        # the numerator coefficients
+        with stage('roots'):
+            sr = np.roots(np.append(a0an1, 1)[::-1])
+
+        # Z-domain (for discrete-time domain model)
+        all_poles[start[k]:start[k]+j] = -np.log(sr) / sampling_time
+
+        if get_partfactors:
+            with stage('partfactors'):
+                _t = companion(np.append(a0an1, 1)[::-1])
+                _v, _w = np.linalg.eig(_t)
+                partfactors[start[k]:start[k]+j] = _w[-1, :]
+
+    return PoleTable(all_poles, offsets, partfactors=partfactors)
+
+
+class LSCF:
+    """
+    Incremental single-reference LSCF estimator.
+
+    The reduced normal matrices of the LSCF method are sums over the FRF
+    rows. The estimator keeps these sums, so FRFs can be added at any time
+    (e.g. during a roving-hammer measurement) and the poles of all the
+    polynomial orders can be recomputed without processing the already
+    added FRFs again.
+
+    Usage:
+    ::
+        >>> est = pyEMA.LSCF(freq, lower=10, pol_order_high=60)
+        >>> est.add(frf_location_1)
+        >>> est.add(frf_location_2)
+        >>> pole_table = est.poles()
+    """
+
+    def __init__(self, freq, lower, pol_order_high, sampling_time=None, dtype='double', orders=None):
+        """
+        :param freq: Frequency array
+        :type freq: array
+        :param lower: Lower limit for pole determination [Hz]
+        :type lower: int, float
+        :param pol_order_high: Highest order of the polynomial
+        :type pol_order_high: int
+        :param sampling_time: Sampling time of the discrete-time model. If
+            None, ``1/(2*freq[-1])`` is used.
+        :type sampling_time: float
+        :param dtype: Precision of the FFTs and Toeplitz products, 'double'
+            or 'single'. The normal equations are always accumulated and
+            solved in double precision.
+        :type dtype: str, numpy.dtype
+        :param orders: Indices of the polynomial orders that are computed
+            (``0 ... pol_order_high-1``, the index ``k`` is the order
+            ``2*(k+1)``). If None, all the orders are computed. The normal
+            equations are only built up to the highest requested order, so
+            a narrow window of orders is much cheaper than a full sweep.
+        :type orders: list, ndarray
+        """
+        self.freq = np.asarray(freq)
+        self.lower_ind = np.argmin(np.abs(self.freq - lower))
+        self.pol_order_high = int(pol_order_high)
+        if orders is None:
+            self.order_ind = np.arange(self.pol_order_high)
+        else:
+            self.order_ind = np.unique(np.asarray(orders, dtype=int))
+            if len(self.order_ind) == 0 or self.order_ind[0] < 0 or self.order_ind[-1] >= self.pol_order_high:
+                raise Exception(f'orders must be in the range 0...{self.pol_order_high-1}')
+        self.n = 2 * (self.order_ind[-1] + 1)
+        self.nf = 2 * (len(self.freq) - 1)
+        if sampling_time is None:
+            sampling_time = 1/(2*self.freq[-1])
+        self.sampling_time = sampling_time
+
+        self.dtype = np.dtype(dtype)
+        self.complex_dtype = np.result_type(self.dtype, np.complex64)
+
+        self.orders, self.linv = _lscf_setup(self.lower_ind, self.nf, self.n, orders=2*(self.order_ind + 1))
+        if isinstance(self.linv, list):
+            self.linv = [_.astype(self.dtype) for _ in self.linv]
+        else:
+            self.linv = self.linv.astype(self.dtype)
+        self.d = [np.zeros((j+1, j+1)) for j in self.orders]
+        self.t = np.zeros(self.n+1)
+        self.n_rows = 0
+
+    def add(self, frf, chunk_size=None, progress=None, weights=None, stage=_no_stage):
+        """
+        Add the contribution of FRF rows.
+
+        :param frf: FRF rows, shape ``(n_rows, n_freq)`` or ``(n_freq,)``
+        :param chunk_size: Number of rows that are processed at once. If
+            None, it is chosen so that the temporary arrays take
+            approximately 64 MB.
+        :param progress: progress callback ``progress(stage, done, total)``,
+            reported after each chunk, optional
+        :param weights: Non-negative weights of the rows in the least-squares
+            cost (e.g. the inverse of the noise variance of each channel).
+            If None, all the rows have the weight 1.
+        :param stage: stage context factory of the profiler (see ``Timings.stage``)
+        """
+        if frf.ndim == 1:
+            frf = frf[None, :]
+        if frf.shape[1] != len(self.freq):
+            raise Exception(
+                f'number of frequency lines ({frf.shape[1]}) does not match the frequency array ({len(self.freq)})')
+        if weights is not None:
+            weights = np.asarray(weights, dtype=float).reshape(-1)
+            if len(weights) != frf.shape[0]:
+                raise Exception(f'number of weights ({len(weights)}) does not match the number of FRF rows ({frf.shape[0]})')
+            if np.any(weights < 0):
+                raise Exception('weights must be non-negative')
+        if chunk_size is None:
+            chunk_size = _chunk_size(frf.shape[1], self.n)
+
+        for i in _track(range(0, frf.shape[0], chunk_size), progress, 'lscf.add'):
+            _lscf_accumulate(np.asarray(frf[i:i+chunk_size], dtype=self.complex_dtype), self.lower_ind, self.n,
+                             self.orders, self.linv, self.d, self.t,
+                             weights=None if weights is None else weights[i:i+chunk_size], stage=stage)
+        self.n_rows += frf.shape[0]
+
+    def poles(self, get_partfactors=False, progress=None, stage=_no_stage):
+        """
+        Solve the normal equations of all the polynomial orders.
+
+        :param get_partfactors: compute participation factors
+        :param progress: progress callback ``progress(stage, done, total)``,
+            reported after each order, optional
+        :param stage: stage context factory of the profiler (see ``Timings.stage``)
+        :return: PoleTable
+        """
+        if self.n_rows == 0:
+            raise Exception('no FRF was added')
+        return _lscf_poles(self.d, self.t, self.orders, self.sampling_time,
+                           get_partfactors=get_partfactors, progress=progress, n_orders=self.pol_order_high,
+                           stage=stage)
+
+
+def _plscf_accumulate(frf, lower_ind, n, n_inputs, orders, linv, d, t, weights=None, stage=_no_stage):
+    """
+    Add the contribution of outputs to the reduced normal equations of the
+    poly-reference LSCF method.
+
+    The unknowns are the matrix coefficients of the denominator, ordered
+    by degree: ``[alpha_0; alpha_1; ...]`` (each ``(n_inputs, n_inputs)``).
+    The ``T`` block of the input pair ``(i, j)`` is a Toeplitz matrix of
+    the cross power ``sum_o conj(H_oi) * H_oj``, so one transform of each
+    pair serves all the outputs. The ``S`` block of each FRF row is the
+    Toeplitz matrix of ``_lscf_accumulate``; the products with ``R^-1``
+    are batched over the outputs as in ``_lscf_assemble``.
+
+    :param frf: FRF, shape ``(n_outputs, n_inputs, n_freq)``
+    :param lower_ind: index of the lower frequency limit
+    :param n: twice the highest polynomial order
+    :param n_inputs: number of inputs
+    :param orders: polynomial orders
+    :param linv: inverted Cholesky factor of ``R`` or list of pseudo-inverse
+        factors (see ``_lscf_setup``)
+    :param d: list of accumulated ``sum(S_o.T @ R^-1 @ S_o)`` (one for each order)
+    :param t: accumulated lags ``-n ... n`` of the cross power spectra,
+        shape ``(n_inputs, n_inputs, 2*n+1)``
+    :param weights: weights of the outputs, optional
+    :param stage: stage context factory of the profiler (see ``Timings.stage``)
+    """
+    n_outputs = frf.shape[0]
+    with stage('fft'):
+        if weights is None:
+            cross = np.einsum('oif,ojf->ijf', np.conj(frf), frf)
+        else:
+            cross = np.einsum('o,oif,ojf->ijf', weights.astype(frf.real.dtype), np.conj(frf), frf)
+        t += _irfft_adjusted_lower_limit(cross.reshape(n_inputs**2, -1), lower_ind,
+                                         np.arange(-n, n+1)).reshape(t.shape)
+
+        sk = -_irfft_adjusted_lower_limit(frf.reshape(n_outputs*n_inputs, -1), lower_ind, np.arange(-n, n+1))
+        if weights is not None:
+            sk *= np.repeat(np.sqrt(weights), n_inputs).astype(sk.dtype)[:, None]
+
+    _plscf_assemble(sk, n, n_inputs, orders, linv, d, stage=stage)
+
+
+def _plscf_blocks(frf, lower_ind, n):
+    """
+    Transformed blocks of each output: the lags of its cross power spectra
+    and the lags that form ``S`` of its FRF rows (see
+    ``_plscf_accumulate``). The normal equations of any weighting of the
+    outputs are assembled from these blocks without transforming the FRFs
+    again (see ``_plscf_assemble``).
+
+    :param frf: FRF, shape ``(n_outputs, n_inputs, n_freq)``
+    :param lower_ind: index of the lower frequency limit
+    :param n: twice the highest polynomial order
+    :return: ``t`` of shape ``(n_outputs, n_inputs, n_inputs, 2*n+1)`` and
+        ``sk`` of shape ``(n_outputs*n_inputs, 2*n+1)``
+    """
+    n_outputs, n_inputs = frf.shape[:2]
+    cross = np.conj(frf)[:, :, None, :] * frf[:, None, :, :]
+    t = _irfft_adjusted_lower_limit(cross.reshape(n_outputs*n_inputs**2, -1), lower_ind, np.arange(-n, n+1))
+    sk = -_irfft_adjusted_lower_limit(frf.reshape(n_outputs*n_inputs, -1), lower_ind, np.arange(-n, n+1))
+    return t.reshape(n_outputs, n_inputs, n_inputs, -1), sk
+
+
+def _plscf_assemble(sk, n, n_inputs, orders, linv, d, stage=_no_stage):
+    """
+    Add ``sum(S_o.T @ R^-1 @ S_o)`` of the outputs to ``d`` (one matrix for
+    each order, see ``_plscf_accumulate``).
+
+    :param sk: lags of the FRF rows (ordered by output), shape ``(n_outputs*n_inputs, 2*n+1)``
+    :param n: twice the highest polynomial order
+    :param n_inputs: number of inputs
+    :param orders: polynomial orders
+    :param linv: inverted Cholesky factor of ``R`` or list of pseudo-inverse
+        factors (see ``_lscf_setup``)
+    :param d: list of accumulated ``sum(S_o.T @ R^-1 @ S_o)`` (one for each order)
+    :param stage: stage context factory of the profiler (see ``Timings.stage``)
+    """
+    n_outputs = sk.shape[0] // n_inputs
+    s = _toeplitz_stack(sk, n)
+
+    if isinstance(linv, list):
+        with stage('assembly'):
+            for k, j in enumerate(orders):
+                y = linv[k] @ np.ascontiguousarray(s[:, :j+1, :j+1])
+                # (output, input, row, degree) -> rows: (output, row), columns: (degree, input)
+                y = y.reshape(n_outputs, n_inputs, -1, j+1).transpose(0, 2, 3, 1).reshape(-1, (j+1)*n_inputs)
+                d[k] += y.T @ y
+        return
+
+    with stage('toeplitz'):
+        y = (linv @ s).reshape(n_outputs, n_inputs, n+1, n+1).transpose(2, 0, 3, 1)
+
+    with stage('assembly'):
+        gram = np.zeros(((n+1)*n_inputs, (n+1)*n_inputs))
+        k = 0
+        for row in range(n+1):
+            y_row = y[row].reshape(n_outputs, -1)
+            gram += y_row.T @ y_row
+            if k < len(orders) and row == orders[k]:
+                d[k] += gram[:(row+1)*n_inputs, :(row+1)*n_inputs]
+                k += 1
+
+
+def _plscf_poles(d, t, orders, n_inputs, sampling_time, get_partfactors=False, progress=None, n_orders=None,
+                 stage=_no_stage):
+    """
+    Solve the reduced normal equations of the poly-reference LSCF method
+    for the poles of all orders.
+
+    With the highest coefficient fixed to the identity, the coefficients
+    are the least-squares solution of the reduced normal equations. The
+    poles are the eigenvalues of the block companion matrix; the last
+    block of its eigenvectors are the participation factors, so they are
+    obtained with the poles. The order ``j`` has ``j*n_inputs`` poles.
+
+    :param d: list of accumulated ``sum(S_o.T @ R^-1 @ S_o)`` (one for each order)
+    :param t: accumulated lags of the cross power spectra (see ``_plscf_accumulate``)
+    :param orders: polynomial orders
+    :param n_inputs: number of inputs
+    :param sampling_time: sampling time of the discrete-time model
+    :param get_partfactors: store the participation factors, shape ``(n_poles, n_inputs)``
+    :param progress: progress callback (see ``progress._track``), reported after each order
+    :param n_orders: number of orders of the returned table (see ``_lscf_poles``)
+    :param stage: stage context factory of the profiler (see ``Timings.stage``)
+    :return: PoleTable
+    """
+    m = n_inputs
+    n = (t.shape[-1] - 1) // 2
+    # T[(r, i), (s, j)] is the lag r-s of the cross power of the inputs i and j
+    lag = n + np.arange(n+1)[:, None] - np.arange(n+1)[None, :]
+    t = t[:, :, lag].transpose(2, 0, 3, 1).reshape((n+1)*m, (n+1)*m)
+
+    if n_orders is None:
+        n_orders = len(orders)
+    counts = np.zeros(n_orders, dtype=np.int64)
+    counts[np.asarray(orders)//2 - 1] = np.asarray(orders) * m
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    start = offsets[np.asarray(orders)//2 - 1]
+    all_poles = np.empty(offsets[-1], dtype=complex)
+    partfactors = np.empty((offsets[-1], m), dtype=complex) if get_partfactors else None
+
+    for k, j in enumerate(_track(orders, progress, 'plscf.poles')):
+        dj = t[:(j+1)*m, :(j+1)*m] - d[k]
+
+        with stage('solve'):
+            alpha = np.linalg.solve(-dj[:j*m, :j*m], dj[:j*m, j*m:])
+
+        # block companion matrix of the transposed coefficients
+        with stage('roots'):
+            c = np.zeros((j*m, j*m))
+            c[:-m, m:] = np.eye((j-1)*m)
+            c[-m:, :] = -alpha.reshape(j, m, m).transpose(2, 0, 1).reshape(m, j*m)
+            sr, vec = np.linalg.eig(c)
+
+        all_poles[start[k]:start[k]+j*m] = -np.log(sr.astype(complex)) / sampling_time
+        if get_partfactors:
+            partfactors[start[k]:start[k]+j*m] = vec[-m:, :].T
+
+    return PoleTable(all_poles, offsets, partfactors=partfactors)
+
+
+class PLSCF(LSCF):
+    """
+    Incremental poly-reference LSCF (PolyMAX) estimator.
+
+    The denominator has matrix coefficients (one row and column for each
+    input), so the closely spaced modes of multiple-input FRFs are
+    separated and the participation factors are obtained with the poles.
+    The reduced normal matrices are sums over the outputs and are
+    accumulated as in :class:`LSCF`; the cost is linear in the number of
+    outputs. With a single input the estimator is the single-reference
+    LSCF.
+
+    Usage:
+    ::
+        >>> est = pyEMA.PLSCF(freq, lower=10, pol_order_high=30, n_inputs=3)
+        >>> est.add(frf) # shape (n_outputs, 3, n_freq)
+        >>> pole_table = est.poles(get_partfactors=True)
+    """
+
+    def __init__(self, freq, lower, pol_order_high, sampling_time=None, dtype='double', orders=None, n_inputs=1):
+        """
+        :param n_inputs: Number of inputs (references)
+        :type n_inputs: int
+
+        For the other parameters see :class:`LSCF`.
+        """
+        super().__init__(freq, lower, pol_order_high, sampling_time=sampling_time, dtype=dtype, orders=orders)
+        self.n_inputs = int(n_inputs)
+        self.d = [np.zeros(((j+1)*self.n_inputs, (j+1)*self.n_inputs)) for j in self.orders]
+        self.t = np.zeros((self.n_inputs, self.n_inputs, 2*self.n+1))
+
+    def add(self, frf, chunk_size=None, progress=None, weights=None, stage=_no_stage):
+        """
+        Add the contribution of outputs.
+
+        :param frf: FRF, shape ``(n_outputs, n_inputs, n_freq)``, or
+            ``(n_outputs*n_inputs, n_freq)`` with the rows ordered by output
+        :param chunk_size: Number of FRF rows that are processed at once
+            (rounded to whole outputs). If None, it is chosen so that the
+            temporary arrays take approximately 64 MB.
+        :param progress: progress callback ``progress(stage, done, total)``,
+            reported after each chunk, optional
+        :param weights: Non-negative weights of the outputs in the
+            least-squares cost. If None, all the outputs have the weight 1.
+        :param stage: stage context factory of the profiler (see ``Timings.stage``)
+        """
+        m = self.n_inputs
+        if frf.ndim == 1:
+            frf = frf[None, :]
+        if frf.ndim == 2:
+            if frf.shape[0] % m:
+                raise Exception(f'number of FRF rows ({frf.shape[0]}) is not a multiple of the number of inputs ({m})')
+            frf = frf.reshape(-1, m, frf.shape[-1])
+        if frf.shape[1] != m:
+            raise Exception(f'number of inputs ({frf.shape[1]}) does not match the estimator ({m})')
+        if frf.shape[2] != len(self.freq):
+            raise Exception(
+                f'number of frequency lines ({frf.shape[2]}) does not match the frequency array ({len(self.freq)})')
+        if weights is not None:
+            weights = np.asarray(weights, dtype=float).reshape(-1)
+            if len(weights) != frf.shape[0]:
+                raise Exception(f'number of weights ({len(weights)}) does not match the number of outputs ({frf.shape[0]})')
+            if np.any(weights < 0):
+                raise Exception('weights must be non-negative')
+        if chunk_size is None:
+            chunk_size = _chunk_size(frf.shape[2], self.n)
+        chunk_size = max(1, chunk_size // m)
+
+        for i in _track(range(0, frf.shape[0], chunk_size), progress, 'plscf.add'):
+            _plscf_accumulate(np.asarray(frf[i:i+chunk_size], dtype=self.complex_dtype), self.lower_ind, self.n,
+                              m, self.orders, self.linv, self.d, self.t,
+                              weights=None if weights is None else weights[i:i+chunk_size], stage=stage)
+        self.n_rows += frf.shape[0] * m
+
+    def poles(self, get_partfactors=False, progress=None, stage=_no_stage):
+        """
+        Solve the reduced normal equations of all the polynomial orders.
+
+        :param get_partfactors: store the participation factors (a vector
+            of ``n_inputs`` for each pole)
+        :param progress: progress callback ``progress(stage, done, total)``,
+            reported after each order, optional
+        :param stage: stage context factory of the profiler (see ``Timings.stage``)
+        :return: PoleTable
+        """
+        if self.n_rows == 0:
+            raise Exception('no FRF was added')
+        return _plscf_poles(self.d, self.t, self.orders, self.n_inputs, self.sampling_time,
+                            get_partfactors=get_partfactors, progress=progress, n_orders=self.pol_order_high,
+                            stage=stage)
+
+
+def _fit_band(frf, freq, f_lower, f_upper, f_core, pol_order_high, get_partfactors=False, chunk_size=None,
+              dtype='double'):
+    """
+    LSCF poles of a frequency band.
+
+    The FRF is cut off at ``f_upper`` and the poles are computed from the
+    lines above ``f_lower``. Only the lines of the band are passed (the
+    lines below ``f_lower`` do not contribute), so a process that fits a
+    band receives only its part of the FRF. Only the poles with natural
+    frequency in the ``f_core`` interval are kept, so that the cores of
+    adjacent bands partition the frequency range and the overlapping parts
+    of the bands do not produce duplicated poles.
+
+    :param frf: FRF lines of the band, from the line closest to ``f_lower``
+        to ``f_upper`` (see ``_band_lines``)
+    :param freq: frequency array from 0 to ``f_upper``
+    :param f_lower: lower limit of the band [Hz]
+    :param f_upper: upper limit of the band [Hz]
+    :param f_core: ``(f_min, f_max)`` of the poles that are kept [Hz]
+    :param pol_order_high: highest order of the polynomial
+    :param get_partfactors: compute participation factors
+    :param chunk_size: number of FRF rows that are processed at once
+    :param dtype: precision of the FFTs and Toeplitz products
+    :return: PoleTable
+    """
+    estimator = LSCF(freq, f_lower, pol_order_high, dtype=dtype)
+    lower_ind = estimator.lower_ind
+    if frf.shape[1] != len(freq) - lower_ind:
+        raise Exception(f'number of frequency lines ({frf.shape[1]}) does not match the band ({len(freq) - lower_ind})')
+    if chunk_size is None:
+        chunk_size = _chunk_size(len(freq), estimator.n)
+    for i in range(0, frf.shape[0], chunk_size):
+        # the lines below the band are zero (not used by the estimator)
+        chunk = np.zeros((len(frf[i:i+chunk_size]), len(freq)), dtype=estimator.complex_dtype)
+        chunk[:, lower_ind:] = frf[i:i+chunk_size]
+        estimator.add(chunk, chunk_size=chunk_size)
+    table = estimator.poles(get_partfactors=get_partfactors)
+    return table.select(table.mask(f_min=f_core[0], f_max=f_core[1]))
+
+
+def _band_lines(freq, f_lower, f_upper):
+    """
+    Indices of the lines of a band (see ``_fit_band``): the line closest to
+    ``f_lower`` and the end of the lines up to ``f_upper``.
+    """
+    upper_ind = np.argmin(np.abs(freq - f_upper)) + 1
+    return np.argmin(np.abs(freq[:upper_ind] - f_lower)), upper_ind
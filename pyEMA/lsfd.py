@@ -0,0 +1,87 @@
+import numpy as np
+
+
+def _lsfd_basis(omega, poles, dtype='double'):
+    """
+    Real-valued LSFD basis of the modal model with lower and upper
+    residuals (see ``Model.get_constants``).
+
+    The rows are the real parts (first ``len(omega)`` rows) and the
+    imaginary parts of the FRF model; the columns are the real and the
+    imaginary parts of the modal constants (interleaved), followed by the
+    lower and the upper residuals.
+
+    :param omega: angular frequency array. A zero first value is replaced
+        by ``1e-2`` (in place).
+    :param poles: complex poles
+    :param dtype: data type of the basis
+    :return: array of shape ``(2*len(omega), 2*len(poles) + 4)``
+    """
+    len_ome = len(omega)
+    M_2 = len(poles)
+    if omega[0] == 0:
+        omega[0] = 1.e-2
+
+    _ome = omega[:, np.newaxis]
+
+    # Initialization
+    TA = np.zeros([2*len_ome, 2*M_2 + 4], dtype=dtype)
+
+    # Eigenmodes contribution
+    TA[:len_ome, 0:2*M_2:2] =    (-np.real(poles))/(np.real(poles)**2+(_ome-np.imag(poles))**2)+\
+                                (-np.real(poles))/(np.real(poles)**2+(_ome+np.imag(poles))**2)
+    TA[len_ome:, 0:2*M_2:2] =    (-(_ome-np.imag(poles)))/(np.real(poles)**2+(_ome-np.imag(poles))**2)+\
+                                (-(_ome+np.imag(poles)))/(np.real(poles)**2+(_ome+np.imag(poles))**2)
+    TA[:len_ome, 1:2*M_2+1:2] =  ((_ome-np.imag(poles)))/(np.real(poles)**2+(_ome-np.imag(poles))**2)+\
+                                (-(_ome+np.imag(poles)))/(np.real(poles)**2+(_ome+np.imag(poles))**2)
+    TA[len_ome:, 1:2*M_2+1:2] =  (-np.real(poles))/(np.real(poles)**2+(_ome-np.imag(poles))**2)+\
+                                (np.real(poles))/(np.real(poles)**2+(_ome+np.imag(poles))**2)
+
+    # Lower and upper residuals contribution
+    TA[:len_ome, -4] = -1/(omega**2)
+    TA[len_ome:, -3] = -1/(omega**2)
+    TA[:len_ome, -2] = np.ones(len_ome)
+    TA[len_ome:, -1] = np.ones(len_ome)
+
+    return TA
+
+
+def _lsfd_constants(A_LSFD, n_modes):
+    """
+    Complex modal constants and residuals from the solution of the LSFD
+    least-squares problem.
+
+    :param A_LSFD: solution, shape ``(2*n_modes + 4, n_channels)``
+    :param n_modes: number of modes
+    :return: modal constants ``(n_channels, n_modes)``, lower and upper residuals
+    """
+    A = (A_LSFD[0:2*n_modes:2, :] + 1.j*A_LSFD[1:2*n_modes+1:2, :]).T
+    LR = A_LSFD[-4, :]+1.j*A_LSFD[-3, :]
+    UR = A_LSFD[-2, :]+1.j*A_LSFD[-1, :]
+    return A, LR, UR
+
+
+def _lsfd_reconstruction(frf, freq, poles, lower_ind, upper_ind, dtype='double'):
+    """
+    Modal constants of the poles fitted to the lines ``lower_ind:upper_ind``
+    and the reconstructed FRF of all the lines (as
+    ``Model.get_constants(FRF_ind='all')``). The arguments are not modified
+    and nothing is stored, so the fit can run in a worker thread.
+
+    :param frf: FRF, shape ``(n_channels, n_freq)``
+    :param freq: frequency array
+    :param poles: complex poles
+    :param lower_ind: index of the first line of the fit
+    :param upper_ind: index after the last line of the fit
+    :param dtype: precision of the reconstruction
+    :return: reconstructed FRF ``(n_channels, n_freq)`` and modal constants ``(n_channels, n_modes)``
+    """
+    omega = 2 * np.pi * np.asarray(freq, dtype=float)
+    # the pseudo-inverse is always computed in double precision
+    AT = np.linalg.pinv(_lsfd_basis(omega[lower_ind:upper_ind].copy(), poles)).astype(dtype, copy=False)
+    frf = frf[:, lower_ind:upper_ind]
+    A_LSFD = AT @ np.concatenate([np.real(frf.T), np.imag(frf.T)])
+    A = _lsfd_constants(A_LSFD, len(poles))[0]
+
+    H = _lsfd_basis(omega, poles, dtype) @ A_LSFD
+    return (H[:len(omega)] + 1.j*H[len(omega):]).T, A
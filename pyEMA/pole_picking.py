@@ -1,6 +1,9 @@
 import os
 import sys
 import glob
+import queue
+import threading
+import warnings
 
 import numpy as np
 import matplotlib.pyplot as plt
@@ -9,6 +12,49 @@ from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolb
 from matplotlib.figure import Figure
 
 from . import stabilization
+from .lsfd import _lsfd_reconstruction
+from .rendering import FRFPyramid, DecimatedLines, _pole_categories, _plot_poles, _cluster_ylim
+
+
+class _BlitManager:
+    """
+    Redraw the animated artists of a figure over a cached background.
+
+    The static artists are drawn only on a full draw of the canvas (e.g.
+    when the figure is resized or zoomed), which also caches the
+    background. ``update`` restores the background and draws only the
+    animated artists (matplotlib blitting), so its cost does not depend on
+    the number of static artists.
+    """
+    def __init__(self, canvas, get_artists):
+        """
+        :param canvas: figure canvas that supports blitting (e.g. ``FigureCanvasTkAgg``)
+        :param get_artists: function that returns the current animated artists
+        """
+        self.canvas = canvas
+        self.get_artists = get_artists
+        self.background = None
+        self.canvas.mpl_connect('draw_event', self.on_draw)
+
+    def on_draw(self, event):
+        """Cache the background after a full draw and draw the animated artists."""
+        self.background = self.canvas.copy_from_bbox(self.canvas.figure.bbox)
+        self._draw_animated()
+
+    def _draw_animated(self):
+        for artist in self.get_artists():
+            if artist is not None and artist.axes is not None:
+                self.canvas.figure.draw_artist(artist)
+
+    def update(self):
+        """Redraw the animated artists."""
+        if self.background is None:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self.background)
+        self._draw_animated()
+        self.canvas.blit(self.canvas.figure.bbox)
+
 
 class SelectPoles:
     def __init__(self, Model):
@@ -28,10 +74,28 @@ class SelectPoles:
         self.chart_type = 0 # 0 - stability chart, 1 - cluster diagram
         self.show_legend = 0
         self.frf_plot_type = 'abs'
+        self.pole_plot_type = 'auto' # 'auto', 'markers' or 'density'
+        self.pole_density = None
 
         self.Model.nat_freq = []
         self.Model.nat_xi = []
         self.Model.pole_ind = []
+
+        # The reconstruction is fitted in a worker thread. Only the latest
+        # selection is fitted (the requests are coalesced), the results are
+        # applied on the Tk main thread.
+        self.reconstruction = None
+        self._H_pyramid = None
+        self._fit_generation = 0
+        self._fit_selection = []
+        self._fit_drawn = -1
+        self._fit_request = None
+        self._fit_lock = threading.Lock()
+        self._fit_event = threading.Event()
+        self._fit_results = queue.Queue()
+        self._closing = False
+        self._fit_thread = threading.Thread(target=self._fit_worker, daemon=True)
+        self._fit_thread.start()
         
     
         self.root = tk.Tk()
@@ -59,6 +123,12 @@ class SelectPoles:
         mifmenu.add_command(label='Plot all FRFs', command=lambda: self.toggle_mif_frf('all'))
         menubar.add_cascade(label="FRF plot type", menu=mifmenu)
 
+        polemenu = tk.Menu(menubar, tearoff=0)
+        polemenu.add_command(label='Automatic', command=lambda: self.toggle_pole_plot_type('auto'))
+        polemenu.add_command(label='Markers', command=lambda: self.toggle_pole_plot_type('markers'))
+        polemenu.add_command(label='Density', command=lambda: self.toggle_pole_plot_type('density'))
+        menubar.add_cascade(label="Pole plot type", menu=polemenu)
+
         legendmenu = tk.Menu(menubar, tearoff=0)
         legendmenu.add_command(label='Show legend', command=lambda: self.toggle_legend(1))
         legendmenu.add_command(label='Hide legend', command=lambda: self.toggle_legend(0))
@@ -71,6 +141,19 @@ class SelectPoles:
         self.root.config(menu=menubar)
 
 
+        # Static layers are drawn on full redraws, the reconstructed FRFs and
+        # the selection markers are blitted over them (see `_BlitManager`)
+        self.blit = None
+        self.help_text = None
+        self.error_text = None
+
+        # The FRF magnitudes are decimated for the current view (see
+        # `FRFPyramid`), the pyramids of the measured FRFs are built once
+        self.measured = None
+        self._frf_pyramids = {}
+        self.line = None
+        self.selected = None
+
         # Program execution
         self.plot_frf(initial=True)
         self.get_stability()
@@ -80,6 +163,7 @@ class SelectPoles:
         canvas = FigureCanvasTkAgg(self.fig, self.root)
         canvas.get_tk_widget().pack(side='top', fill='both', expand=1)
         NavigationToolbar2Tk(canvas, self.root)
+        self.blit = _BlitManager(canvas, self.animated_artists)
 
         
         # Connecting functions to event manager
@@ -88,85 +172,243 @@ class SelectPoles:
         self.fig.canvas.mpl_connect('button_press_event', lambda x: self.on_click(x))
 
         self.root.protocol("WM_DELETE_WINDOW", lambda: self.on_closing())
+        self.root.after(50, self._poll_fit)
         self.root.mainloop()
+        self._finish_fit()
 
 
     def plot_frf(self, initial=False):
         """Reconstruct and plot the Frequency Response Function.
 
-        This is done on the fly.
+        This is done on the fly: the reconstruction is fitted in a worker
+        thread and drawn when it is ready (see ``request_fit``).
 
         :param initial: if True, the frf is not computed, only the measured
             FRFs are shown.
         """
+        for lines in [self.measured, self.reconstruction]:
+            if lines is not None:
+                lines.remove()
+        self.reconstruction = None
         self.ax2.clear()
         if self.frf_plot_type == 'abs':
-            self.ax2.semilogy(self.Model.freq, np.average(
-                    np.abs(self.Model.frf), axis=0), alpha=0.7, color='k')
+            self.measured = DecimatedLines(self.ax2, self.frf_pyramid(), alpha=0.7, color='k')
         elif self.frf_plot_type == 'all':
-            self.ax2.semilogy(self.Model.freq, np.abs(self.Model.frf.T), alpha=0.3, color='k')
+            self.measured = DecimatedLines(self.ax2, self.frf_pyramid(), alpha=0.3, color='k')
 
         if not initial and len(self.Model.nat_freq) > 0:
-            self.H, self.A = self.Model.get_constants(whose_poles='own', FRF_ind='all', least_squares_type='new')
-            if self.frf_plot_type == 'abs':
-                self.ax2.semilogy(self.Model.freq, np.average(
-                    np.abs(self.H), axis=0), color='r', lw=2)
-            elif self.frf_plot_type == 'all':
-                self.ax2.semilogy(self.Model.freq, np.abs(self.H.T), color='r', lw=1)
+            if self._fit_drawn == self._fit_generation:
+                # the reconstruction of the current selection is known
+                self.draw_reconstruction()
+            else:
+                self.request_fit()
         
-        else:
-            x_position = (self.Model.lower + self.Model.upper) / 2
-            y_position = np.max(np.abs(self.Model.frf))
-            message = [
-                'Select a pole: SHIFT + LEFT mouse button',
-                'Deselect a pole: SHIFT + RIGHT mouse button'
-            ]
-            self.ax2.text(x_position, y_position, '\n'.join(message), 
-                fontsize=12, verticalalignment='top', horizontalalignment='center',
-                bbox=dict(facecolor='lightgreen', edgecolor='lightgreen'))
+
+        x_position = (self.Model.lower + self.Model.upper) / 2
+        y_position = np.max(self.frf_pyramid().levels[-1][3])
+        message = [
+            'Select a pole: SHIFT + LEFT mouse button',
+            'Deselect a pole: SHIFT + RIGHT mouse button'
+        ]
+        self.help_text = self.ax2.text(x_position, y_position, '\n'.join(message), 
+            fontsize=12, verticalalignment='top', horizontalalignment='center',
+            bbox=dict(facecolor='lightgreen', edgecolor='lightgreen'), animated=True)
+        self.help_text.set_visible(initial or len(self.Model.nat_freq) == 0)
+        # error of the last fit of the reconstruction
+        self.error_text = self.ax2.text(0.5, 0.02, '', transform=self.ax2.transAxes, color='w',
+            fontsize=12, verticalalignment='bottom', horizontalalignment='center',
+            bbox=dict(facecolor='red', edgecolor='red'), animated=True)
+        self.error_text.set_visible(False)
         
         self.ax1.set_xlim([self.Model.lower, self.Model.upper])
+        # magnitude limits of the decimated view
+        self.ax2.relim()
+        self.ax2.autoscale_view(scalex=False)
         self.fig.canvas.draw()
+
+
+    def frf_pyramid(self):
+        """Pyramid of the measured FRF magnitudes for the current FRF plot type."""
+        if self.frf_plot_type not in self._frf_pyramids:
+            self._frf_pyramids[self.frf_plot_type] = FRFPyramid(
+                self.Model.freq, self.Model.frf, average=self.frf_plot_type == 'abs')
+        return self._frf_pyramids[self.frf_plot_type]
+
+
+    def update_frf(self):
+        """Update the reconstructed FRFs after the selection changed.
+
+        The measured FRFs are not redrawn. The reconstruction is requested
+        from the worker thread; the chart update that follows the selection
+        change blits the result.
+        """
+        selection = [tuple(_) for _ in self.Model.pole_ind]
+        if selection != self._fit_selection:
+            # the current reconstruction is outdated
+            self._fit_selection = selection
+            self._fit_generation += 1
+
+        if len(self.Model.nat_freq) > 0:
+            self.request_fit()
+        else:
+            if self.reconstruction is not None:
+                self.reconstruction.remove()
+                self.reconstruction = None
+            self.error_text.set_visible(False)
+        self.help_text.set_visible(len(self.Model.nat_freq) == 0)
+
+
+    def animated_artists(self):
+        """Artists that are updated on each selection (blitted)."""
+        lines = self.reconstruction.lines if self.reconstruction is not None else []
+        return lines + [self.help_text, self.error_text, self.line, self.selected]
+
+
+    def _blit(self):
+        if self.blit is None:
+            self.fig.canvas.draw_idle()
+        else:
+            self.blit.update()
     
 
+    def request_fit(self):
+        """Request the reconstruction of the currently selected poles.
+
+        The request replaces the pending one, so that only the latest
+        selection is fitted when the poles are picked faster than they are
+        fitted. The request holds everything the fit needs, the worker
+        does not access the model.
+        """
+        model = self.Model
+        table = model.pole_table
+        snapshot = {
+            'frf': model.frf, 'freq': model.freq, 'dtype': model.dtype,
+            'poles': table.pole[table.flat_index(np.array(model.pole_ind, dtype=int).reshape(-1, 2))],
+            'lower_ind': np.argmin(np.abs(model.freq - model.lower)),
+            'upper_ind': np.argmin(np.abs(model.freq - model.upper)),
+        }
+        with self._fit_lock:
+            self._fit_request = (self._fit_generation, snapshot)
+        self._fit_event.set()
+
+
+    def _fit_worker(self):
+        """Fit the latest requested selection (runs in the worker thread)."""
+        while True:
+            self._fit_event.wait()
+            if self._closing:
+                return
+            with self._fit_lock:
+                request, self._fit_request = self._fit_request, None
+                self._fit_event.clear()
+            if request is None:
+                continue
+
+            generation, snapshot = request
+            try:
+                H, A = _lsfd_reconstruction(**snapshot)
+                pyramid = FRFPyramid(self.Model.freq, H, average=self.frf_plot_type == 'abs')
+            except Exception as error:
+                # reported on the main thread (see `_poll_fit`)
+                self._fit_results.put((generation, error))
+                continue
+            self._fit_results.put((generation, H, A, pyramid))
+
+
+    def _finish_fit(self):
+        """Stop the worker thread and fit the final selection.
+
+        The worker fits do not change the model; the modal constants and
+        the reconstruction of the final selection are stored in the model
+        here. The errors of the final fit are raised.
+        """
+        self._closing = True
+        self._fit_event.set()
+        self._fit_thread.join()
+        if len(self.Model.pole_ind) > 0:
+            self.Model.get_constants(FRF_ind='all', least_squares_type='new')
+
+
+    def _poll_fit(self):
+        """Apply the finished fits on the Tk main thread."""
+        result = None
+        while True:
+            try:
+                result = self._fit_results.get_nowait()
+            except queue.Empty:
+                break
+
+        # results of outdated selections are discarded
+        if result is not None and result[0] == self._fit_generation and len(self.Model.nat_freq) > 0:
+            if len(result) == 2:
+                message = f'Reconstruction failed: {type(result[1]).__name__}: {result[1]}'
+                warnings.warn(message)
+                self.error_text.set_text(message)
+                self.error_text.set_visible(True)
+            else:
+                self._fit_drawn, self.H, self.A, self._H_pyramid = result
+                self.error_text.set_visible(False)
+                self.draw_reconstruction()
+            self._blit()
+
+        if not self._closing:
+            self.root.after(50, self._poll_fit)
+
+
+    def draw_reconstruction(self):
+        """Replace the reconstructed FRF lines with ``self.H``."""
+        if self.reconstruction is not None:
+            self.reconstruction.remove()
+        if self._H_pyramid.average != (self.frf_plot_type == 'abs'):
+            self._H_pyramid = FRFPyramid(self.Model.freq, self.H, average=self.frf_plot_type == 'abs')
+        if self.frf_plot_type == 'abs':
+            self.reconstruction = DecimatedLines(self.ax2, self._H_pyramid, color='r', lw=2, animated=True)
+        elif self.frf_plot_type == 'all':
+            self.reconstruction = DecimatedLines(self.ax2, self._H_pyramid, color='r', lw=1, animated=True)
+
+
     def get_stability(self, fn_temp=0.001, xi_temp=0.05):
         """Get the stability matrix.
         
         :param fn_temp: Natural frequency stability crieterion.
         :param xi_temp: Damping stability criterion.
         """
-        Nmax = self.Model.pol_order_high
+        Nmax = self.Model.pole_table.n_orders
         self.fn_temp, self.xi_temp, self.test_fn, self.test_xi = stabilization._stabilization(
-            self.Model.all_poles, Nmax, err_fn=fn_temp, err_xi=xi_temp)
+            self.Model.pole_table, Nmax, err_fn=fn_temp, err_xi=xi_temp)
+
+
+    def pole_categories(self):
+        """Indices of the poles in the stability matrices, by category."""
+        return _pole_categories(self.fn_temp, self.test_fn, self.test_xi, self.xi_temp)
+
+
+    def plot_poles(self, y, y_step=None):
+        """Plot the pole categories on the pole axes (see ``rendering._plot_poles``).
+
+        :param y: function that returns the y-coordinates of the poles from
+            their indices in the stability matrices
+        :param y_step: height of the density bins (e.g. 1 for the
+            polynomial order), optional
+        """
+        self.pole_density = _plot_poles(self.ax1, self.fn_temp, self.pole_categories(), y,
+                                        y_step=y_step, pole_plot_type=self.pole_plot_type)
 
 
     def plot_stability(self, update_ticks=False):
         if not update_ticks:
+            if self.pole_density is not None:
+                self.pole_density.remove()
+                self.pole_density = None
             self.ax1.clear()
             self.ax1.grid(True)
 
-            # stable eigenfrequencues, unstable damping ratios
-            a = np.argwhere((self.test_fn > 0) & ((self.test_xi == 0) | (self.xi_temp <= 0)))
-            # stable eigenfrequencies, stable damping ratios
-            b = np.argwhere((self.test_fn > 0) & ((self.test_xi > 0) & (self.xi_temp > 0)))
-            # unstable eigenfrequencues, unstable damping ratios
-            c = np.argwhere((self.test_fn == 0) & ((self.test_xi == 0) | (self.xi_temp <= 0)))
-            # unstable eigenfrequencues, stable damping ratios
-            d = np.argwhere((self.test_fn == 0) & ((self.test_xi > 0) & (self.xi_temp > 0)))
-
-            p1 = self.ax1.plot(self.fn_temp[a[:, 0], a[:, 1]], 1+a[:, 1], 'bx',
-                        markersize=4, label="stable frequency, unstable damping")
-            p2 = self.ax1.plot(self.fn_temp[b[:, 0], b[:, 1]], 1+b[:, 1], 'gx',
-                        markersize=7, label="stable frequency, stable damping")
-            p3 = self.ax1.plot(self.fn_temp[c[:, 0], c[:, 1]], 1+c[:, 1], 'r.',
-                        markersize=4, label="unstable frequency, unstable damping")
-            p4 = self.ax1.plot(self.fn_temp[d[:, 0], d[:, 1]], 1+d[:, 1], 'r*',
-                        markersize=4, label="unstable frequency, stable damping")
+            self.plot_poles(lambda ind: 1+ind[:, 1], y_step=1)
             
             self.line, = self.ax1.plot(self.Model.nat_freq, np.repeat(
-                    self.Model.pol_order_high, len(self.Model.nat_freq)), 'kv', markersize=8)
-            self.selected, = self.ax1.plot([self.Model.pole_freq[p[0]][p[1]] for p in self.Model.pole_ind], 
-                                            [p[0] for p in self.Model.pole_ind], 'ko')
+                    self.Model.pol_order_high, len(self.Model.nat_freq)), 'kv', markersize=8, animated=True)
+            self.selected, = self.ax1.plot(self.selected_poles()['freq'],
+                                            [p[0] for p in self.Model.pole_ind], 'ko', animated=True)
             
             if self.show_legend:
                 self.pole_legend = self.ax1.legend(loc='upper center', ncol=2, frameon=True)
@@ -176,16 +418,17 @@ class SelectPoles:
             
             self.ax1.set_ylabel('Polynomial order')
 
-            plt.tight_layout()
+            self.fig.tight_layout()
         else:
             self.line.set_xdata(np.asarray(self.Model.nat_freq))  # update data
             self.line.set_ydata(np.repeat(self.Model.pol_order_high*1.04, len(self.Model.nat_freq)))
 
-            self.selected.set_xdata([self.Model.pole_freq[p[0]][p[1]]
-                                for p in self.Model.pole_ind])  # update data
+            self.selected.set_xdata(self.selected_poles()['freq'])  # update data
             self.selected.set_ydata([p[0] for p in self.Model.pole_ind])
 
-            plt.tight_layout()
+            # only the selection markers changed
+            self._blit()
+            return
 
         self.ax1.set_ylim([0, self.Model.pol_order_high+5])
         self.fig.canvas.draw()
@@ -199,31 +442,19 @@ class SelectPoles:
         b1 = np.argwhere(((self.test_fn > 0) & ((self.test_xi > 0) & (self.xi_temp > 0))) & ((self.fn_temp > self.Model.lower) & (self.fn_temp < self.Model.upper)))
         
         if not update_ticks:
+            if self.pole_density is not None:
+                self.pole_density.remove()
+                self.pole_density = None
             self.ax1.clear()
             self.ax1.grid(True)
 
-            # stable eigenfrequencues, unstable damping ratios
-            a = np.argwhere((self.test_fn > 0) & ((self.test_xi == 0) | (self.xi_temp <= 0)))
-            # stable eigenfrequencies, stable damping ratios
-            b = np.argwhere((self.test_fn > 0) & ((self.test_xi > 0) & (self.xi_temp > 0)))
-            # unstable eigenfrequencues, unstable damping ratios
-            c = np.argwhere((self.test_fn == 0) & ((self.test_xi == 0) | (self.xi_temp <= 0)))
-            # unstable eigenfrequencues, stable damping ratios
-            d = np.argwhere((self.test_fn == 0) & ((self.test_xi > 0) & (self.xi_temp > 0)))
-
-            p1 = self.ax1.plot(self.fn_temp[a[:, 0], a[:, 1]], self.xi_temp[a[:, 0], a[:, 1]], 'bx',
-                        markersize=4, label="stable frequency, unstable damping")
-            p2 = self.ax1.plot(self.fn_temp[b[:, 0], b[:, 1]], self.xi_temp[b[:, 0], b[:, 1]], 'gx',
-                        markersize=7, label="stable frequency, stable damping")
-            p3 = self.ax1.plot(self.fn_temp[c[:, 0], c[:, 1]], self.xi_temp[c[:, 0], c[:, 1]], 'r.',
-                        markersize=4, label="unstable frequency, unstable damping")
-            p4 = self.ax1.plot(self.fn_temp[d[:, 0], d[:, 1]], self.xi_temp[d[:, 0], d[:, 1]], 'r*',
-                        markersize=4, label="unstable frequency, stable damping")
+            self.plot_poles(lambda ind: self.xi_temp[ind[:, 0], ind[:, 1]])
             
             self.line, = self.ax1.plot(self.Model.nat_freq, np.repeat(
-                    1.05*np.max(self.xi_temp[b1[:, 0], b1[:, 1]]), len(self.Model.nat_freq)), 'kv', markersize=8)
-            self.selected, = self.ax1.plot([self.Model.pole_freq[p[0]][p[1]] for p in self.Model.pole_ind], 
-                                            [self.Model.pole_xi[p[0]][p[1]] for p in self.Model.pole_ind], 'ko')
+                    1.05*np.max(self.xi_temp[b1[:, 0], b1[:, 1]]), len(self.Model.nat_freq)), 'kv', markersize=8,
+                    animated=True)
+            selected = self.selected_poles()
+            self.selected, = self.ax1.plot(selected['freq'], selected['xi'], 'ko', animated=True)
             
             if self.show_legend:
                 self.pole_legend = self.ax1.legend(loc='upper center', ncol=2, frameon=True)
@@ -231,25 +462,34 @@ class SelectPoles:
             self.ax1.set_title('Cluster diagram')
 
             self.ax1.set_ylabel('Damping ratio')
-            plt.tight_layout()
+            self.fig.tight_layout()
         else:
             self.line.set_xdata(np.asarray(self.Model.nat_freq))  # update data
             self.line.set_ydata(np.repeat(1.05*np.max(self.xi_temp[b1[:, 0], b1[:, 1]]), len(self.Model.nat_freq)))
 
-            self.selected.set_xdata([self.Model.pole_freq[p[0]][p[1]] for p in self.Model.pole_ind])  # update data
-            self.selected.set_ydata([self.Model.pole_xi[p[0]][p[1]] for p in self.Model.pole_ind])
+            selected = self.selected_poles()
+            self.selected.set_xdata(selected['freq'])  # update data
+            self.selected.set_ydata(selected['xi'])
+
+            # only the selection markers changed
+            self._blit()
+            return
         
-        to_lim = self.xi_temp[b1[:, 0], b1[:, 1]]
-        up_lim = min(np.max(to_lim), np.mean(to_lim)+2*np.std(to_lim))
-        self.ax1.set_ylim([np.mean(to_lim)-np.std(to_lim), up_lim])
+        self.ax1.set_ylim(_cluster_ylim(self.xi_temp[b1[:, 0], b1[:, 1]]))
         self.fig.canvas.draw()
 
 
+    def selected_poles(self):
+        """Rows of the pole table that are currently selected."""
+        table = self.Model.pole_table
+        return table.data[table.flat_index(self.Model.pole_ind)]
+
+
     def get_closest_poles_stability(self):
         """
         On-the-fly selection of the closest poles.        
         """
-        y_ind = int(np.argmin(np.abs(np.arange(0, len(self.Model.pole_freq)
+        y_ind = int(np.argmin(np.abs(np.arange(0, self.Model.pole_table.n_orders
                                                )-self.y_data_pole)))  # Find closest pole order
         # Find cloeset frequency
         sel = np.argmin(np.abs(self.Model.pole_freq[y_ind] - self.x_data_pole))
@@ -264,18 +504,12 @@ class SelectPoles:
         """
         On-the-fly selection of the closest poles.        
         """
-        min_ = []
-        for y_ind in range(len(self.Model.pole_freq)):
-            for sel in range(len(self.Model.pole_freq[y_ind])):
-                min_.append([y_ind, sel, np.abs(self.Model.pole_freq[y_ind][sel]-self.x_data_pole), np.abs(self.Model.pole_xi[y_ind][sel]-self.y_data_pole[0])])
-
-        min_a = np.asarray(min_)
+        table = self.Model.pole_table
         # select the poles that have the frequency within 2% of observed range
-        mask = min_a[:, 2] < (self.Model.upper - self.Model.lower) * 0.02
-        min_ind_x = np.argmin(min_a[mask][:, 3])
-        
-        y_ind = int(min_a[mask][min_ind_x, 0])
-        sel = int(min_a[mask][min_ind_x, 1])
+        rows = np.flatnonzero(np.abs(table.freq - self.x_data_pole) < (self.Model.upper - self.Model.lower) * 0.02)
+        row = rows[np.argmin(np.abs(table.xi[rows] - self.y_data_pole[0]))]
+
+        y_ind, sel = (int(_) for _ in table.pole_index(row))
 
         self.Model.pole_ind.append([y_ind, sel])
         self.Model.nat_freq.append(self.Model.pole_freq[y_ind][sel])
@@ -293,7 +527,7 @@ class SelectPoles:
             elif self.chart_type == 1:
                 self.get_closest_poles_cluster()
 
-            self.plot_frf()
+            self.update_frf()
         
         # On button 3 press (left mouse button)
         elif event.button == 3 and self.shift_is_held:
@@ -301,7 +535,7 @@ class SelectPoles:
                 del self.Model.nat_freq[-1]  # delete last point
                 del self.Model.nat_xi[-1]
                 del self.Model.pole_ind[-1]
-                self.plot_frf()
+                self.update_frf()
             except:
                 pass
 
@@ -311,7 +545,7 @@ class SelectPoles:
                 del self.Model.nat_freq[i]
                 del self.Model.nat_xi[i]
                 del self.Model.pole_ind[i]
-                self.plot_frf()
+                self.update_frf()
             except:
                 pass
 
@@ -336,6 +570,8 @@ class SelectPoles:
     
 
     def on_closing(self):
+        self._closing = True
+        self._fit_event.set()
         self.root.destroy()
 
     
@@ -360,6 +596,15 @@ class SelectPoles:
             self.plot_cluster()
         
     
+    def toggle_pole_plot_type(self, x):
+        self.pole_plot_type = x
+
+        if self.chart_type == 0:
+            self.plot_stability()
+        elif self.chart_type == 1:
+            self.plot_cluster()
+
+
     def toggle_mif_frf(self, x):
         self.frf_plot_type = x
         self.plot_frf()
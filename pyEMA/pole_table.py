@@ -0,0 +1,239 @@
+import numpy as np
+
+from . import tools
+
+
+class PoleTable:
+    """
+    Compact table of poles computed at ascending polynomial orders.
+
+    The poles of all orders are stored in one contiguous structured
+    array (fields ``pole``, ``freq``, ``xi`` and optionally ``partfactor``).
+    The rows belonging to the order with index ``k`` are
+    ``data[offsets[k]:offsets[k+1]]`` (CSR-style offsets), so that bulk
+    queries over all the orders are vectorized.
+
+    A pole is addressed either by its flat row in the table or by the pair
+    ``[order index, index within order]`` that is used in ``Model.pole_ind``.
+
+    A row takes 32 bytes (without participation factors), as the separate
+    per-order pole, frequency and damping lists did, so the default table
+    of all the poles does not use less memory than the lists. The memory
+    is roughly halved only when the conjugate and unstable poles are
+    discarded (``get_poles(physical_only=True)``).
+    """
+
+    def __init__(self, poles, offsets, partfactors=None):
+        """
+        :param poles: complex poles of all orders, concatenated
+        :type poles: ndarray
+        :param offsets: start of each order in ``poles`` (length ``n_orders+1``)
+        :type offsets: ndarray
+        :param partfactors: participation factors, aligned with ``poles``
+            (one vector for each pole with multiple inputs), optional
+        :type partfactors: ndarray
+        """
+        poles = np.asarray(poles, dtype=complex)
+        offsets = np.asarray(offsets, dtype=np.int64)
+        if offsets.ndim != 1 or offsets[0] != 0 or offsets[-1] != len(poles):
+            raise Exception('offsets must start with 0 and end with the number of poles')
+
+        fields = [('pole', complex), ('freq', float), ('xi', float)]
+        if partfactors is not None:
+            partfactors = np.asarray(partfactors, dtype=complex)
+            fields.append(('partfactor', complex, partfactors.shape[1:]))
+
+        self.data = np.empty(len(poles), dtype=fields)
+        self.data['pole'] = poles
+        self.data['freq'], self.data['xi'] = tools.complex_freq_to_freq_and_damp(poles)
+        if partfactors is not None:
+            self.data['partfactor'] = partfactors
+        self.offsets = offsets
+
+        self._order = None
+        self._split = {}
+
+    @classmethod
+    def from_data(cls, data, offsets):
+        """
+        Construct the table from an existing structured array (e.g. loaded
+        from disk) without recomputing the frequencies and dampings.
+
+        :param data: structured array with fields ``pole``, ``freq``, ``xi``
+            and optionally ``partfactor``
+        :param offsets: start of each order in ``data`` (length ``n_orders+1``)
+        :return: PoleTable
+        """
+        table = cls.__new__(cls)
+        table.data = data
+        table.offsets = np.asarray(offsets, dtype=np.int64)
+        table._order = None
+        table._split = {}
+        return table
+
+    @classmethod
+    def from_counts(cls, poles, counts, partfactors=None):
+        """
+        Construct the table from concatenated poles and the number of
+        poles at each order.
+
+        :param poles: complex poles of all orders, concatenated
+        :param counts: number of poles at each order
+        :param partfactors: participation factors, aligned with ``poles``, optional
+        :return: PoleTable
+        """
+        offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        return cls(poles, offsets, partfactors=partfactors)
+
+    @classmethod
+    def from_orders(cls, poles, partfactors=None):
+        """
+        Construct the table from a list of per-order pole arrays.
+
+        :param poles: list of complex pole arrays, one for each order
+        :param partfactors: list of participation factor arrays, optional
+        :return: PoleTable
+        """
+        counts = [len(p) for p in poles]
+        flat = np.concatenate(poles) if len(poles) else np.zeros(0, complex)
+        if partfactors is not None and len(partfactors):
+            partfactors = np.concatenate(partfactors)
+        else:
+            partfactors = None
+        return cls.from_counts(flat, counts, partfactors=partfactors)
+
+    @classmethod
+    def concatenate(cls, tables):
+        """
+        Merge tables with the same number of orders. The poles of each
+        order are concatenated in the order of ``tables``.
+
+        :param tables: list of PoleTable
+        :return: PoleTable
+        """
+        n_orders = tables[0].n_orders
+        if any(_.n_orders != n_orders for _ in tables):
+            raise Exception('all tables must have the same number of orders')
+        if len(set(_.data.dtype for _ in tables)) != 1:
+            raise Exception('all tables must have the same fields')
+
+        order = np.concatenate([_.order for _ in tables])
+        sort = np.argsort(order, kind='stable')
+        data = np.concatenate([_.data for _ in tables])[sort]
+        counts = np.bincount(order, minlength=n_orders)
+        offsets = np.zeros(n_orders + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        return cls.from_data(data, offsets)
+
+    def __len__(self):
+        return len(self.data)
+
+    @property
+    def n_orders(self):
+        """Number of polynomial orders in the table."""
+        return len(self.offsets) - 1
+
+    @property
+    def counts(self):
+        """Number of poles at each order."""
+        return np.diff(self.offsets)
+
+    @property
+    def pole(self):
+        return self.data['pole']
+
+    @property
+    def freq(self):
+        return self.data['freq']
+
+    @property
+    def xi(self):
+        return self.data['xi']
+
+    @property
+    def partfactor(self):
+        if 'partfactor' not in self.data.dtype.names:
+            return None
+        return self.data['partfactor']
+
+    @property
+    def order(self):
+        """Order index of each row."""
+        if self._order is None:
+            self._order = np.repeat(np.arange(self.n_orders), self.counts)
+        return self._order
+
+    def split(self, field):
+        """
+        Per-order views of a field (no data is copied).
+
+        :param field: 'pole', 'freq', 'xi' or 'partfactor'
+        :return: list of arrays, one for each order
+        """
+        if field not in self._split:
+            column = self.data[field]
+            self._split[field] = [column[a:b] for a, b in zip(self.offsets[:-1], self.offsets[1:])]
+        return self._split[field]
+
+    def flat_index(self, pole_ind):
+        """
+        Convert ``[order index, index within order]`` pairs to table rows.
+
+        :param pole_ind: array of shape ``(n, 2)``
+        :return: array of rows
+        """
+        pole_ind = np.asarray(pole_ind, dtype=np.int64).reshape(-1, 2)
+        return self.offsets[pole_ind[:, 0]] + pole_ind[:, 1]
+
+    def pole_index(self, rows):
+        """
+        Convert table rows to ``[order index, index within order]`` pairs.
+
+        :param rows: int or array of rows
+        :return: array of shape ``(2,)`` for a single row, ``(n, 2)`` otherwise
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        order = np.searchsorted(self.offsets, rows, side='right') - 1
+        return np.stack([order, rows - self.offsets[order]], axis=-1)
+
+    def mask(self, f_min=None, f_max=None, xi_min=None, xi_max=None, orders=None, physical=False):
+        """
+        Vectorized query of the table.
+
+        :param f_min: lower limit of the natural frequency [Hz]
+        :param f_max: upper limit of the natural frequency [Hz]
+        :param xi_min: lower limit of the damping ratio
+        :param xi_max: upper limit of the damping ratio
+        :param orders: order indices to include (slice, list or array), optional
+        :param physical: if True, only the poles with positive frequency and
+            positive damping (one of each conjugate pair of stable poles) are kept
+        :return: boolean mask over the table rows
+        """
+        freq, xi = self.freq, self.xi
+        m = np.ones(len(self), dtype=bool)
+        if f_min is not None:
+            m &= freq >= f_min
+        if f_max is not None:
+            m &= freq <= f_max
+        if xi_min is not None:
+            m &= xi >= xi_min
+        if xi_max is not None:
+            m &= xi <= xi_max
+        if physical:
+            m &= (freq > 0) & (xi > 0)
+        if orders is not None:
+            m &= np.isin(self.order, np.arange(self.n_orders)[orders])
+        return m
+
+    def select(self, mask):
+        """
+        New table with the rows where ``mask`` is True. The number of
+        orders is preserved (orders can become empty).
+
+        :param mask: boolean mask over the table rows
+        :return: PoleTable
+        """
+        mask = np.asarray(mask, dtype=bool)
+        counts = np.bincount(self.order[mask], minlength=self.n_orders)
+        return PoleTable.from_counts(self.pole[mask], counts, partfactors=None if self.partfactor is None else self.partfactor[mask])
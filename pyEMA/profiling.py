@@ -0,0 +1,135 @@
+import time
+import tracemalloc
+from contextlib import contextmanager
+from functools import wraps
+
+# `tracemalloc.reset_peak` was added in Python 3.9
+_RESET_PEAK = hasattr(tracemalloc, 'reset_peak')
+
+
+@contextmanager
+def _no_stage(name):
+    """Stage context of a disabled profiler."""
+    yield
+
+
+def _traced_peak(base_peak):
+    """
+    Peak traced memory since the traced peak was ``base_peak``. Without
+    ``tracemalloc.reset_peak`` the traced peak is global: if it has not
+    grown, the current memory is the best known value.
+    """
+    current, peak = tracemalloc.get_traced_memory()
+    return peak if peak > base_peak else current
+
+
+class Timings:
+    """
+    Wall time, call count and peak memory of named stages.
+
+    Stages can be nested; the name of a nested stage is prefixed with the
+    names of the enclosing stages (e.g. ``'get_poles/solve'``). The peak
+    memory is the maximum memory allocated within the stage above the
+    memory at the start of the stage, as traced by ``tracemalloc`` (numpy
+    arrays included). It is recorded only when ``memory=True``. Before
+    Python 3.9 the peak of a stage is known only when it exceeds the peaks
+    of the earlier stages, otherwise the memory at the end of the stage is
+    recorded.
+
+    Usage:
+    ::
+        >>> with a.profile(memory=True):
+        ...     a.get_poles()
+        >>> a.timings.report()
+        {'get_poles': {'calls': 1, 'time': 0.52, 'peak_memory': 41943040}, ...}
+    """
+
+    def __init__(self, memory=False):
+        """
+        :param memory: record the peak memory of the stages
+        :type memory: bool
+        """
+        self.memory = memory
+        self.records = {}
+        self._stack = []
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Context manager that records one call of the stage ``name``.
+
+        :param name: name of the stage
+        """
+        if self._stack:
+            name = self._stack[-1][0] + '/' + name
+        if self.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            for frame in self._stack:
+                frame[2] = max(frame[2], peak if peak > frame[3] else current)
+            if _RESET_PEAK:
+                tracemalloc.reset_peak()
+                peak = current
+        else:
+            current = peak = 0
+        # name, memory at the start, peak memory, traced peak at the start
+        frame = [name, current, current, peak]
+        self._stack.append(frame)
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self._stack.pop()
+
+            record = self.records.setdefault(name, {'calls': 0, 'time': 0., 'peak_memory': None})
+            record['calls'] += 1
+            record['time'] += elapsed
+            if self.memory:
+                frame[2] = max(frame[2], _traced_peak(frame[3]))
+                if self._stack:
+                    self._stack[-1][2] = max(self._stack[-1][2], frame[2])
+                record['peak_memory'] = max(record['peak_memory'] or 0, frame[2] - frame[1])
+
+    def reset(self):
+        """Remove all the records."""
+        self.records = {}
+
+    def report(self):
+        """
+        Records of all the stages.
+
+        :return: dict ``{stage: {'calls': int, 'time': float [s], 'peak_memory': int [bytes] or None}}``
+        """
+        return {name: dict(record) for name, record in self.records.items()}
+
+    def __str__(self):
+        lines = [f'{"stage":40s} {"calls":>7s} {"time [s]":>10s} {"peak [MB]":>10s}']
+        for name, record in self.records.items():
+            peak = '' if record['peak_memory'] is None else f'{record["peak_memory"]/2**20:.1f}'
+            lines.append(f'{name:40s} {record["calls"]:7d} {record["time"]:10.4f} {peak:>10s}')
+        return '\n'.join(lines)
+
+
+@contextmanager
+def _tracing(memory):
+    """Start ``tracemalloc`` for the duration of the context if it is not running."""
+    started = memory and not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        yield
+    finally:
+        if started:
+            tracemalloc.stop()
+
+
+def _profiled(name):
+    """Decorator that records the calls of a ``Model`` method as the stage ``name``."""
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self._stage(name):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,127 @@
+import asyncio
+import functools
+import threading
+
+from tqdm import tqdm
+
+
+class Cancelled(Exception):
+    """Raised by a progress callback to stop a running computation."""
+
+
+class CancelToken:
+    """
+    Progress callback that stops the computation when ``cancel`` is called
+    (from any thread). The computation stops at the next progress report
+    (e.g. after the current polynomial order) by raising :class:`Cancelled`.
+
+    Usage:
+    ::
+        >>> token = pyEMA.CancelToken()
+        >>> a.get_poles(progress=token) # token.cancel() from another thread
+
+    :param callback: Progress callback that is called before the
+        cancellation check, optional
+    """
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self._event = threading.Event()
+
+    def cancel(self):
+        """Request the cancellation."""
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def __call__(self, stage, done, total):
+        if self.callback is not None:
+            self.callback(stage, done, total)
+        if self._event.is_set():
+            raise Cancelled(f'cancelled in stage "{stage}" ({done}/{total})')
+
+
+def tqdm_progress(**kwargs):
+    """
+    Progress callback that shows a ``tqdm`` progress bar for each stage.
+
+    :param kwargs: arguments of ``tqdm``
+    :return: progress callback
+    """
+    kwargs.setdefault('ncols', 100)
+    bars = {}
+
+    def callback(stage, done, total):
+        bar = bars.get(stage)
+        if bar is None or done == 0:
+            if bar is not None:
+                bar.close()
+            bar = bars[stage] = tqdm(total=total, desc=stage, **kwargs)
+        bar.update(done - bar.n)
+        if done >= total:
+            bar.close()
+            del bars[stage]
+    return callback
+
+
+def _track(iterable, progress, stage, total=None):
+    """
+    Iterate and report the progress after each item.
+
+    The progress callback is called as ``progress(stage, done, total)``
+    before the first item and after each item; it can stop the iteration
+    by raising an exception (e.g. :class:`Cancelled`).
+
+    :param iterable: iterable
+    :param progress: progress callback or None
+    :param stage: name of the stage
+    :param total: number of items (``len(iterable)`` if None)
+    """
+    if progress is None:
+        yield from iterable
+        return
+    if total is None:
+        total = len(iterable)
+    progress(stage, 0, total)
+    for done, item in enumerate(iterable, 1):
+        yield item
+        progress(stage, done, total)
+
+
+async def run_async(func, *args, progress=None, executor=None, **kwargs):
+    """
+    Run a long computation (e.g. ``Model.get_poles`` or
+    ``Model.get_constants``) in an executor and await it.
+
+    When the awaiting task is cancelled, the computation is stopped at its
+    next progress report (e.g. between polynomial orders) and
+    ``asyncio.CancelledError`` is raised after the computation stopped.
+
+    Usage:
+    ::
+        >>> task = asyncio.create_task(pyEMA.run_async(a.get_poles, show_progress=False))
+        >>> task.cancel()
+
+    :param func: function that accepts the ``progress`` keyword argument
+    :param args: positional arguments of ``func``
+    :param progress: progress callback, optional
+    :param executor: ``concurrent.futures`` executor. If None, the default
+        executor of the event loop is used.
+    :param kwargs: keyword arguments of ``func``
+    :return: return value of ``func``
+    """
+    token = CancelToken(progress)
+    # the loop of the running coroutine (`get_running_loop` is Python 3.7+)
+    loop = asyncio.get_event_loop()
+    future = loop.run_in_executor(executor, functools.partial(func, *args, progress=token, **kwargs))
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        token.cancel()
+        try:
+            await future
+        except Cancelled:
+            pass
+        raise
@@ -2,8 +2,8 @@ import numpy as np
 import matplotlib.pyplot as plt
 import time
 import scipy.linalg
-from tqdm import tqdm
-from scipy.linalg import toeplitz, companion
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from scipy.optimize import least_squares, leastsq
 
 import tkinter as tk
@@ -13,10 +13,22 @@ from matplotlib.figure import Figure
 import warnings
 warnings.filterwarnings('ignore', category=RuntimeWarning)
 
-from .pole_picking import SelectPoles
+from .pole_picking import SelectPoles, _BlitManager
+from .pole_table import PoleTable
+from .cache import PoleCache
+from .lscf import LSCF, PLSCF, _irfft_adjusted_lower_limit
+from .lsce import LSCE
+from .lsfd import _lsfd_basis, _lsfd_constants
+from .profiling import Timings, _no_stage, _profiled, _tracing
+from .progress import tqdm_progress, _track
+from . import lscf
 from . import tools
 from . import stabilization
 from . import normal_modes
+from . import synthetic
+from . import storage
+from . import uncertainty
+from . import ssi
 
 class Model():
     """
@@ -31,10 +43,15 @@ class Model():
                  upper=10000,
                  pol_order_high=100,
                  pyfrf=False,
-                 get_partfactors=False):
+                 get_partfactors=False,
+                 dtype='double'):
         """
         :param frf: Frequency response function matrix (must be receptance!)
-        :type frf: ndarray
+            or path to a ``.npy`` file, which is memory-mapped. A matrix of
+            shape ``(n_outputs, n_inputs, n_freq)`` (multiple inputs) is
+            stored as ``(n_outputs*n_inputs, n_freq)`` rows, ordered by
+            output (see ``get_poles(method='plscf')``).
+        :type frf: ndarray, str
         :param freq: Frequency array
         :type freq: array
         :param lower: Lower limit for pole determination [Hz]
@@ -43,7 +60,23 @@ class Model():
         :type upper: int, float
         :param pol_order_high: Highest order of the polynomial
         :type pol_order_high: int
+        :param dtype: Floating point precision, 'double' or 'single'. In
+            single precision the FRF is stored as complex64 and the FFTs,
+            Toeplitz products and LSFD reconstruction are computed in single
+            precision; the sums of the normal equations and the solutions of
+            the small linear systems are computed in double precision. A
+            memory-mapped FRF is not converted (it would be loaded into
+            memory); its chunks are converted when they are processed.
+        :type dtype: str, numpy.dtype
         """
+        try:
+            self.dtype = np.dtype(dtype)
+        except:
+            raise Exception('dtype must be "double" or "single"')
+        if self.dtype not in (np.float64, np.float32):
+            raise Exception('dtype must be "double" or "single"')
+        self.complex_dtype = np.result_type(self.dtype, np.complex64)
+
         try:
             self.lower = float(lower)
         except:
@@ -58,15 +91,29 @@ class Model():
         if self.upper < self.lower:
             raise Exception('upper must be greater than lower')
 
+        self._init_state()
+        self.n_inputs = 1
+        # the method and the order indices that produced the pole table
+        self.pole_method = None
+        self.pole_orders = None
+
         if pyfrf:
             self.frf = 0
         elif not pyfrf and frf is not None and freq is not None:
             try:
-                self.frf = np.asarray(frf)
+                if isinstance(frf, str):
+                    self.frf = np.load(frf, mmap_mode='r')
+                else:
+                    self.frf = np.asarray(frf)
             except:
                 raise Exception('cannot contert frf to numpy ndarray')
             if self.frf.ndim == 1:
                 self.frf = np.array([self.frf])
+            elif self.frf.ndim == 3:
+                self.n_inputs = self.frf.shape[1]
+                self.frf = self.frf.reshape(-1, self.frf.shape[2])
+            if self.dtype == np.float32 and not isinstance(self.frf, np.memmap):
+                self.frf = self.frf.astype(self.complex_dtype, copy=False)
 
             try:
                 self.freq = np.asarray(freq)
@@ -99,6 +146,133 @@ class Model():
         
         self.get_participation_factors = get_partfactors
 
+    def _init_state(self):
+        """Initialize the state that is not part of the modal model (see `load`)."""
+        # per-stage timings (see `profile`)
+        self.timings = Timings()
+        self._stage = _no_stage
+
+        # incremental LSCF estimator (see `get_poles`)
+        self.lscf = None
+        self._lscf_weights = None
+        # the FRF array the estimator was built from
+        self._lscf_frf = None
+
+        # FRF buffer used by `add_frfs`
+        self._frf_buffer = None
+        self._frf_sel = None
+        # the view of the buffer that was assigned to `self.frf`
+        self._frf_view = None
+        self._n_frf = 0
+
+    def save(self, path):
+        """
+        Save the model to the directory ``path``.
+
+        The FRFs, the poles, the selected poles and the results of
+        ``get_constants`` are stored as ``.npy`` files, the parameters in
+        ``model.json``. An existing model at ``path`` is replaced. The
+        incremental LSCF estimator is not stored; ``get_poles`` recomputes it
+        when needed.
+
+        Usage:
+        ::
+            >>> a.save('session')
+            >>> b = pyEMA.Model.load('session')
+
+        :param path: directory
+        :type path: str
+        """
+        storage.save_model(self, path)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        Load a model saved with ``save``.
+
+        :param path: directory
+        :type path: str
+        :param mmap: if True, the FRF matrix, the reconstructed FRF matrix and
+            the pole table are memory-mapped (read-only), so that large
+            models are opened without reading the arrays
+        :type mmap: bool
+        :return: Model
+        """
+        return storage.load_model(cls, path, mmap=mmap)
+
+    @classmethod
+    def from_time_data(cls, data, sampling_rate, lower=50, upper=None, pol_order_high=100, block_rows=None,
+                       ref_channels=None, n_lags=256, chunk_size=None, seed=None, show_progress=True, progress=None,
+                       dtype='double'):
+        """
+        Output-only (operational) modal model of ambient time records.
+
+        The poles are identified with the covariance-driven stochastic
+        subspace method (see ``ssi.ssi_cov``) and stored in
+        ``self.pole_table``, so the stabilization chart, the pole selection
+        and the pole picking work as with FRFs. The FRF matrix of the model
+        are the positive half spectra of the output correlations (rows:
+        channel-major pairs of channel and reference, see
+        ``ssi.half_spectra``), which have the modal form of a FRF;
+        ``get_constants`` therefore gives the operational mode shapes.
+        The correlations are stored in ``self.correlations``.
+
+        Usage:
+        ::
+            >>> a = pyEMA.Model.from_time_data(data, sampling_rate=1024, lower=5, upper=400, pol_order_high=30)
+            >>> a.select_closest_poles([50, 140, 310])
+            >>> a.get_constants()
+
+        :param data: Time records, shape ``(n_channels, n_samples)``, or path
+            to a ``.npy`` file, which is memory-mapped. The records are read
+            in chunks of samples.
+        :type data: ndarray, str
+        :param sampling_rate: Sampling rate of the records [Hz]
+        :type sampling_rate: float
+        :param lower: Lower limit of the frequency range [Hz]
+        :param upper: Upper limit of the frequency range [Hz]. If None, the
+            Nyquist frequency is used.
+        :param pol_order_high: Highest order index (the highest model order
+            is ``2*pol_order_high``)
+        :param block_rows: Number of block rows of the Toeplitz matrix. If
+            None, the smallest number that supports the highest model order
+            is used.
+        :param ref_channels: Indices of the reference channels. If None,
+            all the channels are references.
+        :param n_lags: Number of correlation lags of the half spectra (at
+            least ``2*block_rows - 1`` are computed)
+        :param chunk_size: Number of samples that are processed at once. If
+            None, it is chosen so that the temporary arrays take
+            approximately 64 MB.
+        :param seed: Seed of the randomized SVD
+        :param show_progress: Show progress bar (if ``progress`` is None)
+        :param progress: Progress callback ``progress(stage, done, total)``
+        :param dtype: Floating point precision of the model (see ``Model``)
+        :return: Model
+        """
+        if isinstance(data, str):
+            data = np.load(data, mmap_mode='r')
+        else:
+            data = np.asarray(data)
+        if data.ndim == 1:
+            data = data[None, :]
+        if progress is None and show_progress:
+            progress = tqdm_progress()
+
+        n_refs = data.shape[0] if ref_channels is None else len(ref_channels)
+        block_rows = ssi._block_rows(block_rows, 2*int(pol_order_high), data.shape[0], n_refs)
+        r = ssi.correlations(data, max(2*block_rows - 1, n_lags), ref_channels=ref_channels,
+                             chunk_size=chunk_size, progress=progress)
+        freq, frf = ssi.half_spectra(r, sampling_rate)
+
+        model = cls(frf=frf, freq=freq, lower=lower, upper=sampling_rate/2 if upper is None else upper,
+                    pol_order_high=pol_order_high, dtype=dtype)
+        model.correlations = r
+        model.pole_table = ssi.ssi_cov(None, sampling_rate, pol_order_high, block_rows=block_rows, r=r,
+                                       seed=seed, progress=progress, stage=model._stage)
+        model.pole_method = 'ssi-cov'
+        return model
+
     def add_frf(self, pyfrf_object):
         """
         Add a FRF at a next location.
@@ -108,21 +282,129 @@ class Model():
         :param pyfrf_object: FRF object from pyFRF
         :type pyfrf_object: object
         """
-        freq = pyfrf_object.get_f_axis()
-        sel = (freq >= 1.0e-1)
+        self.add_frfs([pyfrf_object])
+
+    def add_frfs(self, pyfrf_objects):
+        """
+        Add FRFs at next locations.
+
+        The FRFs are appended to a preallocated buffer that grows
+        geometrically, so adding locations one by one costs amortized O(1)
+        copying. If the model has no FRF yet, the frequency axis is taken
+        from the first added object. Otherwise the FRFs are appended to the
+        existing ones (which are copied into the buffer) and the frequency
+        lines of the model are taken from the objects; an exception is
+        raised if the objects do not contain them. The following objects are
+        only checked for the number of lines.
+
+        :param pyfrf_objects: iterable of FRF objects from pyFRF
+        :type pyfrf_objects: iterable
+        """
+        if self._frf_buffer is not None and self.frf is not self._frf_view:
+            # `self.frf` was replaced after the last call: start a new buffer
+            # from the replacement
+            self._frf_buffer = None
+            self._frf_sel = None
+
+        new_frf = []
+        for pyfrf_object in pyfrf_objects:
+            if self._frf_sel is None:
+                freq = np.asarray(pyfrf_object.get_f_axis())
+                if isinstance(self.frf, np.ndarray):
+                    # the lines of the existing FRF
+                    start = np.argmin(np.abs(freq - self.freq[0]))
+                    sel = np.zeros(len(freq), dtype=bool)
+                    sel[start:start+len(self.freq)] = True
+                    if np.sum(sel) != len(self.freq) or not np.allclose(freq[sel], self.freq):
+                        raise Exception('the frequency axis of the FRF object does not contain the '
+                                        'frequency lines of the model')
+                    self._frf_sel = sel
+                else:
+                    self._frf_sel = (freq >= 1.0e-1)
+
+                    self.freq = freq[self._frf_sel]
+                    self.omega = 2 * np.pi * self.freq
+                    self.sampling_time = 1/(2*self.freq[-1])
+
+            _frf = pyfrf_object.get_FRF(form='receptance')
+            if len(_frf) != len(self._frf_sel):
+                raise Exception(
+                    f'number of frequency lines ({len(_frf)}) does not match the first FRF ({len(self._frf_sel)})')
+            new_frf.append(np.vstack(_frf[self._frf_sel]).T)
 
-        self.freq = freq[sel]
-        self.omega = 2 * np.pi * self.freq
-        self.sampling_time = 1/(2*self.freq[-1])
+        if new_frf:
+            self._append_frf(np.concatenate(new_frf, axis=0))
 
-        new_frf = np.vstack(pyfrf_object.get_FRF(form='receptance')[sel])
+    def _append_frf(self, new_frf):
+        """
+        Append rows to the FRF buffer and update the ``self.frf`` view.
 
-        if isinstance(self.frf, int):
-            self.frf = new_frf.T
-        else:
-            self.frf = np.concatenate((self.frf, new_frf.T), axis=0)
+        :param new_frf: FRF rows, shape ``(n_locations, n_freq)``
+        """
+        n_new = new_frf.shape[0]
+        if self._frf_buffer is None:
+            n_old = 0
+            if isinstance(self.frf, np.ndarray):
+                n_old = self.frf.shape[0]
+                if self.frf.shape[1] != new_frf.shape[1]:
+                    raise Exception(f'number of frequency lines ({new_frf.shape[1]}) does not match '
+                                    f'the FRF of the model ({self.frf.shape[1]})')
+            self._frf_buffer = np.empty((max(n_old + n_new, 8), new_frf.shape[1]), dtype=self.complex_dtype)
+            if n_old:
+                self._frf_buffer[:n_old] = self.frf
+            self._n_frf = n_old
+        elif self._n_frf + n_new > self._frf_buffer.shape[0]:
+            buffer = np.empty((max(2*self._frf_buffer.shape[0], self._n_frf + n_new),
+                               self._frf_buffer.shape[1]), dtype=self.complex_dtype)
+            buffer[:self._n_frf] = self._frf_buffer[:self._n_frf]
+            self._frf_buffer = buffer
+
+        old_frf = self.frf
+        self._frf_buffer[self._n_frf:self._n_frf+n_new] = new_frf
+        self._n_frf += n_new
+        self.frf = self._frf_buffer[:self._n_frf]
+        self._frf_view = self.frf
+
+        # fold the new rows into the incremental estimator of `get_poles`
+        # (unweighted only, the weights of the new rows are not known)
+        if (self.lscf is not None and self._lscf_frf is old_frf and self._lscf_weights is None
+                and self.lscf.n_rows == self._n_frf - n_new):
+            self.lscf.add(new_frf)
+            self._lscf_frf = self.frf
+
+    @contextmanager
+    def profile(self, memory=False):
+        """
+        Record the wall time, call count and (optionally) peak memory of the
+        stages of ``get_poles``, ``select_closest_poles``, ``get_constants``
+        (and their inner stages, e.g. ``'get_poles/fft'`` or
+        ``'get_poles/roots'``) within the context. The records are stored in
+        ``self.timings`` (see :class:`Timings`).
 
-    def get_poles(self, method='lscf', show_progress=True):
+        Usage:
+        ::
+            >>> with a.profile(memory=True):
+            ...     a.get_poles()
+            ...     a.select_closest_poles([176, 476, 932])
+            >>> print(a.timings)
+            >>> a.timings.report()
+
+        :param memory: Record the peak memory of the stages (with
+            ``tracemalloc``, which slows down the computation)
+        :type memory: bool
+        :return: Timings
+        """
+        self.timings = Timings(memory=memory)
+        self._stage = self.timings.stage
+        try:
+            with _tracing(memory):
+                yield self.timings
+        finally:
+            self._stage = _no_stage
+
+    @_profiled('get_poles')
+    def get_poles(self, method='lscf', show_progress=True, physical_only=False, in_band_only=False, cache=None,
+                  chunk_size=None, orders=None, weights=None, progress=None):
         """Compute poles based on polynomial approximation of FRF.
 
         Source: https://github.com/openmodal/OpenModal/blob/master/OpenModal/analysis/lscf.py
@@ -179,70 +461,211 @@ class Model():
                 Least-Squares Complex Frequency-Domain Estimator, Vrije
                 Universiteit Brussel, LMS International
 
-        :param method: The method of poles calculation.
-        :param show_progress: Show progress bar
+        The poles are stored in ``self.pole_table`` (see :class:`PoleTable`).
+        ``self.all_poles``, ``self.pole_freq``, ``self.pole_xi`` and
+        ``self.partfactors`` are per-order views of that table.
+
+        :param method: The method of poles calculation: 'lscf' or 'lsce'.
+            The LSCE (Least-Squares Complex Exponential) method fits the
+            impulse responses (the inverse FFT of the FRFs) in the time
+            domain (see :class:`LSCE`). The poly-reference LSCF method
+            'plscf' (PolyMAX) fits the FRFs of multiple inputs with a matrix
+            denominator (see :class:`PLSCF`); the polynomial order ``j`` has
+            ``j*n_inputs`` poles and the participation factors are vectors
+            of ``n_inputs``. With a single input it is the 'lscf' method.
+            All the methods fill the same pole table, so the stabilization
+            and the pole picking do not depend on the method.
+        :param show_progress: Show progress bar (if ``progress`` is None)
+        :param physical_only: If True, only the poles with positive frequency
+            and positive damping are stored (conjugate and unstable poles are
+            discarded). This roughly halves the memory of the pole table;
+            the default table of all the poles takes as much memory as the
+            per-order lists (see :class:`PoleTable`).
+        :param in_band_only: If True, only the poles with natural frequency in
+            the ``[lower, upper]`` range are stored.
+        :param cache: Cache directory or ``PoleCache`` object. If given, the
+            poles are loaded from the cache when the FRF and the parameters
+            are unchanged, otherwise they are computed and stored.
+        :param chunk_size: Number of FRF rows that are transformed and added
+            to the normal equations at once. If None, it is chosen so that
+            the temporary arrays take approximately 64 MB. The peak memory
+            does not depend on the number of FRF rows.
+        :param orders: Indices of the polynomial orders that are computed
+            (the index ``k`` is the order ``2*(k+1)``). If None, all the
+            orders up to ``pol_order_high`` are computed. The other orders
+            are empty in ``self.pole_table``, so ``pole_ind`` keeps its
+            meaning.
+        :param weights: Weights of the FRF rows (channels) in the
+            least-squares cost, optional. If None, all the channels have
+            the weight 1. With the 'plscf' method, the weights of the
+            outputs.
+        :param progress: Progress callback ``progress(stage, done, total)``
+            that is called after each chunk of FRF rows and each polynomial
+            order. The computation is stopped if the callback raises an
+            exception (see :class:`CancelToken`).
+
+        The normal equations are kept in ``self.lscf`` (see :class:`LSCF`,
+        :class:`LSCE` and :class:`PLSCF`).
+        FRFs that are added with ``add_frf`` after this call are folded into
+        them, so the next call of ``get_poles`` only solves the equations.
+        When ``self.frf`` is replaced by another array, the equations are
+        built again; after changing ``self.frf`` in place, set
+        ``self.lscf = None``.
         """
-        if method != 'lscf':
+        estimators = {'lscf': LSCF, 'lsce': LSCE, 'plscf': PLSCF}
+        if method not in estimators:
             raise Exception(
-                f'no method "{method}". Currently only "lscf" method is implemented.')
-
-        if show_progress:
-            def tqdm_range(x): return tqdm(x, ncols=100)
+                f'no method "{method}". Currently only "lscf", "lsce" and "plscf" methods are implemented.')
+
+        order_ind = np.arange(self.pol_order_high) if orders is None else np.unique(np.asarray(orders, dtype=int))
+
+        if cache is not None:
+            if not isinstance(cache, PoleCache):
+                cache = PoleCache(cache)
+            cache_key = cache.key(self.frf, self.freq, method=method, lower=self.lower, upper=self.upper,
+                                  pol_order_high=self.pol_order_high, sampling_time=float(self.sampling_time),
+                                  get_partfactors=bool(self.get_participation_factors),
+                                  physical_only=bool(physical_only), in_band_only=bool(in_band_only),
+                                  dtype=str(self.dtype),
+                                  orders=None if orders is None else tuple(np.unique(orders).tolist()),
+                                  weights=None if weights is None else tuple(np.asarray(weights, dtype=float).tolist()),
+                                  **({'n_inputs': self.n_inputs} if method == 'plscf' else {}))
+            pole_table = cache.load(cache_key)
+            if pole_table is not None:
+                self.pole_table = pole_table
+                self.pole_method = method
+                self.pole_orders = order_ind
+                return
+
+        if progress is None and show_progress:
+            progress = tqdm_progress()
+
+        # The FRF rows added by `add_frfs` after the last call are already
+        # included in the incremental estimator.
+        if (self.lscf is None
+                or self._lscf_frf is not self.frf
+                or type(self.lscf) is not estimators[method]
+                or getattr(self.lscf, 'n_inputs', self.n_inputs) != self.n_inputs
+                or self.lscf.n_rows != self.frf.shape[0]
+                or self.lscf.pol_order_high != self.pol_order_high
+                or not np.array_equal(self.lscf.order_ind, order_ind)
+                or not np.array_equal(self._lscf_weights, weights)
+                or self.lscf.lower_ind != np.argmin(np.abs(self.freq - self.lower))
+                or self.lscf.nf != 2 * (self.frf.shape[1] - 1)
+                or self.lscf.sampling_time != self.sampling_time
+                or self.lscf.dtype != self.dtype):
+            # The FRF is processed in chunks of rows (it can be memory-mapped)
+            kwargs = {'n_inputs': self.n_inputs} if method == 'plscf' else {}
+            self.lscf = estimators[method](self.freq, self.lower, self.pol_order_high,
+                                           sampling_time=self.sampling_time, dtype=self.dtype, orders=order_ind,
+                                           **kwargs)
+            self.lscf.add(self.frf, chunk_size=chunk_size, progress=progress, weights=weights, stage=self._stage)
+            self._lscf_weights = None if weights is None else np.array(weights, dtype=float)
+            self._lscf_frf = self.frf
+
+        self.pole_table = self.lscf.poles(get_partfactors=self.get_participation_factors,
+                                          progress=progress, stage=self._stage)
+        self.pole_method = method
+        self.pole_orders = order_ind
+        if physical_only or in_band_only:
+            self.pole_table = self.pole_table.select(self.pole_table.mask(
+                f_min=self.lower if in_band_only else None,
+                f_max=self.upper if in_band_only else None,
+                physical=physical_only))
+
+        if cache is not None:
+            cache.store(cache_key, self.pole_table)
+
+    @_profiled('get_poles_multiband')
+    def get_poles_multiband(self, n_bands=4, overlap=0.25, pol_order_high=None, band_edges=None,
+                            n_jobs=None, chunk_size=None, progress=None):
+        """Compute poles with the LSCF method in overlapping frequency bands.
+
+        The ``[lower, upper]`` range is split into ``n_bands`` bands. Each
+        band is extended by ``overlap`` times its width on both sides and
+        fitted with a polynomial of a modest order (in parallel processes).
+        The poles of a band are kept only if their natural frequency lies
+        in the (non-extended) band, so the poles of the overlapping parts
+        are not duplicated. The poles of all the bands are merged into
+        ``self.pole_table``, order by order, and can be used with the
+        stabilization chart and pole selection as usual.
+
+        Only the poles with positive natural frequency are kept.
+
+        :param n_bands: Number of bands (of equal width)
+        :type n_bands: int
+        :param overlap: Extension of each band on each side, relative to its width
+        :type overlap: float
+        :param pol_order_high: Highest order of the polynomial in each band. If
+            None, ``self.pol_order_high // n_bands`` (at least 10) is used.
+        :type pol_order_high: int
+        :param band_edges: Band edges [Hz], overrides ``n_bands``, optional
+        :type band_edges: array
+        :param n_jobs: Number of processes. If 1, the bands are fitted in
+            the current process. If None, the number of CPUs is used.
+        :type n_jobs: int
+        :param chunk_size: Number of FRF rows that are processed at once
+        :type chunk_size: int
+        :param progress: Progress callback ``progress(stage, done, total)``
+            that is called after each band, optional
+        """
+        if band_edges is None:
+            band_edges = np.linspace(self.lower, self.upper, int(n_bands)+1)
+        band_edges = np.asarray(band_edges, dtype=float)
+        if band_edges.ndim != 1 or len(band_edges) < 2 or np.any(np.diff(band_edges) <= 0):
+            raise Exception('band_edges must be an increasing array with at least 2 elements')
+
+        if pol_order_high is None:
+            pol_order_high = max(10, self.pol_order_high // (len(band_edges) - 1))
+
+        jobs = []
+        for f_lo, f_hi in zip(band_edges[:-1], band_edges[1:]):
+            ext = overlap * (f_hi - f_lo)
+            jobs.append((max(f_lo - ext, 0.), min(f_hi + ext, self.freq[-1]), (f_lo, f_hi)))
+
+        # each process receives only the lines of its band
+        args = []
+        for f_lower, f_upper, f_core in jobs:
+            lower_ind, upper_ind = lscf._band_lines(self.freq, f_lower, f_upper)
+            args.append((self.frf[:, lower_ind:upper_ind], self.freq[:upper_ind], f_lower, f_upper, f_core,
+                         pol_order_high, self.get_participation_factors, chunk_size, self.dtype))
+        if n_jobs == 1:
+            tables = [lscf._fit_band(*_) for _ in _track(args, progress, 'get_poles_multiband')]
         else:
-            def tqdm_range(x): return x
-
-        self.all_poles = []
-        self.pole_freq = []
-        self.pole_xi = []
-        self.partfactors = []
-
-        lower_ind = np.argmin(np.abs(self.freq - self.lower))
-        n = self.pol_order_high * 2
-        nf = 2 * (self.frf.shape[1] - 1)
-        nr = self.frf.shape[0]
-
-        indices_s = np.arange(-n, n+1)
-        indices_t = np.arange(n+1)
-
-        sk = -_irfft_adjusted_lower_limit(self.frf, lower_ind, indices_s)
-        t = _irfft_adjusted_lower_limit(
-            self.frf.real**2 + self.frf.imag**2, lower_ind, indices_t)
-        r = -(np.fft.irfft(np.ones(lower_ind), n=nf))[indices_t]*nf
-        r[0] += nf
-
-        s = []
-        for i in range(nr):
-            s.append(toeplitz(sk[i, n:], sk[i, :n+1][::-1]))
-        t = toeplitz(np.sum(t[:, :n+1], axis=0))
-        r = toeplitz(r)
-
-        # Ascending polinomial order pole computation
-        for j in tqdm_range(range(2, n+1, 2)):
-            d = 0
-            rinv = np.linalg.inv(r[:j+1, :j+1])
-            for i in range(nr):
-                snew = s[i][:j+1, :j+1]
-                d -= np.dot(np.dot(snew[:j+1, :j+1].T,
-                                   rinv), snew[:j+1, :j+1])   # sum
-            d += t[:j+1, :j+1]
-
-            a0an1 = np.linalg.solve(-d[0:j, 0:j], d[0:j, j])
-            # the numerator coefficients
-            sr = np.roots(np.append(a0an1, 1)[::-1])
-
-            # Z-domain (for discrete-time domain model)
-            poles = -np.log(sr) / self.sampling_time
-
-            if self.get_participation_factors:
-                _t = companion(np.append(a0an1, 1)[::-1])
-                _v, _w = np.linalg.eig(_t)
-                self.partfactors.append(_w[-1, :])
-
-            f_pole, ceta = tools.complex_freq_to_freq_and_damp(poles)
-
-            self.all_poles.append(poles)
-            self.pole_freq.append(f_pole)
-            self.pole_xi.append(ceta)
+            with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+                futures = [executor.submit(lscf._fit_band, *_) for _ in args]
+                try:
+                    tables = [_.result() for _ in _track(futures, progress, 'get_poles_multiband')]
+                except BaseException:
+                    for _ in futures:
+                        _.cancel()
+                    raise
+
+        self.pole_table = PoleTable.concatenate(tables)
+        self.pole_method = 'multiband'
+        self.pole_orders = None
+
+    @property
+    def all_poles(self):
+        """Complex poles, list of arrays (one for each polynomial order)."""
+        return self.pole_table.split('pole')
+
+    @property
+    def pole_freq(self):
+        """Natural frequencies of the poles, list of arrays (one for each polynomial order)."""
+        return self.pole_table.split('freq')
+
+    @property
+    def pole_xi(self):
+        """Damping ratios of the poles, list of arrays (one for each polynomial order)."""
+        return self.pole_table.split('xi')
+
+    @property
+    def partfactors(self):
+        """Participation factors, list of arrays (one for each polynomial order)."""
+        if self.pole_table.partfactor is None:
+            return []
+        return self.pole_table.split('partfactor')
 
     def select_poles(self):
         _ = SelectPoles(self)
@@ -278,24 +701,18 @@ class Model():
             >>> a.nat_xi # damping coefficients
             >>> H, A = a.get_constants(whose_poles='own', FRF_ind='all) # reconstruction
         """
-        if poles == 'all':
-            poles = self.all_poles
-
-        def replot(init=False):
-            """Replot the measured and reconstructed FRF based on new selected poles."""
-            ax2.clear()
-            ax2.semilogy(self.freq, np.average(
-                np.abs(self.frf), axis=0), alpha=0.7, color='k')
+        if isinstance(poles, str) and poles == 'all':
+            poles = self.pole_table
 
-            if not init:
+        def replot():
+            """Update the reconstructed FRF based on new selected poles."""
+            if len(self.nat_freq) > 0:
                 self.H, self.A = self.get_constants(whose_poles='own', FRF_ind='all', least_squares_type='new')
-                ax2.semilogy(self.freq, np.average(
-                    np.abs(self.H), axis=0), color='r', lw=2)
-
-            ax1.set_xlim([self.lower, self.upper])
-            ax1.set_ylim([0, self.pol_order_high+5])
+                reconstruction.set_data(self.freq, np.average(np.abs(self.H), axis=0))
+            else:
+                reconstruction.set_data([], [])
 
-        Nmax = self.pol_order_high
+        Nmax = poles.n_orders if isinstance(poles, PoleTable) else self.pol_order_high
         fn_temp, xi_temp, test_fn, test_xi = stabilization._stabilization(
             poles, Nmax, err_fn=fn_temp, err_xi=xi_temp)
 
@@ -306,7 +723,14 @@ class Model():
 
         ax1 = ax2.twinx()
         ax1.grid(True)
-        replot(init=True)
+
+        # the measured FRF is drawn once, the reconstruction and the selected
+        # poles are blitted over it (see `_BlitManager`)
+        ax2.semilogy(self.freq, np.average(
+            np.abs(self.frf), axis=0), alpha=0.7, color='k')
+        reconstruction, = ax2.semilogy([], [], color='r', lw=2, animated=True)
+        ax1.set_xlim([self.lower, self.upper])
+        ax1.set_ylim([0, self.pol_order_high+5])
 
         ax1.set_xlabel(r'$f$ [Hz]', fontsize=12)
         ax1.set_ylabel(r'Polynomial order', fontsize=12)
@@ -350,10 +774,11 @@ class Model():
         self.pole_ind = []
 
         line, = ax1.plot(self.nat_freq, np.repeat(
-            self.pol_order_high, len(self.nat_freq)), 'kv', markersize=8)
+            self.pol_order_high, len(self.nat_freq)), 'kv', markersize=8, animated=True)
 
         # Mark selected poles
-        selected, = ax1.plot([], [], 'ko')
+        selected, = ax1.plot([], [], 'ko', animated=True)
+        animated = [reconstruction, line, selected]
 
         self.shift_is_held = False
 
@@ -393,17 +818,20 @@ class Model():
             line.set_xdata(np.asarray(self.nat_freq))  # update data
             line.set_ydata(np.repeat(Nmax*1.04, len(self.nat_freq)))
 
-            selected.set_xdata([self.pole_freq[p[0]][p[1]]
-                                for p in self.pole_ind])  # update data
+            selected.set_xdata(self.pole_table.freq[self.pole_table.flat_index(self.pole_ind)])  # update data
             selected.set_ydata([p[0] for p in self.pole_ind])
-            fig.canvas.draw()
+            blit.update()
 
         canvas = FigureCanvasTkAgg(fig, root)  # Tkinter
         canvas.get_tk_widget().pack(side='top', fill='both', expand=1)  # Tkinter
         NavigationToolbar2Tk(canvas, root)  # Tkinter
+        blit = _BlitManager(canvas, lambda: animated)
 
         def on_closing():
             if title is not None:
+                # animated artists are skipped by savefig
+                for artist in animated:
+                    artist.set_animated(False)
                 fig.savefig(title)
             root.destroy()
 
@@ -419,7 +847,7 @@ class Model():
         """
         On-the-fly selection of the closest poles.        
         """
-        y_ind = int(np.argmin(np.abs(np.arange(0, len(self.pole_freq)
+        y_ind = int(np.argmin(np.abs(np.arange(0, self.pole_table.n_orders
                                                )-self.y_data_pole)))  # Find closest pole order
         # Find cloeset frequency
         sel = np.argmin(np.abs(self.pole_freq[y_ind] - self.x_data_pole))
@@ -428,7 +856,8 @@ class Model():
         self.nat_freq.append(self.pole_freq[y_ind][sel])
         self.nat_xi.append(self.pole_xi[y_ind][sel])
 
-    def select_closest_poles(self, approx_nat_freq, f_window=50, fn_temp=0.001, xi_temp=0.05):
+    @_profiled('select_closest_poles')
+    def select_closest_poles(self, approx_nat_freq, f_window=50, fn_temp=0.001, xi_temp=0.05, progress=None):
         """
         Identification of natural frequency and damping.
 
@@ -438,14 +867,16 @@ class Model():
         :type approx_nat_freq: list
         :param f_window: width of the optimization frequency window when searching for stable poles
         :type f_window: float, int
+        :param progress: progress callback ``progress(stage, done, total)``, optional
         """
         pole_ind = []
         sel_ind = []
 
-        Nmax = self.pol_order_high
-        poles = self.all_poles
-        fn_temp, xi_temp, test_fn, test_xi = stabilization._stabilization(
-            poles, Nmax, err_fn=fn_temp, err_xi=xi_temp)
+        poles = self.pole_table
+        Nmax = poles.n_orders
+        with self._stage('stabilization'):
+            fn_temp, xi_temp, test_fn, test_xi = stabilization._stabilization(
+                poles, Nmax, err_fn=fn_temp, err_xi=xi_temp, progress=progress)
         # select the stable poles
         b = np.argwhere((test_fn > 0) & ((test_xi > 0) & (xi_temp > 0)))
 
@@ -459,7 +890,7 @@ class Model():
         self.f_stable = f_stable
         f_windows = [
             f_window//i for i in range(2, 100) if f_window//i > 3] + [2]
-        for i, fr in enumerate(approx_nat_freq):
+        for i, fr in enumerate(_track(approx_nat_freq, progress, 'select_closest_poles')):
             # Optimize the approximate frequency
             def fun(x, f_step):
                 f = x[0]
@@ -467,9 +898,10 @@ class Model():
                                      & (f_stable < (fr + f_step))]
                 return _f_stable.flatten() - f
 
-            for f_w in f_windows:
-                sol = least_squares(lambda x: fun(x, f_w), x0=[fr])
-                fr = sol.x[0]
+            with self._stage('optimization'):
+                for f_w in f_windows:
+                    sol = least_squares(lambda x: fun(x, f_w), x0=[fr])
+                    fr = sol.x[0]
 
             # Select the closest frequency
             f_sel = np.argmin(np.abs(f_stable - fr))
@@ -493,8 +925,88 @@ class Model():
         self.nat_freq = f_stable[sel_ind[:, 1], sel_ind[:, 0]]
         self.nat_xi = xi_stable[sel_ind[:, 1], sel_ind[:, 0]]
 
+    @_profiled('track_modes')
+    def track_modes(self, reference, order_window=4, f_tol=0.05, xi_tol=1., mac_min=0.9, progress=None):
+        """
+        Identify the modes that were selected in ``reference`` (e.g. the
+        previous snapshot of a monitored structure) with a warm start.
+
+        The poles are computed only for a narrow window of polynomial
+        orders around the orders of the poles that were selected in
+        ``reference``. For each tracked mode, the closest physical pole
+        (relative difference of natural frequency and damping) is
+        selected. If ``reference`` has mode shapes (``reference.A``), the
+        new mode shapes must also match them (MAC above ``mac_min``).
+
+        When a mode can not be matched (tracking is lost), the poles of all
+        the orders are computed and the modes are selected with
+        ``select_closest_poles(reference.nat_freq)``.
+
+        Usage:
+        ::
+            >>> a.get_poles()
+            >>> a.select_closest_poles([176, 476, 932])
+            >>> a.get_constants(FRF_ind=None)
+            >>> b = pyEMA.Model(frf_next, freq, lower=10, upper=5000, pol_order_high=60)
+            >>> b.track_modes(a)
+
+        :param reference: Model with selected poles (``pole_ind``, ``nat_freq`` and ``nat_xi``)
+        :type reference: Model
+        :param order_window: Number of order indices that are added below and
+            above the orders of the selected poles
+        :type order_window: int
+        :param f_tol: Maximum relative change of the natural frequency
+        :type f_tol: float
+        :param xi_tol: Maximum relative change of the damping ratio
+        :type xi_tol: float
+        :param mac_min: Minimum MAC between the reference and the new mode shapes
+        :type mac_min: float
+        :param progress: progress callback ``progress(stage, done, total)``, optional
+        :return: True if all the modes were tracked, False if the full
+            computation was used
+        """
+        if not hasattr(reference, 'pole_ind'):
+            raise Exception('the reference model has no selected poles')
+
+        ref_freq = np.asarray(reference.nat_freq, dtype=float)
+        ref_xi = np.asarray(reference.nat_xi, dtype=float)
+        ref_orders = np.asarray(reference.pole_ind)[:, 0]
+        lo = max(0, np.min(ref_orders) - order_window)
+        hi = min(self.pol_order_high - 1, np.max(ref_orders) + order_window)
+
+        self.get_poles(show_progress=False, orders=np.arange(lo, hi+1), progress=progress)
+        table = self.pole_table
+        rows = np.flatnonzero(table.mask(f_min=self.lower, f_max=self.upper, physical=True))
+
+        tracked = len(rows) > 0
+        if tracked:
+            # relative distance of all candidate poles to all tracked modes
+            df = np.abs(table.freq[rows] - ref_freq[:, None]) / ref_freq[:, None]
+            dxi = np.abs(table.xi[rows] - ref_xi[:, None]) / ref_xi[:, None]
+            cost = df/f_tol + dxi/xi_tol
+            cost[(df > f_tol) | (dxi > xi_tol)] = np.inf
+            sel = np.argmin(cost, axis=1)
+            tracked = np.all(np.isfinite(cost[np.arange(len(sel)), sel])) and len(np.unique(sel)) == len(sel)
+
+        if tracked:
+            sel = rows[sel]
+            self.pole_ind = table.pole_index(sel)
+            self.nat_freq = table.freq[sel]
+            self.nat_xi = table.xi[sel]
+
+            ref_A = getattr(reference, 'A', None)
+            if ref_A is not None and ref_A.shape[0] == self.frf.shape[0]:
+                A = self.get_constants(FRF_ind=None)
+                tracked = np.all(np.diag(tools.MAC(ref_A, A)) >= mac_min)
+
+        if not tracked:
+            self.get_poles(show_progress=False, progress=progress)
+            self.select_closest_poles(ref_freq, progress=progress)
+        return bool(tracked)
+
+    @_profiled('get_constants')
     def get_constants(self, method='lsfd', whose_poles='own', FRF_ind='all',
-                      f_lower=None, f_upper=None, complex_mode=True, upper_r=True, lower_r=True, least_squares_type='new'):
+                      f_lower=None, f_upper=None, complex_mode=True, upper_r=True, lower_r=True, least_squares_type='new', progress=None):
         """
         Least square frequency domain 1D (Participation factor excluded)
 
@@ -512,6 +1024,8 @@ class Model():
         :type upper_r: bool, optional
         :param lower_r: Compute lower residual, defaults to True
         :type lower_r: bool, optional
+        :param progress: progress callback ``progress(stage, done, total)``,
+            called after the least-squares solution and the reconstruction, optional
         :return: modal constants if ``FRF_ind=None``, otherwise reconstructed FRFs and modal constants
         """
         if method != 'lsfd':
@@ -521,12 +1035,8 @@ class Model():
         if whose_poles == 'own':
             whose_poles = self
 
-        pole_ind = np.asarray(whose_poles.pole_ind, dtype=int)
-        n_poles = pole_ind.shape[0]
-        poles = []
-        for i in range(n_poles):
-            poles.append(whose_poles.all_poles[pole_ind[i, 0]][pole_ind[i, 1]])
-        poles = np.asarray(poles)
+        pole_table = whose_poles.pole_table
+        poles = pole_table.pole[pole_table.flat_index(whose_poles.pole_ind)]
 
         # concatenate frequency and FRF array
         if f_lower == None:
@@ -543,61 +1053,92 @@ class Model():
         ome = 2 * np.pi * _freq
         M_2 = len(poles)
         
-        def TA_construction(TA_omega):
-            len_ome = len(TA_omega)
-            if TA_omega[0] == 0: 
-                TA_omega[0] = 1.e-2
-
-            _ome = TA_omega[:, np.newaxis]
-
-            # Initialization
-            TA = np.zeros([2*len_ome, 2*M_2 + 4])
-
-            # Eigenmodes contribution
-            TA[:len_ome, 0:2*M_2:2] =    (-np.real(poles))/(np.real(poles)**2+(_ome-np.imag(poles))**2)+\
-                                        (-np.real(poles))/(np.real(poles)**2+(_ome+np.imag(poles))**2)
-            TA[len_ome:, 0:2*M_2:2] =    (-(_ome-np.imag(poles)))/(np.real(poles)**2+(_ome-np.imag(poles))**2)+\
-                                        (-(_ome+np.imag(poles)))/(np.real(poles)**2+(_ome+np.imag(poles))**2)
-            TA[:len_ome, 1:2*M_2+1:2] =  ((_ome-np.imag(poles)))/(np.real(poles)**2+(_ome-np.imag(poles))**2)+\
-                                        (-(_ome+np.imag(poles)))/(np.real(poles)**2+(_ome+np.imag(poles))**2)
-            TA[len_ome:, 1:2*M_2+1:2] =  (-np.real(poles))/(np.real(poles)**2+(_ome-np.imag(poles))**2)+\
-                                        (np.real(poles))/(np.real(poles)**2+(_ome+np.imag(poles))**2)
-            
-            # Lower and upper residuals contribution
-            TA[:len_ome, -4] = -1/(TA_omega**2)
-            TA[len_ome:, -3] = -1/(TA_omega**2)
-            TA[:len_ome, -2] = np.ones(len_ome)
-            TA[len_ome:, -1] = np.ones(len_ome)
-
-            return TA
-
-        AT = np.linalg.pinv(TA_construction(ome))
+        # the pseudo-inverse is always computed in double precision
+        with self._stage('pinv'):
+            AT = np.linalg.pinv(_lsfd_basis(ome, poles)).astype(self.dtype, copy=False)
         FRF_r_i = np.concatenate([np.real(_FRF_mat.T),np.imag(_FRF_mat.T)])
         A_LSFD = AT @ FRF_r_i      
+        if progress is not None:
+            progress('get_constants', 1, 2)
         
-        self.A = (A_LSFD[0:2*M_2:2, :] + 1.j*A_LSFD[1:2*M_2+1:2, :]).T
-        self.LR = A_LSFD[-4, :]+1.j*A_LSFD[-3, :]
-        self.UR = A_LSFD[-2, :]+1.j*A_LSFD[-1, :]
+        self.A, self.LR, self.UR = _lsfd_constants(A_LSFD, M_2)
         self.poles = poles
 
         # FRF reconstruction
         if FRF_ind is None:
+            if progress is not None:
+                progress('get_constants', 2, 2)
             return self.A
 
         elif FRF_ind == 'all':
-            _FRF_r_i = TA_construction(self.omega)@A_LSFD
+            with self._stage('reconstruction'):
+                _FRF_r_i = _lsfd_basis(self.omega, poles, self.dtype)@A_LSFD
             frf_ = (_FRF_r_i[:len(self.omega),:] + _FRF_r_i[len(self.omega):,:]*1.j).T
             self.H = frf_
+            if progress is not None:
+                progress('get_constants', 2, 2)
             return frf_, self.A
 
         elif isinstance(FRF_ind, int):
             frf_ = self.FRF_reconstruct(FRF_ind)[None, :]
             self.H = frf_
+            if progress is not None:
+                progress('get_constants', 2, 2)
             return frf_, self.A
 
         else:
             raise Exception('FRF_ind must be None, "all" or int')
 
+    @_profiled('get_uncertainty')
+    def get_uncertainty(self, method='bootstrap', n_replicates=200, confidence=0.95, n_jobs=None, seed=None,
+                        chunk_size=None, progress=None):
+        """
+        Uncertainty bounds of the selected modes by resampling the channels.
+
+        The channels (FRF rows) are resampled with replacement (bootstrap)
+        or left out one at a time (jackknife) and the identification of the
+        selected modes is repeated for each replicate: the poles of the
+        orders in ``pole_ind``, computed with the method that produced the
+        pole table ('lscf', 'lsce' or 'plscf', see ``get_poles``; the
+        replicate pole closest to each selected pole is taken), and the LSFD
+        modal constants of all the channels. With the 'plscf' method the
+        outputs are resampled. The poles of ``get_poles_multiband`` and
+        ``from_time_data`` are not supported.
+
+        The FFTs of the channels are computed once; a replicate only
+        reweights the transformed channels (see the ``weights`` of
+        ``get_poles``), assembles the normal equations and solves them. The
+        replicates are computed in parallel processes.
+
+        Usage:
+        ::
+            >>> a.get_poles()
+            >>> a.select_closest_poles([176, 476, 932])
+            >>> u = a.get_uncertainty(n_replicates=500, seed=0)
+            >>> u['nat_freq']['lower'], u['nat_freq']['upper'] # 95 % confidence intervals
+
+        :param method: 'bootstrap' (percentile intervals) or 'jackknife'
+            (normal intervals with the jackknife standard error)
+        :param n_replicates: Number of bootstrap replicates (the jackknife
+            has one replicate for each channel)
+        :param confidence: Confidence level of the intervals
+        :param n_jobs: Number of processes. If None, the number of CPUs is used.
+        :param seed: Seed of the bootstrap resampling
+        :param chunk_size: Number of FRF rows that are transformed at once
+            (see ``get_poles``)
+        :param progress: Progress callback ``progress(stage, done, total)``,
+            called after each chunk of FRF rows and each replicate
+        :return: dict with the keys 'nat_freq', 'nat_xi' and 'A'; each is a
+            dict with the 'estimate', the standard deviation 'std' and the
+            bounds 'lower' and 'upper' of the confidence interval. For the
+            complex modal constants the bounds are computed for the real and
+            the imaginary parts. The result is also stored in ``self.uncertainty``.
+        """
+        self.uncertainty = uncertainty.channel_resampling(
+            self, method=method, n_replicates=n_replicates, confidence=confidence, n_jobs=n_jobs,
+            seed=seed, chunk_size=chunk_size, progress=progress)
+        return self.uncertainty
+
     def FRF_reconstruct(self, FRF_ind):
         """
         Reconstruct FRF based on modal constants.
@@ -606,16 +1147,8 @@ class Model():
         :return: Reconstructed FRF
         """
 
-        FRF_true = np.zeros(len(self.omega), complex)
-        for n in range(self.A.shape[1]):
-            FRF_true += (self.A[FRF_ind, n] /
-                         (1j*self.omega - self.poles[n])) + \
-                (np.conjugate(self.A[FRF_ind, n]) /
-                 (1j*self.omega - np.conjugate(self.poles[n])))
-
-        FRF_true += -self.LR[FRF_ind] / \
-            (self.omega**2) + self.UR[FRF_ind]
-        return FRF_true
+        return synthetic.frf(self.omega / (2*np.pi), self.poles, self.A[FRF_ind],
+                             LR=self.LR[FRF_ind], UR=self.UR[FRF_ind])[0]
 
     def autoMAC(self):
         """
@@ -655,25 +1188,3 @@ class Model():
         for i, f in enumerate(self.nat_freq):
             print(f'{i+1}) {f:6.1f}\t{self.nat_xi[i]:5.4f}')
 
-
-def _irfft_adjusted_lower_limit(x, low_lim, indices):
-    """
-    Compute the ifft of real matrix x with adjusted summation limits:
-    ::
-        y(j) = sum[k=-n-2, ... , -low_lim-1, low_lim, low_lim+1, ... n-2, n-1] x[k] * exp(sqrt(-1)*j*k* 2*pi/n),
-        j =-n-2, ..., -low_limit-1, low_limit, low_limit+1, ... n-2, n-1
-
-    :param x: Single-sided real array to Fourier transform.
-    :param low_lim: lower limit index of the array x.
-    :param indices: list of indices of interest
-    :return: Fourier transformed two-sided array x with adjusted lower limit.
-             Retruns values.
-
-    Source: https://github.com/openmodal/OpenModal/blob/master/OpenModal/fft_tools.py
-    """
-
-    nf = 2 * (x.shape[1] - 1)
-    a = (np.fft.irfft(x, n=nf)[:, indices]) * nf
-    b = (np.fft.irfft(x[:, :low_lim], n=nf)[:, indices]) * nf
-
-    return a - b
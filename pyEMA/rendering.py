@@ -0,0 +1,425 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.colors import to_rgb
+from matplotlib.figure import Figure
+from matplotlib.image import AxesImage
+
+from . import stabilization
+from .progress import _track
+
+# number of poles above which the stability chart and the cluster diagram
+# show the pole density instead of the markers (``pole_plot_type='auto'``)
+_DENSITY_THRESHOLD = 20000
+
+# marker format, marker size and legend label of the pole categories
+_POLE_STYLES = {
+    'a': ('bx', 4, 'stable frequency, unstable damping'),
+    'b': ('gx', 7, 'stable frequency, stable damping'),
+    'c': ('r.', 4, 'unstable frequency, unstable damping'),
+    'd': ('r*', 4, 'unstable frequency, stable damping'),
+}
+
+
+class FRFPyramid:
+    """
+    Multi-resolution min/max pyramid of FRF magnitudes for plotting.
+
+    The magnitudes are computed once. Each level of the pyramid stores the
+    minimum and the maximum of ``factor`` neighbouring samples of the
+    previous level, so that the peaks and the anti-resonances are preserved
+    at any resolution. ``view`` returns the finest level that has at most
+    the requested number of points in the frequency range; the number of
+    plotted points therefore depends on the size of the axes and not on the
+    length (or the number) of the FRFs.
+
+    Usage:
+    ::
+        >>> pyramid = pyEMA.rendering.FRFPyramid(a.freq, a.frf)
+        >>> freq, mag = pyramid.view(100, 2000, max_points=2000)
+        >>> plt.semilogy(freq, mag)
+    """
+
+    def __init__(self, freq, frf, average=False, factor=4, min_size=512):
+        """
+        :param freq: Frequency array (ascending)
+        :type freq: array
+        :param frf: FRF matrix, shape ``(n_channels, n_freq)`` or ``(n_freq,)``
+        :type frf: array
+        :param average: if True, the pyramid of the average magnitude of the
+            FRFs is built (one channel)
+        :type average: bool
+        :param factor: Number of samples that are reduced to one min/max
+            pair on each level
+        :type factor: int
+        :param min_size: The coarsest level has at most ``min_size`` samples
+        :type min_size: int
+        """
+        if factor < 2:
+            raise Exception('factor must be at least 2')
+        freq = np.asarray(freq, dtype=float)
+        mag = np.abs(frf)
+        if mag.ndim == 1:
+            mag = mag[None, :]
+        if mag.shape[1] != len(freq):
+            raise Exception(f'frf has {mag.shape[1]} frequency points, freq has {len(freq)}')
+        if average:
+            mag = np.average(mag, axis=0)[None, :]
+
+        self.average = average
+        self.n_channels = mag.shape[0]
+
+        # levels: (start frequency, end frequency, min, max) of each block;
+        # on the first level the blocks are the samples (min is max)
+        f_start = f_end = freq
+        low = high = mag
+        self.levels = [(f_start, f_end, low, high)]
+        while low.shape[1] > min_size:
+            ind = np.arange(0, low.shape[1], factor)
+            f_end = f_end[np.minimum(ind + factor, len(f_end)) - 1]
+            f_start = f_start[ind]
+            low = np.minimum.reduceat(low, ind, axis=1)
+            high = np.maximum.reduceat(high, ind, axis=1)
+            self.levels.append((f_start, f_end, low, high))
+
+    def view(self, lower, upper, max_points):
+        """
+        Decimated magnitudes in the frequency range.
+
+        One block outside the range is added on each side, so that the
+        lines continue to the edges of the axes.
+
+        :param lower: Lower frequency of the view [Hz]
+        :param upper: Upper frequency of the view [Hz]
+        :param max_points: Maximum number of points (e.g. twice the width
+            of the axes in pixels). If even the coarsest level has more
+            points, the coarsest level is returned.
+        :type max_points: int
+        :return: frequencies ``(n_points,)`` and magnitudes ``(n_points, n_channels)``
+        """
+        for f_start, f_end, low, high in self.levels:
+            i0 = max(np.searchsorted(f_end, lower) - 1, 0)
+            i1 = min(np.searchsorted(f_start, upper, side='right') + 1, len(f_start))
+            n_points = (i1 - i0) * (1 if low is high else 2)
+            if n_points <= max_points:
+                break
+
+        if low is high:
+            return f_start[i0:i1], low[:, i0:i1].T
+
+        # a vertical segment from the minimum to the maximum of each block
+        center = (f_start[i0:i1] + f_end[i0:i1]) / 2
+        freq = np.repeat(center, 2)
+        mag = np.empty((2*(i1 - i0), self.n_channels), dtype=low.dtype)
+        mag[0::2] = low[:, i0:i1].T
+        mag[1::2] = high[:, i0:i1].T
+        return freq, mag
+
+
+class DecimatedLines:
+    """
+    Lines of an :class:`FRFPyramid` that are decimated again when the
+    x-limits of the axes change (zoom and pan).
+
+    The axes keep only a weak reference to the object; a reference must be
+    kept as long as the lines are updated.
+    """
+
+    def __init__(self, ax, pyramid, points_per_pixel=2, **kwargs):
+        """
+        :param ax: matplotlib axes (logarithmic y-axis)
+        :param pyramid: ``FRFPyramid`` object
+        :param points_per_pixel: Number of points per pixel of the axes width
+        :param kwargs: arguments of ``ax.semilogy``
+        """
+        self.ax = ax
+        self.pyramid = pyramid
+        self.points_per_pixel = points_per_pixel
+        self.lines = ax.semilogy(*self._view(), **kwargs)
+        # ``ax.clear()`` replaces the callback registry
+        self._callbacks = ax.callbacks
+        self._cid = ax.callbacks.connect('xlim_changed', self.update)
+
+    def _view(self):
+        lower, upper = self.ax.get_xlim()
+        max_points = int(self.points_per_pixel * max(self.ax.bbox.width, 100))
+        return self.pyramid.view(lower, upper, max_points)
+
+    def update(self, ax=None):
+        """Decimate the lines for the current x-limits of the axes."""
+        freq, mag = self._view()
+        for line, _mag in zip(self.lines, mag.T):
+            line.set_data(freq, _mag)
+
+    def remove(self):
+        """Remove the lines from the axes."""
+        self._callbacks.disconnect(self._cid)
+        for line in self.lines:
+            if line.axes is not None:
+                line.remove()
+        self.lines = []
+
+
+class PoleDensity:
+    """
+    Density image of pole categories, a raster alternative to plotting each
+    pole as a marker.
+
+    The poles of each category are counted in a 2-D histogram with about
+    one bin per ``pixels_per_bin`` pixels of the current view; each category
+    is drawn as one image in its color, the opacity increases with the
+    number of poles in the bin. The histograms are computed again when the
+    limits of the axes change (zoom and pan); as for :class:`DecimatedLines`,
+    a reference to the object must be kept.
+    """
+
+    def __init__(self, ax, layers, y_step=None, pixels_per_bin=2):
+        """
+        :param ax: matplotlib axes
+        :param layers: list of ``(x, y, color)`` of the pole categories, in
+            the drawing order
+        :param y_step: if given, the height of the bins (e.g. 1 for the
+            polynomial order), centered on its multiples. Otherwise the
+            height of the bins is based on the height of the axes.
+        :param pixels_per_bin: size of the bins in pixels
+        """
+        self.ax = ax
+        self.layers = [(np.asarray(x, dtype=float), np.asarray(y, dtype=float), to_rgb(color))
+                       for x, y, color in layers]
+        self.y_step = y_step
+        self.pixels_per_bin = pixels_per_bin
+        self.images = []
+        self.update()
+        # ``ax.clear()`` replaces the callback registry
+        self._callbacks = ax.callbacks
+        self._cids = [ax.callbacks.connect(_, self.update) for _ in ['xlim_changed', 'ylim_changed']]
+
+    def _edges(self):
+        x0, x1 = sorted(self.ax.get_xlim())
+        y0, y1 = sorted(self.ax.get_ylim())
+        nx = max(1, int(self.ax.bbox.width / self.pixels_per_bin))
+        x_edges = np.linspace(x0, x1, nx + 1)
+        if self.y_step is None:
+            ny = max(1, int(self.ax.bbox.height / self.pixels_per_bin))
+            y_edges = np.linspace(y0, y1, ny + 1)
+        else:
+            y_edges = (np.arange(np.floor(y0 / self.y_step), np.ceil(y1 / self.y_step) + 1) + 0.5) * self.y_step
+            y_edges = np.concatenate([[y_edges[0] - self.y_step], y_edges])
+        return x_edges, y_edges
+
+    def update(self, ax=None):
+        """Compute the density images for the current limits of the axes."""
+        for image in self.images:
+            image.remove()
+        self.images = []
+
+        x_edges, y_edges = self._edges()
+        extent = [x_edges[0], x_edges[-1], y_edges[0], y_edges[-1]]
+        for x, y, color in self.layers:
+            counts = np.histogram2d(x, y, bins=[x_edges, y_edges])[0].T
+            if not counts.any():
+                continue
+            rgba = np.zeros(counts.shape + (4,))
+            rgba[..., :3] = color
+            rgba[..., 3] = np.where(counts > 0, 0.3 + 0.7 * counts / counts.max(), 0.)
+            # the image is added without autoscaling the axes
+            image = AxesImage(self.ax, origin='lower', interpolation='nearest', extent=extent)
+            image.set_data(rgba)
+            self.ax.add_image(image)
+            self.images.append(image)
+
+    def remove(self):
+        """Remove the images from the axes."""
+        for cid in self._cids:
+            self._callbacks.disconnect(cid)
+        for image in self.images:
+            if image.axes is not None:
+                image.remove()
+        self.images = []
+
+
+def _pole_categories(fn_temp, test_fn, test_xi, xi_temp):
+    """
+    Indices of the poles in the stability matrices, by category. The empty
+    cells of the matrices (zero frequency, the orders have less poles than
+    the matrices have rows) are not poles.
+    """
+    pole = fn_temp > 0
+    return {
+        # stable eigenfrequencues, unstable damping ratios
+        'a': np.argwhere(pole & (test_fn > 0) & ((test_xi == 0) | (xi_temp <= 0))),
+        # stable eigenfrequencies, stable damping ratios
+        'b': np.argwhere(pole & (test_fn > 0) & ((test_xi > 0) & (xi_temp > 0))),
+        # unstable eigenfrequencues, unstable damping ratios
+        'c': np.argwhere(pole & (test_fn == 0) & ((test_xi == 0) | (xi_temp <= 0))),
+        # unstable eigenfrequencues, stable damping ratios
+        'd': np.argwhere(pole & (test_fn == 0) & ((test_xi > 0) & (xi_temp > 0))),
+    }
+
+
+def _plot_poles(ax, fn_temp, categories, y, y_step=None, pole_plot_type='auto'):
+    """
+    Plot the pole categories as markers or, above ``_DENSITY_THRESHOLD``
+    poles (or if ``pole_plot_type`` is 'density'), as a density image.
+
+    :return: ``PoleDensity`` object or None (markers)
+    """
+    n_poles = sum(len(ind) for ind in categories.values())
+    density = pole_plot_type == 'density' or (pole_plot_type == 'auto' and n_poles > _DENSITY_THRESHOLD)
+
+    layers = {}
+    for key in ['a', 'b', 'c', 'd']:
+        fmt, markersize, label = _POLE_STYLES[key]
+        ind = categories[key]
+        if density:
+            # empty lines for the legend
+            ax.plot([], [], fmt, markersize=markersize, label=label)
+            layers[key] = (fn_temp[ind[:, 0], ind[:, 1]], y(ind), fmt[0])
+        else:
+            ax.plot(fn_temp[ind[:, 0], ind[:, 1]], y(ind), fmt, markersize=markersize, label=label)
+    if density:
+        # the stable poles are drawn on top
+        return PoleDensity(ax, [layers[key] for key in ['c', 'd', 'a', 'b']], y_step=y_step)
+
+
+def _cluster_ylim(xi):
+    """Damping limits of the cluster diagram from the damping of the stable poles."""
+    up_lim = min(np.max(xi), np.mean(xi)+2*np.std(xi))
+    return [np.mean(xi)-np.std(xi), up_lim]
+
+
+def render_chart(model, path=None, chart='stability', frf_plot_type='abs', pole_plot_type='auto',
+                 fn_temp=0.001, xi_temp=0.05, legend=True, figsize=(20, 8), dpi=100):
+    """
+    Render the stability chart or the cluster diagram of a model without a
+    GUI (Agg backend), e.g. for reports.
+
+    The measured FRFs are drawn with the reconstruction ``model.H`` (if it
+    exists) and the selected poles (``model.pole_ind``), as in the
+    interactive chart of ``Model.select_poles``.
+
+    Usage:
+    ::
+        >>> a.get_poles()
+        >>> a.select_closest_poles([176, 476, 932])
+        >>> a.get_constants()
+        >>> pyEMA.rendering.render_chart(a, 'stability.png')
+        >>> pyEMA.rendering.render_chart(a, 'cluster.svg', chart='cluster')
+
+    :param model: ``Model`` object with poles (``get_poles``)
+    :param path: path of the image; the format is given by the extension
+        (e.g. ``.png``, ``.svg``, ``.pdf``). If None, the image is not saved.
+    :param chart: 'stability' (polynomial order) or 'cluster' (damping ratio)
+    :param frf_plot_type: 'abs' (average magnitude) or 'all' (all the FRFs)
+    :param pole_plot_type: 'auto', 'markers' or 'density'
+    :param fn_temp: Natural frequency stability crieterion.
+    :param xi_temp: Damping stability criterion.
+    :param legend: wheather to show the legend
+    :param figsize: size of the figure [inch]
+    :param dpi: resolution of the raster images
+    :return: matplotlib ``Figure``
+    """
+    if chart not in ['stability', 'cluster']:
+        raise Exception(f'chart must be "stability" or "cluster" ({chart})')
+    if frf_plot_type not in ['abs', 'all']:
+        raise Exception(f'frf_plot_type must be "abs" or "all" ({frf_plot_type})')
+
+    fig = Figure(figsize=figsize, dpi=dpi)
+    FigureCanvasAgg(fig)
+    ax2 = fig.add_subplot(111)
+    ax1 = ax2.twinx()
+    ax1.grid(True)
+
+    table = model.pole_table
+    pole_ind = np.asarray(getattr(model, 'pole_ind', []), dtype=int).reshape(-1, 2)
+    selected = table.data[table.flat_index(pole_ind)]
+
+    # FRFs (the decimated views are updated until the limits are set)
+    average = frf_plot_type == 'abs'
+    views = [DecimatedLines(ax2, FRFPyramid(model.freq, model.frf, average=average),
+                            alpha=0.7 if average else 0.3, color='k')]
+    H = getattr(model, 'H', None)
+    if H is not None and len(pole_ind) > 0:
+        views.append(DecimatedLines(ax2, FRFPyramid(model.freq, H, average=average),
+                                    color='r', lw=2 if average else 1))
+    ax1.set_xlim([model.lower, model.upper])
+    ax2.relim()
+    ax2.autoscale_view(scalex=False)
+
+    # poles
+    fn, xi, test_fn, test_xi = stabilization._stabilization(table, table.n_orders, err_fn=fn_temp, err_xi=xi_temp)
+    categories = _pole_categories(fn, test_fn, test_xi, xi)
+    if chart == 'stability':
+        views.append(_plot_poles(ax1, fn, categories, lambda ind: 1+ind[:, 1], y_step=1,
+                                 pole_plot_type=pole_plot_type))
+        ax1.plot(selected['freq'], pole_ind[:, 0], 'ko')
+        ax1.set_ylim([0, model.pol_order_high+5])
+        ax1.set_title('Stability chart')
+        ax1.set_ylabel('Polynomial order')
+    else:
+        views.append(_plot_poles(ax1, fn, categories, lambda ind: xi[ind[:, 0], ind[:, 1]],
+                                 pole_plot_type=pole_plot_type))
+        ax1.plot(selected['freq'], selected['xi'], 'ko')
+        b1 = categories['b']
+        b1 = b1[(fn[b1[:, 0], b1[:, 1]] > model.lower) & (fn[b1[:, 0], b1[:, 1]] < model.upper)]
+        if len(b1):
+            ax1.set_ylim(_cluster_ylim(xi[b1[:, 0], b1[:, 1]]))
+        ax1.set_title('Cluster diagram')
+        ax1.set_ylabel('Damping ratio')
+
+    ax1.set_xlabel('$f$ [Hz]')
+    ax2.set_ylabel(r'$|\alpha|$')
+    if legend:
+        ax1.legend(loc='upper center', ncol=2, frameon=True)
+    fig.tight_layout()
+
+    if path is not None:
+        fig.savefig(path)
+    return fig
+
+
+def _render(model, path, kwargs):
+    if isinstance(model, str):
+        from .pyEMA import Model
+        model = Model.load(model)
+    render_chart(model, path, **kwargs)
+    return path
+
+
+def render_batch(models, paths, n_jobs=None, progress=None, **kwargs):
+    """
+    Render the charts of many models in parallel processes (see
+    ``render_chart``).
+
+    Usage:
+    ::
+        >>> paths = [f'report/stability_{i}.png' for i in range(len(models))]
+        >>> pyEMA.rendering.render_batch(models, paths, chart='stability')
+
+    :param models: ``Model`` objects with poles or directories of saved
+        models (``Model.save``), which are loaded memory-mapped by the
+        workers instead of being copied to them
+    :param paths: paths of the images, one for each model
+    :param n_jobs: Number of processes. If None, the number of CPUs is used.
+    :type n_jobs: int
+    :param progress: Progress callback ``progress(stage, done, total)`` that
+        is called after each chart. If it raises an exception, the charts
+        that have not started yet are cancelled.
+    :param kwargs: arguments of ``render_chart``
+    :return: paths of the images
+    """
+    models, paths = list(models), list(paths)
+    if len(models) != len(paths):
+        raise Exception(f'the number of paths ({len(paths)}) does not match the number of models ({len(models)})')
+
+    with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+        futures = [executor.submit(_render, model, path, kwargs) for model, path in zip(models, paths)]
+        try:
+            for future in _track(futures, progress, 'render_batch'):
+                future.result()
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+    return paths
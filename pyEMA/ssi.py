@@ -0,0 +1,254 @@
+import numpy as np
+import scipy.fft
+
+from .pole_table import PoleTable
+from .profiling import _no_stage
+from .progress import _track
+
+
+def correlations(data, n_lags, ref_channels=None, chunk_size=None, progress=None):
+    """
+    Output correlation matrices of output-only (ambient) time records:
+    ::
+        R_i = E[(y(k+i) - mean(y)) @ (y_ref(k) - mean(y_ref)).T],   i = 0 ... n_lags
+
+    The record is read in chunks of samples, so it can be a memory-mapped
+    array of any length. Each chunk is split into segments; the lagged
+    products of a segment are computed with zero-padded FFTs (exact, the
+    correlation does not wrap around) and the cross spectra of all the
+    segments are summed, so that only one inverse FFT is computed at the
+    end. The mean of the channels is removed from the sums afterwards.
+
+    :param data: time records, shape ``(n_channels, n_samples)``
+    :type data: ndarray
+    :param n_lags: highest lag
+    :type n_lags: int
+    :param ref_channels: indices of the reference channels. If None, all
+        the channels are references.
+    :type ref_channels: list, ndarray
+    :param chunk_size: Number of samples that are processed at once. If
+        None, it is chosen so that the temporary arrays take approximately
+        64 MB.
+    :type chunk_size: int
+    :param progress: progress callback ``progress(stage, done, total)``,
+        reported after each chunk, optional
+    :return: unbiased correlations, shape ``(n_lags+1, n_channels, n_refs)``
+    """
+    if data.ndim == 1:
+        data = data[None, :]
+    n_channels, n_samples = data.shape
+    n_lags = int(n_lags)
+    if n_samples <= n_lags:
+        raise Exception(f'the records ({n_samples} samples) are too short for {n_lags} lags')
+    ref = np.arange(n_channels) if ref_channels is None else np.asarray(ref_channels, dtype=int).reshape(-1)
+
+    # each segment of `seg` samples is correlated with `seg + n_lags` samples
+    nfft = scipy.fft.next_fast_len(4*(n_lags+1))
+    seg = nfft - n_lags
+    if chunk_size is None:
+        per_sample = 8 * (n_channels + len(ref)) * (1 + 2*nfft/seg)
+        chunk_size = int(2**26 // per_sample)
+    chunk_size = max(1, -(-int(chunk_size) // seg)) * seg
+
+    spectra = np.zeros((nfft//2 + 1, n_channels, len(ref)), dtype=complex)
+    total = np.zeros(n_channels)
+    for start in _track(range(0, n_samples, chunk_size), progress, 'ssi.correlations'):
+        stop = min(start + chunk_size, n_samples)
+        n_seg = -(-(stop - start) // seg)
+        y = np.zeros((n_channels, n_seg*seg + n_lags))
+        y[:, :min(stop + n_lags, n_samples) - start] = data[:, start:stop + n_lags]
+        total += np.sum(y[:, :stop-start], axis=1)
+
+        head = y[ref, :n_seg*seg].copy()
+        head[:, stop-start:] = 0
+        head = scipy.fft.rfft(head.reshape(len(ref), n_seg, seg), n=nfft, axis=-1)
+        # the `nfft` samples that start at each segment (a strided view)
+        windows = np.lib.stride_tricks.as_strided(y, shape=(n_channels, n_seg, nfft),
+                                                  strides=(y.strides[0], seg*y.strides[1], y.strides[1]),
+                                                  writeable=False)
+        lagged = scipy.fft.rfft(windows, axis=-1)
+        # one matrix product per frequency line, summed over the segments
+        spectra += np.matmul(np.ascontiguousarray(lagged.transpose(2, 0, 1)),
+                             np.ascontiguousarray(np.conj(head).transpose(2, 1, 0)))
+
+    r = scipy.fft.irfft(spectra, n=nfft, axis=0)[:n_lags+1]
+
+    # sum[k=0...N-i-1] (y(k+i) - m) * (y_ref(k) - m_ref)
+    lags = np.arange(n_lags+1)
+    mean = total / n_samples
+    first = np.concatenate([np.zeros((n_channels, 1)), np.cumsum(data[:, :n_lags], axis=1)], axis=1)
+    last = np.concatenate([np.zeros((len(ref), 1)), np.cumsum(data[ref, n_samples-n_lags:][:, ::-1], axis=1)],
+                          axis=1)
+    r -= (total[:, None] - first).T[:, :, None] * mean[ref][None, None, :]
+    r -= mean[None, :, None] * (total[ref][:, None] - last).T[:, None, :]
+    r += (n_samples - lags)[:, None, None] * np.outer(mean, mean[ref])[None]
+    return r / (n_samples - lags)[:, None, None]
+
+
+def _block_toeplitz(r, block_rows):
+    """
+    Block Toeplitz matrix of the correlations:
+    ::
+        [[R_i,      R_i-1,    ...  R_1],
+         [R_i+1,    R_i,      ...  R_2],
+         ...
+         [R_2i-1,   R_2i-2,   ...  R_i]],   i = block_rows
+
+    :param r: correlations, shape ``(n_lags+1, n_channels, n_refs)``, ``n_lags >= 2*block_rows - 1``
+    :param block_rows: number of block rows
+    :return: array of shape ``(block_rows*n_channels, block_rows*n_refs)``
+    """
+    i = block_rows
+    t = r[i + np.arange(i)[:, None] - np.arange(i)[None, :]]
+    return t.transpose(0, 2, 1, 3).reshape(i*r.shape[1], i*r.shape[2])
+
+
+def _randomized_svd(a, rank, n_oversamples=10, n_iter=4, seed=None):
+    """
+    Truncated SVD with a randomized range finder (Halko, Martinsson and
+    Tropp, 2011) and power iterations.
+
+    :param a: matrix
+    :param rank: number of singular values
+    :param n_oversamples: additional random vectors of the range finder
+    :param n_iter: number of power iterations
+    :param seed: seed of the random vectors
+    :return: ``u``, ``s``, ``vt`` of the leading ``rank`` singular values
+    """
+    rng = np.random.default_rng(seed)
+    k = min(rank + n_oversamples, *a.shape)
+    q = np.linalg.qr(a @ rng.standard_normal((a.shape[1], k)))[0]
+    for _ in range(n_iter):
+        q = np.linalg.qr(a.T @ q)[0]
+        q = np.linalg.qr(a @ q)[0]
+    u, s, vt = np.linalg.svd(q.T @ a, full_matrices=False)
+    return (q @ u)[:, :rank], s[:rank], vt[:rank]
+
+
+def _ssi_poles(u, s, n_outputs, orders, sampling_time, n_orders=None, progress=None, stage=_no_stage):
+    """
+    Poles of all the model orders from one truncated SVD of the block
+    Toeplitz matrix.
+
+    The observability matrix of the order ``j`` is ``O_j = U_j @ S_j^1/2``
+    (the leading ``j`` singular vectors). The state matrix is the
+    least-squares solution of the shift equation ``O_j[:-l] @ A = O_j[l:]``
+    (``l`` outputs), its eigenvalues are the discrete-time poles.
+
+    :param u: left singular vectors, shape ``(block_rows*n_outputs, rank)``
+    :param s: singular values
+    :param n_outputs: number of outputs
+    :param orders: model orders (even, at most ``rank``)
+    :param sampling_time: sampling time of the records
+    :param n_orders: number of orders of the returned table (see ``lscf._lscf_poles``)
+    :param progress: progress callback (see ``progress._track``), reported after each order
+    :param stage: stage context factory of the profiler (see ``Timings.stage``)
+    :return: PoleTable
+    """
+    if n_orders is None:
+        n_orders = len(orders)
+    counts = np.zeros(n_orders, dtype=np.int64)
+    counts[np.asarray(orders)//2 - 1] = orders
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    start = offsets[np.asarray(orders)//2 - 1]
+    all_poles = np.empty(offsets[-1], dtype=complex)
+
+    o = u * np.sqrt(s)
+    for k, j in enumerate(_track(orders, progress, 'ssi.poles')):
+        with stage('solve'):
+            a = np.linalg.lstsq(o[:-n_outputs, :j], o[n_outputs:, :j], rcond=None)[0]
+        with stage('roots'):
+            sr = np.linalg.eigvals(a)
+        all_poles[start[k]:start[k]+j] = np.log(sr.astype(complex)) / sampling_time
+
+    return PoleTable(all_poles, offsets)
+
+
+def _block_rows(block_rows, n_max, n_outputs, n_refs):
+    """
+    Check the number of block rows of the Toeplitz matrix for the highest
+    model order ``n_max``. If ``block_rows`` is None, the smallest number
+    that supports ``n_max`` is returned.
+    """
+    if block_rows is None:
+        block_rows = -(-n_max // min(n_outputs, n_refs)) + 1
+    if (block_rows - 1) * n_outputs < n_max or block_rows * n_refs < n_max:
+        raise Exception(f'{block_rows} block rows do not support the model order {n_max}')
+    return block_rows
+
+
+def ssi_cov(data, sampling_rate, pol_order_high, block_rows=None, ref_channels=None, r=None, chunk_size=None,
+            seed=None, progress=None, stage=_no_stage):
+    """
+    Poles of output-only time records by covariance-driven stochastic
+    subspace identification (SSI-cov).
+
+    The block Toeplitz matrix of the output correlations (see
+    ``correlations``) is compressed with a randomized truncated SVD of the
+    rank of the highest model order; the poles of all the orders are
+    computed from this single factorization. The model order ``2*(k+1)``
+    has the order index ``k``, as in ``Model.get_poles``, so the table is
+    used by the stabilization chart and the pole selection unchanged.
+
+    Usage:
+    ::
+        >>> table = pyEMA.ssi.ssi_cov(data, sampling_rate=1024, pol_order_high=30)
+
+    :param data: time records, shape ``(n_channels, n_samples)``. Not
+        used if ``r`` is given.
+    :param sampling_rate: sampling rate of the records [Hz]
+    :param pol_order_high: highest order index (the highest model order is
+        ``2*pol_order_high``)
+    :param block_rows: number of block rows of the Toeplitz matrix. If
+        None, the smallest number that supports the highest model order is
+        used.
+    :param ref_channels: indices of the reference channels (see ``correlations``)
+    :param r: precomputed correlations (see ``correlations``), optional
+    :param chunk_size: number of samples that are processed at once (see ``correlations``)
+    :param seed: seed of the randomized SVD
+    :param progress: progress callback ``progress(stage, done, total)``, optional
+    :param stage: stage context factory of the profiler (see ``Timings.stage``)
+    :return: PoleTable
+    """
+    n_max = 2 * int(pol_order_high)
+    if r is None:
+        n_outputs = 1 if data.ndim == 1 else data.shape[0]
+        n_refs = n_outputs if ref_channels is None else len(ref_channels)
+    else:
+        n_outputs, n_refs = r.shape[1:]
+    block_rows = _block_rows(block_rows, n_max, n_outputs, n_refs)
+
+    if r is None:
+        with stage('correlations'):
+            r = correlations(data, 2*block_rows - 1, ref_channels=ref_channels, chunk_size=chunk_size,
+                             progress=progress)
+    elif len(r) < 2*block_rows:
+        raise Exception(f'{2*block_rows - 1} lags are needed for {block_rows} block rows ({len(r) - 1})')
+
+    with stage('svd'):
+        u, s, vt = _randomized_svd(_block_toeplitz(r, block_rows), n_max, seed=seed)
+    return _ssi_poles(u, s, n_outputs, np.arange(2, n_max+1, 2), 1/sampling_rate, n_orders=int(pol_order_high),
+                      progress=progress, stage=stage)
+
+
+def half_spectra(r, sampling_rate, n_freq=None):
+    """
+    Positive half spectra of the correlations (the transform of the
+    Hann-windowed causal part). They have the modal form of a FRF and are
+    the "FRF" of an output-only model (see ``Model.from_time_data``).
+
+    :param r: correlations, shape ``(n_lags+1, n_channels, n_refs)``
+    :param sampling_rate: sampling rate of the records [Hz]
+    :param n_freq: number of frequency lines from 0 to the Nyquist
+        frequency. If None, ``n_lags+1`` is used.
+    :return: frequency array and the half spectra, shape
+        ``(n_channels*n_refs, n_freq)`` (channel-major rows)
+    """
+    n_lags = len(r) - 1
+    if n_freq is None:
+        n_freq = n_lags + 1
+    window = np.hanning(2*n_lags + 1)[n_lags:]
+    window[0] = 0.5
+    spectra = scipy.fft.rfft(r * window[:, None, None], n=2*(n_freq-1), axis=0)
+    freq = np.fft.rfftfreq(2*(n_freq-1), 1/sampling_rate)
+    return freq, spectra.reshape(n_freq, -1).T
@@ -1,7 +1,8 @@
 import numpy as np
-from tqdm import tqdm
 
 from . import tools
+from .pole_table import PoleTable
+from .progress import _track
 
 def _redundant_values(omega, xi, prec):
     """
@@ -30,17 +31,19 @@ def _redundant_values(omega, xi, prec):
     return omega_mod, xi_mod
 
 
-def _stabilization(sr, nmax, err_fn, err_xi):
+def _stabilization(sr, nmax, err_fn, err_xi, progress=None):
     """
     A function that computes the stabilisation matrices needed for the
     stabilisation chart. The computation is focused on comparison of
     eigenfrequencies and damping ratios in the present step 
     (N-th model order) with the previous step ((N-1)-th model order). 
 
-    :param sr: list of lists of complex natrual frequencies
+    :param sr: list of lists of complex natrual frequencies or a ``PoleTable``
     :param n: maximum number of degrees of freedom
     :param err_fn: relative error in frequency
     :param err_xi: relative error in damping
+    :param progress: progress callback ``progress(stage, done, total)``,
+        reported after each order, optional
 
     :return fn_temap eigenfrequencies matrix
     :return xi_temp: updated damping matrix
@@ -48,14 +51,22 @@ def _stabilization(sr, nmax, err_fn, err_xi):
     :return test_xi: updated damping stabilisation test matrix
     """
 
+    if isinstance(sr, PoleTable):
+        fn_orders, xi_orders = sr.split('freq'), sr.split('xi')
+    else:
+        fn_orders, xi_orders = zip(*[tools.complex_freq_to_freq_and_damp(_) for _ in sr])
+
+    # merged tables (e.g. multi-band) can have more than 2*nmax poles per order
+    n_rows = max([2*nmax] + [len(_) for _ in fn_orders[:nmax]])
+
     # TODO: check this later for optimisation # this doffers by LSCE and LSCF
-    fn_temp = np.zeros((2*nmax, nmax), dtype='double')
-    xi_temp = np.zeros((2*nmax, nmax), dtype='double')
-    test_fn = np.zeros((2*nmax, nmax), dtype='int')
-    test_xi = np.zeros((2*nmax, nmax), dtype='int')
+    fn_temp = np.zeros((n_rows, nmax), dtype='double')
+    xi_temp = np.zeros((n_rows, nmax), dtype='double')
+    test_fn = np.zeros((n_rows, nmax), dtype='int')
+    test_xi = np.zeros((n_rows, nmax), dtype='int')
 
-    for nr, n in enumerate(tqdm(range(nmax), ncols=100)):
-        fn, xi = tools.complex_freq_to_freq_and_damp(sr[nr])
+    for nr, n in enumerate(_track(range(nmax), progress, 'stabilization')):
+        fn, xi = fn_orders[nr], xi_orders[nr]
         # elimination of conjugate values in
         fn, xi = _redundant_values(fn, xi, 1e-3)
         # order to decrease computation time
@@ -78,11 +89,11 @@ def _stabilization(sr, nmax, err_fn, err_xi):
                 xi_test[i, np.abs((xi[i] - xi_temp[:, n-2]) /
                                   xi_temp[:, n-2]) < err_xi] = 1
 
-                fn_temp[i, n - 1] = fn[i]
-                xi_temp[i, n - 1] = xi[i]
+                fn_temp[i, n - 1] = fn[i, 0]
+                xi_temp[i, n - 1] = xi[i, 0]
 
-                test_fn[i, n-1] = np.sum(fn_test[i, :2*n])
-                test_xi[i, n-1] = np.sum(xi_test[i, :2*n])
+                test_fn[i, n-1] = np.sum(fn_test[i])
+                test_xi[i, n-1] = np.sum(xi_test[i])
 
     return fn_temp, xi_temp, test_fn, test_xi
 
@@ -0,0 +1,117 @@
+import os
+import json
+import shutil
+
+import numpy as np
+
+from .pole_table import PoleTable
+
+# Increase when the stored format changes.
+_FORMAT_VERSION = 1
+
+# scalar attributes of the model (stored in ``model.json``)
+_SCALARS = ['lower', 'upper', 'pol_order_high', 'sampling_time', 'get_participation_factors', 'n_inputs',
+            'pole_method']
+
+# array attributes of the model (stored as ``<name>.npy``)
+_ARRAYS = ['freq', 'omega', 'frf', 'pole_ind', 'nat_freq', 'nat_xi', 'poles', 'A', 'LR', 'UR', 'H', 'pole_orders']
+
+# arrays that are memory-mapped when loaded with ``mmap=True``
+_MMAP_ARRAYS = {'frf', 'H', 'pole_table_data'}
+
+
+def _scalar(value):
+    """Python scalar of a numpy scalar (for JSON)."""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def save_model(model, path):
+    """
+    Save the state of a model to the directory ``path`` (see ``Model.save``).
+
+    The arrays are stored as ``.npy`` files and the scalars in
+    ``model.json``. The directory is written under a temporary name and
+    then renamed, so that an existing model at ``path`` is replaced only
+    when the new one is complete.
+
+    :param model: ``Model`` object
+    :param path: directory
+    """
+    path = os.path.normpath(path)
+    tmp_path = path + f'.{os.getpid()}.tmp'
+    os.makedirs(tmp_path)
+    try:
+        arrays = {name: getattr(model, name, None) for name in _ARRAYS}
+        table = getattr(model, 'pole_table', None)
+        if table is not None:
+            arrays['pole_table_data'] = table.data
+            arrays['pole_table_offsets'] = table.offsets
+
+        stored = {}
+        for name, array in arrays.items():
+            if array is None:
+                continue
+            array = np.asarray(array)
+            np.save(os.path.join(tmp_path, name + '.npy'), array)
+            stored[name] = {'shape': list(array.shape), 'dtype': array.dtype.str}
+
+        meta = {
+            'format_version': _FORMAT_VERSION,
+            'dtype': model.dtype.name,
+            'scalars': {name: _scalar(getattr(model, name, None)) for name in _SCALARS},
+            'arrays': stored,
+        }
+        with open(os.path.join(tmp_path, 'model.json'), 'w') as f:
+            json.dump(meta, f, indent=2)
+
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        os.rename(tmp_path, path)
+    except BaseException:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+
+
+def load_model(cls, path, mmap=True):
+    """
+    Load a model saved with ``save_model`` (see ``Model.load``).
+
+    :param cls: ``Model`` class
+    :param path: directory
+    :param mmap: if True, the FRF, the reconstruction and the pole table
+        are memory-mapped (read-only)
+    :return: ``Model`` object
+    """
+    try:
+        with open(os.path.join(path, 'model.json')) as f:
+            meta = json.load(f)
+    except OSError:
+        raise Exception(f'{path} is not a saved model (model.json not found)')
+    if meta.get('format_version', 0) > _FORMAT_VERSION:
+        raise Exception(f'the model was saved in a newer format (version {meta["format_version"]}), '
+                        f'this version of pyEMA reads version {_FORMAT_VERSION}')
+
+    arrays = {}
+    for name in meta['arrays']:
+        mmap_mode = 'r' if mmap and name in _MMAP_ARRAYS else None
+        arrays[name] = np.load(os.path.join(path, name + '.npy'), mmap_mode=mmap_mode)
+
+    model = cls.__new__(cls)
+    model.dtype = np.dtype(meta['dtype'])
+    model.complex_dtype = np.result_type(model.dtype, np.complex64)
+    model._init_state()
+    model.n_inputs = 1
+    model.pole_method = None
+    model.pole_orders = None
+    for name, value in meta['scalars'].items():
+        if value is not None:
+            setattr(model, name, value)
+
+    for name in _ARRAYS:
+        if name in arrays:
+            setattr(model, name, arrays[name])
+    if 'omega' not in arrays and 'freq' in arrays:
+        model.omega = 2 * np.pi * model.freq
+    if 'pole_table_data' in arrays:
+        model.pole_table = PoleTable.from_data(arrays['pole_table_data'], arrays['pole_table_offsets'])
+    return model
@@ -0,0 +1,110 @@
+import numpy as np
+
+
+def modal_poles(nat_freq, nat_xi):
+    """
+    Complex poles from natural frequencies and damping ratios (inverse of
+    ``complex_freq_to_freq_and_damp``).
+
+    :param nat_freq: natural frequencies [Hz]
+    :param nat_xi: damping ratios
+    :return: complex poles (with positive imaginary part)
+    """
+    omega = 2 * np.pi * np.asarray(nat_freq, dtype=float)
+    nat_xi = np.asarray(nat_xi, dtype=float)
+    return -nat_xi*omega + 1j*omega*np.sqrt(1 - nat_xi**2)
+
+
+def frf(freq, poles, A, LR=None, UR=None, noise=0., seed=None, chunk_size=None, out=None, dtype=complex):
+    """
+    Receptance FRF matrix by modal superposition (the model of
+    ``Model.FRF_reconstruct``):
+    ::
+        H(omega) = sum_r [A_r/(j*omega - p_r) + conj(A_r)/(j*omega - conj(p_r))] - LR/omega**2 + UR
+
+    The channels are computed in chunks (one matrix product per chunk), so
+    the size of the FRF matrix is limited only by the output array, which
+    can be a memory-mapped ``.npy`` file.
+
+    Usage:
+    ::
+        >>> freq = np.linspace(0, 5000, 10001)
+        >>> poles = pyEMA.synthetic.modal_poles([300, 820, 1500], [0.01, 0.015, 0.008])
+        >>> A = np.random.default_rng(0).standard_normal((100000, 3))
+        >>> H = pyEMA.synthetic.frf(freq, poles, A, noise=1e-3, seed=0, out='frf.npy')
+
+    :param freq: Frequency array [Hz]
+    :type freq: array
+    :param poles: Complex poles, shape ``(n_modes,)``
+    :type poles: array
+    :param A: Modal constants, shape ``(n_channels, n_modes)`` or ``(n_modes,)``
+        for a single channel
+    :type A: array
+    :param LR: Lower residuals, shape ``(n_channels,)``, optional
+    :param UR: Upper residuals, shape ``(n_channels,)``, optional
+    :param noise: Standard deviation of the added complex Gaussian noise,
+        relative to the RMS value of each noise-free FRF
+    :type noise: float
+    :param seed: Seed of the noise generator. The noise does not depend on
+        ``chunk_size``.
+    :type seed: int
+    :param chunk_size: Number of channels that are computed at once. If
+        None, it is chosen so that the temporary arrays take approximately
+        64 MB.
+    :type chunk_size: int
+    :param out: Output array or path of a ``.npy`` file that is created
+        as a memory-mapped array, optional
+    :type out: ndarray, str
+    :param dtype: Complex data type of the FRF
+    :return: FRF matrix, shape ``(n_channels, n_freq)``
+    """
+    freq = np.asarray(freq, dtype=float)
+    poles = np.asarray(poles, dtype=complex).reshape(-1)
+    A = np.asarray(A, dtype=complex)
+    if A.ndim == 1:
+        A = A[None, :]
+    if A.shape[1] != len(poles):
+        raise Exception(f'number of modal constants ({A.shape[1]}) does not match the number of poles ({len(poles)})')
+    n_channels, n_freq = A.shape[0], len(freq)
+
+    if isinstance(out, str):
+        out = np.lib.format.open_memmap(out, mode='w+', dtype=dtype, shape=(n_channels, n_freq))
+    elif out is None:
+        out = np.empty((n_channels, n_freq), dtype=dtype)
+    elif out.shape != (n_channels, n_freq):
+        raise Exception(f'out must have the shape {(n_channels, n_freq)}')
+
+    if chunk_size is None:
+        chunk_size = max(1, 2**26 // (16 * 4 * n_freq))
+
+    # modal basis of the poles and their conjugates, shared by all the channels
+    jomega = 2j * np.pi * freq[None, :]
+    basis = np.concatenate([1 / (jomega - poles[:, None]), 1 / (jomega - np.conj(poles[:, None]))])
+    if LR is not None:
+        LR = np.asarray(LR, dtype=complex).reshape(-1)
+        with np.errstate(divide='ignore'):
+            lower_basis = -1 / (2*np.pi*freq)**2
+    if UR is not None:
+        UR = np.asarray(UR, dtype=complex).reshape(-1)
+
+    rng = np.random.default_rng(seed) if noise else None
+    for i in range(0, n_channels, chunk_size):
+        _A = A[i:i+chunk_size]
+        h = out[i:i+chunk_size]
+        # one matrix product, written directly to the output when possible
+        if h.dtype == basis.dtype:
+            np.matmul(np.concatenate([_A, np.conj(_A)], axis=1), basis, out=h)
+        else:
+            h[:] = np.concatenate([_A, np.conj(_A)], axis=1) @ basis
+        if LR is not None:
+            h += LR[i:i+chunk_size, None] * lower_basis
+        if UR is not None:
+            h += UR[i:i+chunk_size, None]
+        if noise:
+            rms = np.sqrt(np.mean(np.abs(h[:, np.isfinite(h).all(axis=0)])**2, axis=1, keepdims=True))
+            e = rng.standard_normal((h.shape[0], n_freq, 2))
+            h += noise * rms / np.sqrt(2) * (e[..., 0] + 1j*e[..., 1])
+
+    if isinstance(out, np.memmap):
+        out.flush()
+    return out
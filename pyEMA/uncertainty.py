@@ -0,0 +1,198 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import scipy.stats
+
+from . import tools
+from .lsce import LSCE, _impulse_responses, _lsce_blocks, _lsce_gram, _lsce_poles
+from .lscf import (LSCF, PLSCF, _chunk_size, _lscf_blocks, _lscf_assemble, _lscf_poles, _plscf_blocks,
+                   _plscf_assemble, _plscf_poles)
+from .lsfd import _lsfd_basis, _lsfd_constants
+from .progress import _track
+
+# transformed FRF blocks and LSFD data of the base fit, set in each worker
+# process by `_init_worker`
+_replicate_data = None
+
+
+def _init_worker(data):
+    global _replicate_data
+    _replicate_data = data
+
+
+def _replicate(weights, data=None):
+    """
+    Modal parameters of the selected modes for one weighting of the channels.
+
+    The equations of the estimator that produced the pole table (LSCF,
+    LSCE or poly-reference LSCF) are assembled from the transformed blocks
+    of the base fit (no FFT), the poles of the selected orders are solved
+    and the replicate pole closest to each selected pole is taken. The modal
+    constants are fitted with LSFD on the poles of the replicate.
+
+    :param weights: weights of the channels (e.g. bootstrap multiplicities)
+    :param data: replicate data (see ``channel_resampling``). If None, the
+        data of the worker process is used.
+    :return: natural frequencies, damping ratios, modal constants
+    """
+    if data is None:
+        data = _replicate_data
+
+    if data['method'] == 'lsce':
+        r = weights @ data['r']
+        p = (data['v'] * weights[:, None]).T @ data['v'] - (data['u'] * weights[:, None]).T @ data['u']
+        table = _lsce_poles(_lsce_gram(r, p), data['orders'], data['sampling_time'], n_orders=data['n_orders'])
+    elif data['method'] == 'plscf':
+        m = data['n_inputs']
+        d = [np.zeros(((j+1)*m, (j+1)*m)) for j in data['orders']]
+        t = np.tensordot(weights, data['t'], axes=1)
+        sk = data['sk'] * np.repeat(np.sqrt(weights), m).astype(data['sk'].dtype)[:, None]
+        _plscf_assemble(sk, data['n'], m, data['orders'], data['linv'], d)
+        table = _plscf_poles(d, t, data['orders'], m, data['sampling_time'], n_orders=data['n_orders'])
+    else:
+        d = [np.zeros((j+1, j+1)) for j in data['orders']]
+        t = weights @ data['t']
+        sk = data['sk'] * np.sqrt(weights).astype(data['sk'].dtype)[:, None]
+        _lscf_assemble(sk, data['n'], data['orders'], data['linv'], d)
+        table = _lscf_poles(d, t, data['orders'], data['sampling_time'], n_orders=data['n_orders'])
+
+    poles = np.empty(len(data['poles']), dtype=complex)
+    for m, (k, p0) in enumerate(zip(data['order_ind'], data['poles'])):
+        candidates = table.pole[table.offsets[k]:table.offsets[k+1]]
+        poles[m] = candidates[np.argmin(np.abs(candidates - p0))]
+
+    AT = np.linalg.pinv(_lsfd_basis(data['omega'].copy(), poles))
+    A = _lsfd_constants(AT @ data['frf'], len(poles))[0]
+
+    nat_freq, nat_xi = tools.complex_freq_to_freq_and_damp(poles)
+    return nat_freq, nat_xi, A
+
+
+def _replicate_weights(n_channels, method, n_replicates, rng):
+    """Channel weights of the replicates (bootstrap multiplicities or leave-one-out)."""
+    if method == 'bootstrap':
+        return rng.multinomial(n_channels, np.full(n_channels, 1/n_channels), size=n_replicates).astype(float)
+    elif method == 'jackknife':
+        return 1 - np.eye(n_channels)
+    raise Exception(f'method must be "bootstrap" or "jackknife" ({method})')
+
+
+def _intervals(estimate, replicates, method, confidence):
+    """
+    Standard deviation and confidence interval of an estimate from its
+    replicates (along the first axis): percentile intervals for the
+    bootstrap, normal intervals with the jackknife standard error for the
+    jackknife.
+    """
+    if method == 'bootstrap':
+        std = np.std(replicates, axis=0, ddof=1)
+        alpha = (1 - confidence) / 2
+        lower, upper = np.quantile(replicates, [alpha, 1-alpha], axis=0)
+    else:
+        n = len(replicates)
+        std = np.sqrt((n-1)/n * np.sum((replicates - np.mean(replicates, axis=0))**2, axis=0))
+        z = scipy.stats.norm.ppf((1 + confidence) / 2)
+        lower, upper = estimate - z*std, estimate + z*std
+    return {'std': std, 'lower': lower, 'upper': upper}
+
+
+def channel_resampling(model, method='bootstrap', n_replicates=200, confidence=0.95, n_jobs=None,
+                       seed=None, chunk_size=None, progress=None):
+    """
+    Uncertainty of the selected modes by resampling the channels (FRF rows)
+    of the model (see ``Model.get_uncertainty``). With the poly-reference
+    LSCF method the channels are the outputs (all the inputs of an output
+    are resampled together).
+
+    :return: dict with the keys 'nat_freq', 'nat_xi' and 'A'
+    """
+    pole_ind = np.asarray(model.pole_ind, dtype=int).reshape(-1, 2)
+    if len(pole_ind) == 0:
+        raise Exception('no poles are selected')
+    pole_method = getattr(model, 'pole_method', None)
+    if pole_method is None:
+        raise Exception('the method of the pole table is unknown, compute the poles with get_poles')
+    if pole_method not in ('lscf', 'lsce', 'plscf'):
+        raise Exception(f'the uncertainty of poles computed with the "{pole_method}" method is not supported '
+                        f'(only "lscf", "lsce" and "plscf")')
+    n_inputs = model.n_inputs if pole_method == 'plscf' else 1
+    n_channels = model.frf.shape[0] // n_inputs
+    if n_channels < 2:
+        raise Exception('at least 2 channels are needed to resample the channels')
+
+    # the base fit: the orders of the selected poles only. The LSCE
+    # equations also depend on the highest order of the pole table (the
+    # length of the Hankel matrix).
+    order_ind = np.unique(pole_ind[:, 0])
+    kwargs = {'sampling_time': model.sampling_time, 'dtype': model.dtype}
+    if pole_method == 'lsce':
+        table_orders = getattr(model, 'pole_orders', None)
+        top = model.pol_order_high - 1 if table_orders is None else np.max(table_orders)
+        estimator = LSCE(model.freq, model.lower, model.pol_order_high, orders=np.union1d(order_ind, top), **kwargs)
+    elif pole_method == 'plscf':
+        estimator = PLSCF(model.freq, model.lower, model.pol_order_high, orders=order_ind, n_inputs=n_inputs,
+                          **kwargs)
+    else:
+        estimator = LSCF(model.freq, model.lower, model.pol_order_high, orders=order_ind, **kwargs)
+    if chunk_size is None:
+        chunk_size = _chunk_size(model.frf.shape[1], estimator.n)
+    chunk_size = max(1, chunk_size // n_inputs)
+
+    channels = model.frf.reshape(n_channels, n_inputs, -1) if pole_method == 'plscf' else model.frf
+    blocks = []
+    for i in _track(range(0, n_channels, chunk_size), progress, f'{pole_method}.add'):
+        chunk = np.asarray(channels[i:i+chunk_size], dtype=estimator.complex_dtype)
+        if pole_method == 'lsce':
+            blocks.append(_lsce_blocks(_impulse_responses(chunk, estimator.lower_ind, estimator.nf), estimator.n))
+        elif pole_method == 'plscf':
+            blocks.append(_plscf_blocks(chunk, estimator.lower_ind, estimator.n))
+        else:
+            blocks.append(_lscf_blocks(chunk, estimator.lower_ind, estimator.n))
+    blocks = [np.concatenate(_) for _ in zip(*blocks)]
+
+    base_weights = np.ones(n_channels) if model._lscf_weights is None else model._lscf_weights
+    lower_ind = np.argmin(np.abs(model.freq - model.lower))
+    upper_ind = np.argmin(np.abs(model.freq - model.upper))
+    frf = model.frf[:, lower_ind:upper_ind]
+    table = model.pole_table
+    data = {
+        'method': pole_method, 'n': estimator.n, 'orders': 2 * (order_ind + 1),
+        'sampling_time': estimator.sampling_time, 'n_orders': estimator.pol_order_high,
+        'order_ind': pole_ind[:, 0], 'poles': table.pole[table.flat_index(pole_ind)],
+        'omega': 2 * np.pi * model.freq[lower_ind:upper_ind],
+        'frf': np.concatenate([np.real(frf.T), np.imag(frf.T)]),
+    }
+    if pole_method == 'lsce':
+        data['r'], data['u'], data['v'] = blocks
+    else:
+        data['t'], data['sk'] = blocks
+        data['linv'] = estimator.linv
+        data['n_inputs'] = n_inputs
+
+    nat_freq, nat_xi, A = _replicate(base_weights, data)
+
+    rng = np.random.default_rng(seed)
+    weights = _replicate_weights(n_channels, method, n_replicates, rng) * base_weights
+    f_rep = np.empty((len(weights), len(nat_freq)))
+    xi_rep = np.empty((len(weights), len(nat_freq)))
+    A_rep = np.empty((len(weights),) + A.shape, dtype=complex)
+    with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker, initargs=(data,)) as executor:
+        futures = [executor.submit(_replicate, w) for w in weights]
+        try:
+            for i, future in enumerate(_track(futures, progress, 'get_uncertainty')):
+                f_rep[i], xi_rep[i], A_rep[i] = future.result()
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+
+    A_real = _intervals(A.real, A_rep.real, method, confidence)
+    A_imag = _intervals(A.imag, A_rep.imag, method, confidence)
+    return {
+        'nat_freq': dict(_intervals(nat_freq, f_rep, method, confidence), estimate=nat_freq),
+        'nat_xi': dict(_intervals(nat_xi, xi_rep, method, confidence), estimate=nat_xi),
+        'A': {'std': np.sqrt(A_real['std']**2 + A_imag['std']**2),
+              'lower': A_real['lower'] + 1j*A_imag['lower'],
+              'upper': A_real['upper'] + 1j*A_imag['upper'],
+              'estimate': A},
+    }
@@ -0,0 +1,28 @@
+"""Shared FRF generators of the tests (imported by the test modules)."""
+import numpy as np
+import sys, os
+my_path = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, my_path + '/../')
+
+import pyEMA
+
+
+def synthetic_frf(n_locations=4, n_freq=1001, f_max=2000., fn=(250., 700., 1300.)):
+    """Noise-free FRF of 3 modes, returns the frequency array and the FRF."""
+    freq = np.linspace(0, f_max, n_freq)
+    poles = pyEMA.synthetic.modal_poles(fn, [0.01, 0.02, 0.015])
+    A = np.random.default_rng(0).standard_normal((n_locations, len(fn))) * 1e3
+    return freq, pyEMA.synthetic.frf(freq, poles, A)
+
+
+class FRFObject:
+    """Minimal stand-in for a pyFRF object."""
+    def __init__(self, frf, freq):
+        self.frf = frf
+        self.freq = freq
+
+    def get_f_axis(self):
+        return self.freq
+
+    def get_FRF(self, form='receptance'):
+        return self.frf
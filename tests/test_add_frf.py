@@ -0,0 +1,65 @@
+import pytest
+import numpy as np
+import sys, os
+my_path = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, my_path + '/../')
+sys.path.insert(0, my_path)
+
+import pyEMA
+
+from helpers import synthetic_frf, FRFObject
+
+
+freq, frf = synthetic_frf()
+
+
+def test_add_frf():
+    m = pyEMA.Model(pyfrf=True, lower=50, upper=1800, pol_order_high=20)
+    m.add_frf(FRFObject(frf[0], freq))
+    m.add_frfs(FRFObject(_, freq) for _ in frf[1:])
+    for _ in frf:
+        m.add_frf(FRFObject(_, freq))
+
+    assert m.frf.shape == (2*frf.shape[0], frf.shape[1]-1)
+    assert np.array_equal(m.frf[:4], frf[:, 1:])
+    assert np.array_equal(m.frf[4:], frf[:, 1:])
+    assert np.array_equal(m.freq, freq[1:])
+
+    with pytest.raises(Exception):
+        m.add_frf(FRFObject(frf[0, :-1], freq))
+
+
+def test_add_frf_to_model():
+    m = pyEMA.Model(frf=frf[:2], freq=freq, lower=50, upper=1800, pol_order_high=20)
+    n_freq = m.frf.shape[1]
+    m.add_frf(FRFObject(frf[2], freq))
+    m.add_frfs(FRFObject(_, freq) for _ in frf[3:])
+
+    # the FRF of the model is kept, the lines of the model are appended
+    assert m.frf.shape == (4, n_freq)
+    assert np.array_equal(m.frf, frf[:, :n_freq])
+    assert np.array_equal(m.freq, freq[:n_freq])
+
+    # the frequency axis does not contain the lines of the model
+    m = pyEMA.Model(frf=frf[:2], freq=freq, lower=50, upper=1800, pol_order_high=20)
+    obj = FRFObject(frf[2], freq)
+    obj.get_f_axis = lambda: freq + 0.5
+    with pytest.raises(Exception):
+        m.add_frf(obj)
+    assert m.frf.shape == (2, n_freq)
+
+
+def test_add_frf_after_replacing_frf():
+    m = pyEMA.Model(pyfrf=True, lower=50, upper=1800, pol_order_high=20)
+    m.add_frfs(FRFObject(_, freq) for _ in frf[:3])
+    m.get_poles(show_progress=False)
+
+    # the replaced FRF is kept and the estimator is rebuilt
+    m.frf = frf[3:, 1:].copy()
+    m.add_frf(FRFObject(frf[0], freq))
+    assert np.array_equal(m.frf, np.concatenate([frf[3:, 1:], frf[:1, 1:]]))
+    m.get_poles(show_progress=False)
+    ref = pyEMA.Model(pyfrf=True, lower=50, upper=1800, pol_order_high=20)
+    ref.add_frfs(FRFObject(_, freq) for _ in frf[[3, 0]])
+    ref.get_poles(show_progress=False)
+    assert np.allclose(m.pole_table.pole, ref.pole_table.pole)
@@ -0,0 +1,34 @@
+import pytest
+import numpy as np
+import sys, os
+my_path = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, my_path + '/../')
+sys.path.insert(0, my_path)
+
+import pyEMA
+
+from helpers import synthetic_frf
+
+
+freq, frf = synthetic_frf()
+nat_freq = [250, 700, 1300]
+
+
+def test_identify_batch():
+    frfs = np.stack([frf, 2*frf, frf[::-1]])
+    f, x, A = pyEMA.batch.identify_batch(frfs, freq, nat_freq, lower=50, upper=1800,
+                                         pol_order_high=20, n_jobs=2)
+    assert f.shape == (3, 3)
+    assert x.shape == (3, 3)
+    assert A.shape == (3, 4, 3)
+
+    m = pyEMA.Model(frf=frf, freq=freq, lower=50, upper=1800, pol_order_high=20)
+    m.get_poles(show_progress=False)
+    m.select_closest_poles(nat_freq)
+    A_0 = m.get_constants(FRF_ind=None)
+
+    assert np.allclose(f[0], m.nat_freq)
+    assert np.allclose(x[0], m.nat_xi)
+    assert np.allclose(A[0], A_0)
+    assert np.allclose(A[1], 2*A_0)
+    assert np.allclose(f[2], m.nat_freq)
@@ -0,0 +1,36 @@
+import pytest
+import numpy as np
+import sys, os
+my_path = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, my_path + '/../')
+sys.path.insert(0, my_path)
+
+import pyEMA
+
+from helpers import synthetic_frf
+
+
+freq, frf = synthetic_frf()
+
+
+def test_cache_hit(tmp_path):
+    m = pyEMA.Model(frf=frf, freq=freq, lower=50, upper=1800, pol_order_high=20)
+    m.get_poles(show_progress=False, cache=str(tmp_path))
+    assert len(os.listdir(tmp_path)) == 1
+
+    m2 = pyEMA.Model(frf=frf, freq=freq, lower=50, upper=1800, pol_order_high=20)
+    m2.get_poles(show_progress=False, cache=str(tmp_path))
+    assert len(os.listdir(tmp_path)) == 1
+    assert np.array_equal(m.pole_table.data, m2.pole_table.data)
+    assert np.array_equal(m.pole_table.offsets, m2.pole_table.offsets)
+
+    m3 = pyEMA.Model(frf=frf, freq=freq, lower=60, upper=1800, pol_order_high=20)
+    m3.get_poles(show_progress=False, cache=str(tmp_path))
+    assert len(os.listdir(tmp_path)) == 2
+
+
+def test_cache_eviction(tmp_path):
+    cache = pyEMA.PoleCache(str(tmp_path), max_size=1)
+    m = pyEMA.Model(frf=frf, freq=freq, lower=50, upper=1800, pol_order_high=10)
+    m.get_poles(show_progress=False, cache=cache)
+    assert len(os.listdir(tmp_path)) == 0
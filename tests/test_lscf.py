@@ -0,0 +1,163 @@
+import pytest
+import numpy as np
+import sys, os
+my_path = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, my_path + '/../')
+sys.path.insert(0, my_path)
+
+import pyEMA
+
+from helpers import synthetic_frf, FRFObject
+
+
+freq, frf = synthetic_frf()
+nat_freq = [250, 700, 1300]
+
+
+def test_chunked_and_memmap(tmp_path):
+    m = pyEMA.Model(frf=frf, freq=freq, lower=50, upper=1800, pol_order_high=20)
+    m.get_poles(show_progress=False)
+    m.select_closest_poles(nat_freq)
+
+    path = str(tmp_path / 'frf.npy')
+    np.save(path, frf)
+    m2 = pyEMA.Model(frf=path, freq=freq, lower=50, upper=1800, pol_order_high=20)
+    assert isinstance(m2.frf.base, np.memmap)
+    m2.get_poles(show_progress=False, chunk_size=1)
+    m2.select_closest_poles(nat_freq)
+
+    assert np.allclose(m.all_poles[5], m2.all_poles[5])
+    assert np.allclose(m.nat_freq, m2.nat_freq)
+    assert np.allclose(m.nat_xi, m2.nat_xi)
+
+
+def test_incremental_add_frf():
+    m = pyEMA.Model(pyfrf=True, lower=50, upper=1800, pol_order_high=20)
+    m.add_frfs(FRFObject(_, freq) for _ in frf[:2])
+    m.get_poles(show_progress=False)
+    lscf = m.lscf
+
+    m.add_frfs(FRFObject(_, freq) for _ in frf[2:])
+    assert m.lscf.n_rows == frf.shape[0]
+    m.get_poles(show_progress=False)
+    assert m.lscf is lscf
+
+    est = pyEMA.LSCF(freq[1:], lower=50, pol_order_high=20)
+    est.add(frf[:, 1:])
+    # high orders of the noise-free data are ill-conditioned
+    assert np.allclose(m.all_poles[2], est.poles().split('pole')[2])
+
+
+def test_lscf_estimator():
+    m = pyEMA.Model(frf=frf, freq=freq, lower=50, upper=1800, pol_order_high=20)
+    m.get_poles(show_progress=False)
+
+    est = pyEMA.LSCF(m.freq, lower=50, pol_order_high=20)
+    for row in m.frf:
+        est.add(row)
+    assert np.allclose(est.poles().split('pole')[2], m.all_poles[2])
+
+
+def test_multiband():
+    m = pyEMA.Model(frf=frf, freq=freq, lower=50, upper=1800, pol_order_high=20)
+    m.get_poles_multiband(n_bands=3, pol_order_high=12, n_jobs=2)
+
+    table = m.pole_table
+    assert table.n_orders == 12
+    assert np.all((table.freq >= 50) & (table.freq <= 1800))
+
+    m.select_closest_poles(nat_freq)
+    assert np.allclose(m.nat_freq, nat_freq, rtol=1e-3)
+
+
+@pytest.mark.parametrize('low_lim', [25, 990])
+def test_irfft_adjusted_lower_limit(low_lim):
+    # the FFT path (25) and the direct evaluation of the lags (990)
+    nf = 2 * (frf.shape[1] - 1)
+    indices = np.arange(-20, 21)
+    for x in [frf, np.abs(frf)**2]:
+        ref = (np.fft.irfft(x, n=nf)[:, indices] - np.fft.irfft(x[:, :low_lim], n=nf)[:, indices]) * nf
+        assert np.allclose(pyEMA.lscf._irfft_adjusted_lower_limit(x, low_lim, indices), ref)
+
+
+def test_channel_weights():
+    m = pyEMA.Model(frf=frf, freq=freq, lower=50, upper=1800, pol_order_high=10)
+    m.get_poles(show_progress=False, weights=[2, 1, 0, 1])
+
+    # a weight of 2 is the same as a duplicated row, 0 removes the row
+    est = pyEMA.LSCF(m.freq, 50, 10)
+    est.add(m.frf[[0, 0, 1, 3]])
+    assert np.allclose(m.lscf.t, est.t)
+    assert all(np.allclose(_a, _b) for _a, _b in zip(m.lscf.d, est.d))
+    assert np.allclose(m.pole_table.split('pole')[2], est.poles().split('pole')[2])
+
+
+def test_lsce():
+    m = pyEMA.Model(frf=frf, freq=freq, lower=50, upper=1800, pol_order_high=20)
+    m.get_poles(method='lsce', show_progress=False)
+    assert isinstance(m.lscf, pyEMA.LSCE)
+    assert np.array_equal(m.pole_table.counts, np.arange(2, 41, 2))
+    m.select_closest_poles(nat_freq)
+    assert np.allclose(m.nat_freq, nat_freq, rtol=1e-4)
+    assert np.allclose(m.nat_xi, [0.01, 0.02, 0.015], rtol=1e-3)
+
+    # the Gram matrix is the one of the (not formed) block Hankel matrix
+    from pyEMA.lsce import _impulse_responses, _lsce_gram
+    h = _impulse_responses(m.frf, m.lscf.lower_ind, m.lscf.nf)
+    hankel = np.concatenate([np.lib.stride_tricks.sliding_window_view(_, 41)[:m.lscf.nf-40] for _ in h])
+    assert np.allclose(_lsce_gram(m.lscf.r, m.lscf.p), hankel.T @ hankel)
+
+    # incremental and weighted rows
+    est = pyEMA.LSCE(m.freq, lower=50, pol_order_high=20)
+    est.add(m.frf[:2], weights=[2, 2])
+    est.add(m.frf[2:], weights=[2, 2], chunk_size=1)
+    assert np.allclose(est.poles().split('pole')[5], m.all_poles[5])
+
+
+def test_plscf():
+    # single input: the single-reference LSCF
+    poles = pyEMA.synthetic.modal_poles(nat_freq, [0.01, 0.02, 0.015])
+    A = np.random.default_rng(0).standard_normal((4, 3)) * 1e3
+    H = pyEMA.synthetic.frf(freq, poles, A, noise=1e-2, seed=0)
+    est = pyEMA.LSCF(freq, lower=50, pol_order_high=20)
+    est.add(H)
+    p_est = pyEMA.PLSCF(freq, lower=50, pol_order_high=20, n_inputs=1)
+    p_est.add(H[:, None, :], chunk_size=1)
+    assert all(np.allclose(np.sort_complex(a), np.sort_complex(b))
+               for a, b in zip(est.poles().split('pole'), p_est.poles().split('pole')))
+
+    # three inputs, two close modes
+    fn = [250, 255, 700, 1300]
+    poles = pyEMA.synthetic.modal_poles(fn, [0.01, 0.01, 0.02, 0.015])
+    rng = np.random.default_rng(1)
+    phi, L = rng.standard_normal((10, 4)), rng.standard_normal((3, 4))
+    A = (phi[:, None, :] * L[None, :, :]).reshape(30, 4) * 1e3
+    H = pyEMA.synthetic.frf(freq, poles, A, noise=1e-3, seed=0).reshape(10, 3, -1)
+
+    m = pyEMA.Model(frf=H, freq=freq, lower=50, upper=1800, pol_order_high=10, get_partfactors=True)
+    assert m.n_inputs == 3 and m.frf.shape[0] == 30
+    m.get_poles(method='plscf', show_progress=False)
+    assert np.array_equal(m.pole_table.counts, 3 * np.arange(2, 21, 2))
+    m.select_closest_poles(fn, f_window=4)
+    assert np.allclose(m.nat_freq, fn, rtol=1e-3)
+
+    # the participation factors are the input vectors of the modes
+    partfactors = m.pole_table.partfactor[m.pole_table.flat_index(m.pole_ind)]
+    assert partfactors.shape == (4, 3)
+    mac = np.abs(np.sum(np.conj(partfactors) * L.T, axis=1))**2 \
+        / np.sum(np.abs(partfactors)**2, axis=1) / np.sum(L**2, axis=0)
+    assert np.all(mac > 0.999)
+
+
+def test_replaced_frf():
+    m = pyEMA.Model(frf=frf, freq=freq, lower=50, upper=1800, pol_order_high=20)
+    m.get_poles(show_progress=False)
+    m.select_closest_poles(nat_freq)
+    assert np.allclose(m.nat_freq, nat_freq, rtol=1e-4)
+
+    # a FRF of the same shape with other modes
+    _, frf2 = synthetic_frf(fn=(300., 800., 1500.))
+    m.frf = frf2[:, :m.frf.shape[1]]
+    m.get_poles(show_progress=False)
+    m.select_closest_poles([300, 800, 1500])
+    assert np.allclose(m.nat_freq, [300, 800, 1500], rtol=1e-4)
@@ -0,0 +1,55 @@
+import pytest
+import numpy as np
+import sys, os
+my_path = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, my_path + '/../')
+sys.path.insert(0, my_path)
+
+import pyEMA
+
+from helpers import synthetic_frf
+
+
+freq, frf = synthetic_frf()
+
+
+def test_pole_table_views():
+    m = pyEMA.Model(frf=frf, freq=freq, lower=50, upper=1800, pol_order_high=20)
+    m.get_poles(show_progress=False)
+
+    table = m.pole_table
+    assert table.n_orders == 20
+    assert np.array_equal(table.counts, np.arange(2, 41, 2))
+    assert len(m.all_poles) == 20
+    assert np.shares_memory(m.all_poles[5], table.data)
+
+    f, x = pyEMA.complex_freq_to_freq_and_damp(m.all_poles[7])
+    assert np.allclose(m.pole_freq[7], f)
+    assert np.allclose(m.pole_xi[7], x)
+
+
+def test_pole_table_index():
+    m = pyEMA.Model(frf=frf, freq=freq, lower=50, upper=1800, pol_order_high=20)
+    m.get_poles(show_progress=False)
+    table = m.pole_table
+
+    pole_ind = np.array([[0, 1], [4, 3], [19, 39]])
+    rows = table.flat_index(pole_ind)
+    assert np.array_equal(table.pole_index(rows), pole_ind)
+    assert table.pole[rows[1]] == m.all_poles[4][3]
+
+
+def test_pole_table_filtering():
+    m = pyEMA.Model(frf=frf, freq=freq, lower=50, upper=1800, pol_order_high=20)
+    m.get_poles(show_progress=False, physical_only=True, in_band_only=True)
+    table = m.pole_table
+
+    assert table.n_orders == 20
+    assert len(table) < np.sum(np.arange(2, 41, 2)) / 2
+    assert np.all((table.freq >= 50) & (table.freq <= 1800) & (table.xi > 0))
+
+    m.select_closest_poles([250, 700, 1300])
+    assert np.allclose(m.nat_freq, [250, 700, 1300], rtol=1e-3)
+
+    rows = np.flatnonzero(table.mask(f_min=600, f_max=800, orders=slice(10, None)))
+    assert np.all(table.order[rows] >= 10)
@@ -0,0 +1,44 @@
+import pytest
+import numpy as np
+import sys, os
+my_path = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, my_path + '/../')
+sys.path.insert(0, my_path)
+
+import pyEMA
+from helpers import synthetic_frf
+
+
+def test_profile_stages():
+    freq, frf = synthetic_frf()
+    m = pyEMA.Model(frf=frf, freq=freq, lower=50, upper=1800, pol_order_high=20)
+
+    with m.profile(memory=True):
+        m.get_poles(show_progress=False)
+        m.select_closest_poles([250, 700, 1300])
+        m.get_constants(FRF_ind=None)
+
+    report = m.timings.report()
+    for stage in ['get_poles', 'get_poles/fft', 'get_poles/solve', 'get_poles/roots',
+                  'select_closest_poles/stabilization', 'get_constants/pinv']:
+        assert report[stage]['calls'] > 0 and report[stage]['time'] >= 0
+    assert report['get_poles/roots']['calls'] == 20
+    assert report['get_poles']['peak_memory'] >= report['get_poles/fft']['peak_memory'] > 0
+
+    # nothing is recorded outside of the context
+    m.get_constants(FRF_ind=None)
+    assert m.timings.report()['get_constants']['calls'] == 1
+
+
+def test_profile_without_reset_peak(monkeypatch):
+    # tracemalloc.reset_peak is not available before Python 3.9
+    monkeypatch.setattr(pyEMA.profiling, '_RESET_PEAK', False)
+    freq, frf = synthetic_frf()
+    m = pyEMA.Model(frf=frf, freq=freq, lower=50, upper=1800, pol_order_high=20)
+
+    with m.profile(memory=True):
+        m.get_poles(show_progress=False)
+
+    report = m.timings.report()
+    assert report['get_poles']['peak_memory'] >= report['get_poles/fft']['peak_memory'] >= 0
+    assert report['get_poles']['peak_memory'] > 0
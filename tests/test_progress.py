@@ -0,0 +1,68 @@
+import pytest
+import asyncio
+import threading
+import numpy as np
+import sys, os
+my_path = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, my_path + '/../')
+sys.path.insert(0, my_path)
+
+import pyEMA
+from helpers import synthetic_frf
+
+
+freq, frf = synthetic_frf()
+
+
+def test_progress_callback():
+    m = pyEMA.Model(frf=frf, freq=freq, lower=50, upper=1800, pol_order_high=20)
+    reports = []
+    m.get_poles(progress=lambda stage, done, total: reports.append((stage, done, total)))
+    m.select_closest_poles([250, 700, 1300], progress=lambda *args: reports.append(args))
+
+    stages = [_[0] for _ in reports]
+    assert ('lscf.poles', 20, 20) in reports
+    assert stages.count('lscf.poles') == 21
+    assert ('stabilization', 20, 20) in reports
+    assert ('select_closest_poles', 3, 3) in reports
+
+
+def test_cancel():
+    m = pyEMA.Model(frf=frf, freq=freq, lower=50, upper=1800, pol_order_high=20)
+
+    def stop_at_order_5(stage, done, total):
+        if stage == 'lscf.poles' and done == 5:
+            token.cancel()
+    token = pyEMA.CancelToken(stop_at_order_5)
+    with pytest.raises(pyEMA.Cancelled):
+        m.get_poles(progress=token)
+    assert not hasattr(m, 'pole_table')
+
+    # the normal equations are kept, the next call only solves them
+    m.get_poles(show_progress=False)
+    assert m.pole_table.n_orders == 20
+
+
+def test_run_async():
+    m = pyEMA.Model(frf=frf, freq=freq, lower=50, upper=1800, pol_order_high=20)
+    started = threading.Event()
+    stopped = []
+
+    def slow(stage, done, total):
+        started.set()
+        stopped.append(done)
+        threading.Event().wait(0.01)
+
+    async def main():
+        await pyEMA.run_async(m.get_poles, show_progress=False)
+        assert m.pole_table.n_orders == 20
+
+        task = asyncio.create_task(pyEMA.run_async(m.select_closest_poles, [250, 700, 1300], progress=slow))
+        while not started.is_set():
+            await asyncio.sleep(0.001)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    assert len(stopped) < 20
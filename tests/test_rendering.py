@@ -0,0 +1,90 @@
+import pytest
+import numpy as np
+import sys, os
+my_path = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, my_path + '/../')
+sys.path.insert(0, my_path)
+
+import pyEMA
+
+from helpers import synthetic_frf
+
+
+def test_frf_pyramid():
+    freq = np.linspace(1, 5000, 20001)
+    poles = pyEMA.synthetic.modal_poles([250, 700, 1300], [0.01, 0.02, 0.01])
+    A = np.random.default_rng(0).standard_normal((20, 3))
+    H = pyEMA.synthetic.frf(freq, poles, A)
+    mag = np.abs(H)
+
+    pyramid = pyEMA.rendering.FRFPyramid(freq, H)
+
+    # enough points: the samples are returned
+    f, m = pyramid.view(100, 200, max_points=1000)
+    assert np.allclose(m, mag[:, (freq >= f[0]) & (freq <= f[-1])].T)
+    assert f[0] < 100 and f[-1] > 200
+
+    # decimated: the number of points is limited, the extremes are preserved
+    f, m = pyramid.view(0, 5000, max_points=1000)
+    assert len(f) <= 1000 and m.shape == (len(f), 20)
+    assert np.allclose(m.max(axis=0), mag.max(axis=1))
+    assert np.allclose(m.min(axis=0), mag.min(axis=1))
+
+    average = pyEMA.rendering.FRFPyramid(freq, H, average=True)
+    f, m = average.view(0, 5000, max_points=10**6)
+    assert np.allclose(m[:, 0], np.average(mag, axis=0))
+
+
+def test_pole_density():
+    from matplotlib.figure import Figure
+
+    rng = np.random.default_rng(0)
+    x = rng.uniform(0, 1000, 100000)
+    y = rng.integers(1, 50, 100000)
+
+    ax = Figure(figsize=(8, 4)).add_subplot(111)
+    ax.set_xlim(0, 1000)
+    ax.set_ylim(0, 50)
+    density = pyEMA.rendering.PoleDensity(ax, [(x, y, 'g'), (x[:10], y[:10], 'r')], y_step=1)
+    assert len(density.images) == 2 and ax.get_xlim() == (0, 1000)
+    # one bin per polynomial order, the poles are opaque where the density is highest
+    rgba = density.images[0].get_array()
+    assert rgba.shape[0] == 51 and np.isclose(rgba[..., 3].max(), 1)
+    assert np.all(rgba[1:50, :, 3].max(axis=1) > 0) and np.all(rgba[[0, 50], :, 3] == 0)
+
+    # zooming computes the histograms for the new view
+    ax.set_xlim(100, 200)
+    assert density.images[0].get_extent()[:2] == [100, 200]
+    density.remove()
+    assert len(ax.images) == 0
+
+
+def test_pole_categories():
+    # the empty cells of the stability matrices are not counted as poles
+    freq, frf = synthetic_frf()
+    m = pyEMA.Model(frf=frf, freq=freq, lower=10, upper=1990, pol_order_high=20)
+    m.get_poles(show_progress=False)
+    fn, xi, test_fn, test_xi = pyEMA.stabilization._stabilization(m.pole_table, m.pole_table.n_orders, 0.01, 0.05)
+    categories = pyEMA.rendering._pole_categories(fn, test_fn, test_xi, xi)
+    assert sum(len(ind) for ind in categories.values()) == np.count_nonzero(fn > 0) < fn.size
+    for ind in categories.values():
+        assert np.all(fn[ind[:, 0], ind[:, 1]] > 0)
+
+
+def test_render_chart(tmp_path):
+    freq, frf = synthetic_frf()
+    m = pyEMA.Model(frf=frf, freq=freq, lower=50, upper=1800, pol_order_high=20)
+    m.get_poles(show_progress=False)
+    m.select_closest_poles([250, 700, 1300])
+    m.get_constants()
+
+    fig = pyEMA.rendering.render_chart(m, str(tmp_path / 'stability.png'))
+    ax2, ax1 = fig.axes
+    assert ax1.get_xlim() == (50, 1800) and ax1.get_ylim() == (0, 25)
+    assert len(ax2.lines) == 2 # measured and reconstructed
+    pyEMA.rendering.render_chart(m, str(tmp_path / 'cluster.svg'), chart='cluster', pole_plot_type='density')
+
+    paths = [str(tmp_path / f'{i}.png') for i in range(2)]
+    m.save(str(tmp_path / 'model'))
+    assert pyEMA.rendering.render_batch([m, str(tmp_path / 'model')], paths, n_jobs=2) == paths
+    assert all(os.path.getsize(_) > 0 for _ in paths + [str(tmp_path / 'stability.png'), str(tmp_path / 'cluster.svg')])
@@ -0,0 +1,38 @@
+import pytest
+import numpy as np
+import sys, os
+my_path = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, my_path + '/../')
+sys.path.insert(0, my_path)
+
+import pyEMA
+
+from helpers import synthetic_frf
+
+
+freq, frf = synthetic_frf()
+nat_freq = [250, 700, 1300]
+
+
+def test_single_precision_accuracy():
+    result = {}
+    for dtype in ['double', 'single']:
+        m = pyEMA.Model(frf=frf, freq=freq, lower=50, upper=1800, pol_order_high=20, dtype=dtype)
+        m.get_poles(show_progress=False)
+        m.select_closest_poles(nat_freq)
+        H, A = m.get_constants(FRF_ind='all')
+        result[dtype] = (m, H, A)
+
+    m, H, A = result['double']
+    m_s, H_s, A_s = result['single']
+
+    assert m_s.frf.dtype == np.complex64
+    assert H_s.dtype == np.complex64
+    assert m_s.frf.nbytes == m.frf.nbytes // 2
+
+    assert np.allclose(m_s.nat_freq, m.nat_freq, rtol=1e-5)
+    assert np.allclose(m_s.nat_xi, m.nat_xi, rtol=1e-2)
+    assert np.linalg.norm(A_s - A) / np.linalg.norm(A) < 1e-2
+
+    band = (m.freq > 50) & (m.freq < 1800)
+    assert np.linalg.norm((H_s - H)[:, band]) / np.linalg.norm(H[:, band]) < 1e-2
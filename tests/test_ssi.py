@@ -0,0 +1,54 @@
+import pytest
+import numpy as np
+import scipy.signal
+import sys, os
+my_path = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, my_path + '/../')
+
+import pyEMA
+
+fs = 1024.
+nat_freq = [50., 140., 310.]
+nat_xi = [0.01, 0.02, 0.015]
+
+
+def ambient_response(n_channels=6, n_samples=100000, noise=0.05, seed=0):
+    """Responses of three modes to white noise, plus measurement noise."""
+    rng = np.random.default_rng(seed)
+    poles = np.exp(pyEMA.synthetic.modal_poles(nat_freq, nat_xi) / fs)
+    phi = rng.standard_normal((n_channels, len(poles)))
+    data = noise * rng.standard_normal((n_channels, n_samples))
+    for p, shape in zip(poles, phi.T):
+        b, a = scipy.signal.zpk2tf([], [p, np.conj(p)], 1)
+        q = scipy.signal.lfilter(b, a, rng.standard_normal(n_samples))
+        data += np.outer(shape, q / np.std(q))
+    return data, phi
+
+
+def test_correlations():
+    data = np.random.default_rng(0).standard_normal((3, 5000)) + 0.3
+    r = pyEMA.ssi.correlations(data, 7, ref_channels=[0, 2], chunk_size=700)
+
+    n = data.shape[1]
+    y = data - np.mean(data, axis=1, keepdims=True)
+    direct = np.array([y[:, i:] @ y[[0, 2], :n-i].T / (n-i) for i in range(8)])
+    assert np.allclose(r, direct)
+
+
+def test_from_time_data(tmp_path):
+    data, phi = ambient_response()
+    path = str(tmp_path / 'data.npy')
+    np.save(path, data)
+
+    m = pyEMA.Model.from_time_data(path, fs, lower=5, upper=450, pol_order_high=20, seed=0, show_progress=False)
+    assert m.pole_table.n_orders == 20
+    assert np.array_equal(m.pole_table.counts, np.arange(2, 41, 2))
+    assert m.frf.shape[0] == 36 and m.freq[-1] < 450
+
+    m.select_closest_poles(nat_freq)
+    assert np.allclose(m.nat_freq, nat_freq, rtol=1e-3)
+    assert np.allclose(m.nat_xi, nat_xi, rtol=0.1)
+
+    # the poles of all the orders come from one factorization
+    table = pyEMA.ssi.ssi_cov(None, fs, 20, r=m.correlations, seed=0)
+    assert np.allclose(table.pole, m.pole_table.pole)
@@ -0,0 +1,47 @@
+import pytest
+import json
+import numpy as np
+import sys, os
+my_path = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, my_path + '/../')
+sys.path.insert(0, my_path)
+
+import pyEMA
+
+from helpers import synthetic_frf
+
+
+def test_save_load(tmp_path):
+    freq, frf = synthetic_frf()
+    m = pyEMA.Model(frf=frf, freq=freq, lower=50, upper=1800, pol_order_high=20)
+    m.get_poles(show_progress=False)
+    m.select_closest_poles([250, 700, 1300])
+    H, A = m.get_constants()
+
+    path = str(tmp_path / 'model')
+    m.save(path)
+    m.save(path) # replaces the saved model
+
+    l = pyEMA.Model.load(path)
+    assert isinstance(l.frf, np.memmap) and isinstance(l.H, np.memmap)
+    for name in ['freq', 'frf', 'omega', 'pole_ind', 'nat_freq', 'nat_xi', 'A', 'LR', 'UR', 'H']:
+        assert np.array_equal(getattr(l, name), getattr(m, name))
+    assert np.array_equal(l.pole_table.data, m.pole_table.data)
+    assert (l.lower, l.upper, l.pol_order_high, l.sampling_time) == (m.lower, m.upper, m.pol_order_high, m.sampling_time)
+
+    # the loaded model can be used as the original one
+    H_l, A_l = l.get_constants()
+    assert np.allclose(H_l, H) and np.allclose(A_l, A)
+    l.get_poles(show_progress=False)
+    assert np.allclose(l.pole_table.pole, m.pole_table.pole)
+
+    l = pyEMA.Model.load(path, mmap=False)
+    assert not isinstance(l.frf, np.memmap)
+
+    with open(os.path.join(path, 'model.json')) as f:
+        meta = json.load(f)
+    meta['format_version'] += 1
+    with open(os.path.join(path, 'model.json'), 'w') as f:
+        json.dump(meta, f)
+    with pytest.raises(Exception):
+        pyEMA.Model.load(path)
@@ -0,0 +1,33 @@
+import pytest
+import numpy as np
+import sys, os
+my_path = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, my_path + '/../')
+
+import pyEMA
+
+
+def test_synthetic_frf(tmp_path):
+    freq = np.linspace(1, 2000, 1001)
+    omega = 2 * np.pi * freq
+    poles = pyEMA.synthetic.modal_poles([250, 700], [0.01, 0.02])
+    A = np.random.default_rng(0).standard_normal((10, 2)) + 1j
+    LR = np.arange(10) * 1e3
+    UR = np.arange(10) * 1e-6
+
+    ref = -LR[:, None]/omega**2 + UR[:, None]
+    for r in range(2):
+        ref = ref + A[:, r:r+1]/(1j*omega - poles[r]) + np.conj(A[:, r:r+1])/(1j*omega - np.conj(poles[r]))
+    H = pyEMA.synthetic.frf(freq, poles, A, LR=LR, UR=UR, chunk_size=3)
+    assert np.allclose(H, ref)
+
+    fn, xi = pyEMA.complex_freq_to_freq_and_damp(poles)
+    assert np.allclose(fn, [250, 700]) and np.allclose(xi, [0.01, 0.02])
+
+    # the noise does not depend on the chunk size, the output can be memory-mapped
+    H1 = pyEMA.synthetic.frf(freq, poles, A, noise=0.01, seed=1, chunk_size=3)
+    H2 = pyEMA.synthetic.frf(freq, poles, A, noise=0.01, seed=1, out=str(tmp_path / 'frf.npy'))
+    assert isinstance(H2, np.memmap)
+    assert np.allclose(H1, H2)
+    assert np.allclose(np.load(tmp_path / 'frf.npy'), H1)
+    assert 0.005 < np.std(H1 - pyEMA.synthetic.frf(freq, poles, A)) / np.sqrt(np.mean(np.abs(H1)**2)) < 0.02
@@ -0,0 +1,45 @@
+import pytest
+import numpy as np
+import sys, os
+my_path = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, my_path + '/../')
+sys.path.insert(0, my_path)
+
+import pyEMA
+from helpers import synthetic_frf
+
+
+def test_lscf_order_subset():
+    freq, frf = synthetic_frf()
+    full = pyEMA.LSCF(freq, 50, 20)
+    full.add(frf)
+    full = full.poles()
+
+    part = pyEMA.LSCF(freq, 50, 20, orders=[4, 5, 6])
+    part.add(frf)
+    part = part.poles()
+
+    assert part.n_orders == 20
+    assert np.array_equal(part.counts[[3, 4, 5, 6, 7]], [0, 10, 12, 14, 0])
+    for k in [4, 5, 6]:
+        assert np.allclose(np.sort_complex(part.split('pole')[k]), np.sort_complex(full.split('pole')[k]))
+
+
+def test_track_modes():
+    freq, frf = synthetic_frf()
+    a = pyEMA.Model(frf=frf, freq=freq, lower=50, upper=1800, pol_order_high=20)
+    a.get_poles(show_progress=False)
+    a.select_closest_poles([250, 700, 1300])
+    a.get_constants(FRF_ind=None)
+
+    freq, frf_next = synthetic_frf(fn=np.array([250, 700, 1300]) * 1.002)
+    b = pyEMA.Model(frf=frf_next, freq=freq, lower=50, upper=1800, pol_order_high=20)
+    assert b.track_modes(a)
+    assert np.allclose(b.nat_freq, np.array([250, 700, 1300]) * 1.002, rtol=1e-3)
+    assert b.lscf.n < 2 * 20
+
+    # the modes moved too far, the full computation is used
+    c = pyEMA.Model(frf=frf_next, freq=freq, lower=50, upper=1800, pol_order_high=20)
+    a.nat_freq = np.array([250, 700, 1300]) * 1.2
+    assert not c.track_modes(a)
+    assert c.pole_table.n_orders == 20 and np.all(c.pole_table.counts > 0)
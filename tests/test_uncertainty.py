@@ -0,0 +1,78 @@
+import pytest
+import numpy as np
+import sys, os
+my_path = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, my_path + '/../')
+
+import pyEMA
+
+
+freq = np.linspace(0, 2000, 1001)
+frf = pyEMA.synthetic.frf(freq, pyEMA.synthetic.modal_poles([250, 700, 1300], [0.01, 0.02, 0.015]),
+                          np.random.default_rng(0).standard_normal((8, 3)) * 1e3, noise=0.05, seed=1)
+
+
+def noisy_model():
+    m = pyEMA.Model(frf=frf, freq=freq, lower=50, upper=1800, pol_order_high=20)
+    m.get_poles(show_progress=False)
+    m.select_closest_poles([250, 700, 1300])
+    m.get_constants()
+    return m
+
+
+def test_uncertainty():
+    m = noisy_model()
+    table = m.pole_table
+    u = m.get_uncertainty(n_replicates=20, seed=0, n_jobs=2)
+    assert u is m.uncertainty
+    assert np.allclose(u['nat_freq']['estimate'], table.freq[table.flat_index(m.pole_ind)])
+    assert np.allclose(u['A']['estimate'], m.A)
+    for key in ['nat_freq', 'nat_xi']:
+        assert np.all(u[key]['std'] > 0)
+        assert np.all(u[key]['lower'] < u[key]['upper'])
+    assert np.all(np.abs(u['nat_freq']['estimate'] - [250, 700, 1300]) < 5*u['nat_freq']['std'] + 1)
+    assert u['A']['lower'].shape == m.A.shape
+
+    u_j = m.get_uncertainty(method='jackknife', n_jobs=2)
+    assert np.allclose(u_j['nat_freq']['estimate'], u['nat_freq']['estimate'])
+    assert np.allclose(u_j['nat_freq']['upper'] - u_j['nat_freq']['estimate'],
+                       u_j['nat_freq']['estimate'] - u_j['nat_freq']['lower'])
+
+
+def test_replicate_weights():
+    # a replicate reuses the transformed channels of the base fit; it is
+    # equal to a weighted fit of the FRFs
+    m = noisy_model()
+    weights = np.array([0, 2, 1, 1, 3, 0, 1, 0], dtype=float)
+    w = pyEMA.Model(frf=frf, freq=freq, lower=50, upper=1800, pol_order_high=20)
+    w.get_poles(show_progress=False, weights=weights)
+    # the poles of the weighted fit closest to the selected poles
+    selected = m.pole_table.pole[m.pole_table.flat_index(m.pole_ind)]
+    w.pole_ind = [[k, np.argmin(np.abs(w.all_poles[k] - p))] for k, p in zip(m.pole_ind[:, 0], selected)]
+    w.get_constants(FRF_ind=None)
+
+    m.get_poles(show_progress=False, weights=weights) # the selection is kept
+    u = m.get_uncertainty(method='jackknife', n_jobs=1)
+    assert np.allclose(u['nat_freq']['estimate'], w.pole_table.freq[w.pole_table.flat_index(m.pole_ind)])
+    assert np.allclose(u['A']['estimate'], w.A)
+
+
+def test_uncertainty_methods():
+    # the replicates are refitted with the estimator of the pole table
+    for method, _frf in [('lsce', frf), ('plscf', frf.reshape(4, 2, -1))]:
+        m = pyEMA.Model(frf=_frf, freq=freq, lower=50, upper=1800, pol_order_high=20)
+        m.get_poles(method=method, show_progress=False, orders=range(4, 12))
+        m.select_closest_poles([250, 700, 1300])
+        m.get_constants()
+        table = m.pole_table
+        u = m.get_uncertainty(method='jackknife', n_jobs=1)
+        assert np.allclose(u['nat_freq']['estimate'], table.freq[table.flat_index(m.pole_ind)])
+        assert np.allclose(u['nat_xi']['estimate'], table.xi[table.flat_index(m.pole_ind)])
+        assert np.allclose(u['A']['estimate'], m.A)
+        assert np.all(u['nat_xi']['std'] > 0)
+
+    m = pyEMA.Model(frf=frf, freq=freq, lower=50, upper=1800, pol_order_high=20)
+    m.get_poles_multiband(n_bands=2, n_jobs=1)
+    m.select_closest_poles([250, 700, 1300])
+    with pytest.raises(Exception, match='multiband'):
+        m.get_uncertainty(n_jobs=1)